@@ -175,8 +175,8 @@ def save_snapshot(rows, snapshot):
         pass
 
 
-def run_once_cycle(token: str, baseline: set, last_seen: set):
-    session = requests.Session()
+def run_once_cycle(token: str, baseline: set, last_seen: set, session: requests.Session | None = None):
+    session = session or requests.Session()
     login(session)
     now_snapshot, rows = collect_rolling_30d_snapshot(session, WATCH_NAMES)
 
@@ -195,29 +195,35 @@ def run_once_cycle(token: str, baseline: set, last_seen: set):
     return now_snapshot
 
 
+def start_monitor(token: str, session: requests.Session | None = None):
+    """첫 조회로 baseline 을 새로 잡거나(state 없음) 저장된 것을 불러온다. (baseline, last_seen)"""
+    session = session or requests.Session()
+    login(session)
+    current_snapshot, rows = collect_rolling_30d_snapshot(session, WATCH_NAMES)
+    state = load_state()
+
+    if not state.get("baseline"):
+        baseline = set(current_snapshot)
+        last_seen = set(current_snapshot)
+        save_state(baseline, last_seen)
+        save_snapshot(rows, current_snapshot)
+        safe_telegram(token, "✅ 친구 예약 모니터 시작(30분 주기). 현재 시점 이전 예약은 알림에서 제외합니다.")
+        log("monitor started with new baseline")
+    else:
+        baseline = set(tuple(x) for x in state.get("baseline", []))
+        last_seen = set(tuple(x) for x in state.get("last_seen", []))
+        save_snapshot(rows, current_snapshot)
+        safe_telegram(token, "✅ 친구 예약 모니터 재시작(30분 주기).")
+        log("monitor restarted with existing baseline")
+    return baseline, last_seen
+
+
 def main():
     while True:
         try:
             require_env()
             token = load_token()
-            session = requests.Session()
-            login(session)
-            current_snapshot, rows = collect_rolling_30d_snapshot(session, WATCH_NAMES)
-            state = load_state()
-
-            if not state.get("baseline"):
-                baseline = set(current_snapshot)
-                last_seen = set(current_snapshot)
-                save_state(baseline, last_seen)
-                save_snapshot(rows, current_snapshot)
-                safe_telegram(token, "✅ 친구 예약 모니터 시작(30분 주기). 현재 시점 이전 예약은 알림에서 제외합니다.")
-                log("monitor started with new baseline")
-            else:
-                baseline = set(tuple(x) for x in state.get("baseline", []))
-                last_seen = set(tuple(x) for x in state.get("last_seen", []))
-                save_snapshot(rows, current_snapshot)
-                safe_telegram(token, "✅ 친구 예약 모니터 재시작(30분 주기).")
-                log("monitor restarted with existing baseline")
+            baseline, last_seen = start_monitor(token)
 
             while True:
                 try:
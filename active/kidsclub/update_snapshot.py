@@ -107,8 +107,8 @@ def collect_rows(session: requests.Session):
     return rows, friend_hits, child_hits
 
 
-def main():
-    session = requests.Session()
+def main(session: requests.Session | None = None):
+    session = session or requests.Session()
     login(session)
     rows, friend_hits, child_hits = collect_rows(session)
 
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Backtest penguin_monitor.analyze rules on the recorded time series (로컬 데이터만 사용).
+
+timeseries ring buffer(TS_DIR/raw.bin, 토큰별 TS_DIR/<chain>-<address>/raw.bin)를 numpy 로 통째로 읽고
+analyze 의 규칙을 점 단위 루프 없이 한 번에 계산한다.
+  - m5 / h1 변화율: searchsorted 로 창 시작 index → price[i] / price[j] (창의 80% 이상 덮을 때만, live 와 같음)
+    live 는 덮지 못하면 DexScreener priceChange 로 대신하지만 이력에는 그 값이 없어서 0 으로 본다
+  - 유동성 drawdown: 1h 창 고점은 sparse table range-max (O(n log n) 준비, 질의는 level 별 한 번씩)
+  - 매도 우위: sells / buys 비율
+  - forward return: ts + horizon 이후 첫 점의 가격 (다음 점이 horizon 의 1.5 배보다 멀면 NaN)
+리포트: 신호별 점 수 / 진입 수, 신호 전이 행렬, horizon 별 forward return 평균·중앙값·방향 적중률
+sweep: threshold grid 의 모든 조합을 (조합 x 점) 행렬 비교로 한 번에 평가 → 수천 조합도 몇 초
+
+Usage:
+  python3 backtest.py                                  # 모든 토큰, 현재 THRESHOLDS
+  python3 backtest.py --token solana-<address> --horizons 1h,4h,24h
+  python3 backtest.py --sweep                          # 기본 grid
+  python3 backtest.py --sweep --grid drop_1h_pct=-8:-3:1 --grid liq_drop_pct=-20,-15,-12,-8 --horizon 4h
+  python3 backtest.py --check 300                      # 마지막 300 점을 analyze 로 직접 돌려서 벡터 결과와 대조
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from penguin_monitor import CHAIN, THRESHOLDS, TOKEN, WINDOWS, analyze
+from timeseries import TIERS, TS_DIR, Ring, RollingStats, Sample
+
+SIGNALS = ("조건부 분할매수", "관망", "비중감축")
+SAMPLE = np.dtype([("ts", "<i8"), ("price", "<f8"), ("liq", "<f8"), ("vol_h1", "<f8"), ("buys_h1", "<i4"), ("sells_h1", "<i4")])
+COVERAGE = 0.8
+# forward return 은 다음 점이 horizon 의 이만큼 배보다 멀면 (수집 공백) 버린다
+FWD_SLACK = 1.5
+SWEEP_CELLS = 4_000_000
+DEFAULT_GRID = {
+    "drop_1h_pct": [-8.0, -6.0, -5.0, -4.0, -3.0],
+    "drop_5m_pct": [-4.0, -3.0, -2.5, -2.0, -1.5],
+    "liq_drop_pct": [-20.0, -15.0, -12.0, -8.0],
+    "sell_bias_ratio": [1.2, 1.35, 1.5, 2.0],
+    "watch_1h_pct": [-4.0, -3.0, -2.0, -1.0],
+}
+
+
+def parse_duration(s: str) -> int:
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    return int(float(s[:-1]) * units[s[-1]]) if s[-1] in units else int(s)
+
+
+def load_tier(root: Path, tier: str = "raw") -> np.ndarray:
+    """ring 파일 하나를 오래된 것부터 structured array 로."""
+    cap = dict((n, c) for n, _, c in TIERS)[tier]
+    path = root / f"{tier}.bin"
+    if not path.exists():
+        return np.empty(0, dtype=SAMPLE)
+    ring = Ring(path, cap)
+    n, start = len(ring), (ring.count % ring.capacity if ring.count > ring.capacity else 0)
+    ring.close()
+    rows = np.fromfile(path, dtype=SAMPLE, count=ring.capacity, offset=Ring.HEADER.size)[:n]
+    rows = np.roll(rows, -start)
+    rows = rows[np.argsort(rows["ts"], kind="stable")]
+    # live 는 pair 가 없으면 점을 안 남기지만, 혹시 있는 0 가격 점은 빼둔다
+    return rows[rows["price"] > 0]
+
+
+def discover(root: Path, tier: str = "raw") -> dict[str, np.ndarray]:
+    """기본 토큰(TS_DIR 바로 아래) + 하위 디렉터리 토큰."""
+    out = {}
+    if (root / f"{tier}.bin").exists():
+        out[f"{CHAIN}-{TOKEN}"] = load_tier(root, tier)
+    for d in sorted(p for p in root.iterdir() if p.is_dir()) if root.exists() else []:
+        if (d / f"{tier}.bin").exists():
+            out[d.name] = load_tier(d, tier)
+    return {k: v for k, v in out.items() if len(v)}
+
+
+def range_max(x: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """x[lo[i]..hi[i]] (양끝 포함) 의 max. sparse table."""
+    levels = [x]
+    while (1 << len(levels)) <= len(x):
+        prev, half = levels[-1], 1 << (len(levels) - 1)
+        levels.append(np.maximum(prev[:-half], prev[half:]))
+    k = np.floor(np.log2(hi - lo + 1)).astype(np.intp)
+    out = np.empty(len(lo), dtype=x.dtype)
+    for lvl in np.unique(k):
+        m = k == lvl
+        t = levels[lvl]
+        out[m] = np.maximum(t[lo[m]], t[hi[m] - (1 << lvl) + 1])
+    return out
+
+
+def window_change(ts: np.ndarray, price: np.ndarray, window: int) -> np.ndarray:
+    """RollingStats(window).change_pct, 창을 COVERAGE 이상 덮지 못하면 0 (live 의 dex fallback 자리)."""
+    j = np.searchsorted(ts, ts - window, side="left")
+    p0 = price[j]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chg = np.where(p0 > 0, (price / p0 - 1) * 100, np.nan)
+    return np.where(ts - ts[j] >= window * COVERAGE, chg, 0.0)
+
+
+def features(rows: np.ndarray) -> dict[str, np.ndarray]:
+    """analyze 가 threshold 와 비교하는 값들. threshold 와 무관하므로 sweep 에서도 한 번만 계산."""
+    ts, price, liq = rows["ts"], rows["price"], rows["liq"]
+    buys = rows["buys_h1"].astype(np.float64)
+    sells = rows["sells_h1"].astype(np.float64)
+    j = np.searchsorted(ts, ts - WINDOWS["h1"], side="left")
+    idx = np.arange(len(ts))
+    peak = range_max(liq, j, idx) if len(ts) else liq
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, (liq / peak - 1) * 100, np.nan)
+        # buys == 0 이면 매도 우위로 보지 않는다 (analyze 와 같음)
+        ratio = np.where(buys > 0, sells / buys, -np.inf)
+    return {
+        "m5": window_change(ts, price, WINDOWS["m5"]),
+        "h1": window_change(ts, price, WINDOWS["h1"]),
+        "liq_dd": np.where(idx - j + 1 >= 2, dd, 0.0),
+        "sell_ratio": ratio,
+    }
+
+
+def signals(f: dict[str, np.ndarray], th: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    th 값이 (조합 수, 1) 배열이면 결과는 (조합 수, 점 수). 0/1/2 = SIGNALS index.
+    NaN 비교는 False 라서 live 에서 NaN 이 경고를 안 내는 것과 같다.
+    """
+    h1 = f["h1"] <= th["drop_1h_pct"]
+    hard = (
+        h1.astype(np.int8)
+        + (f["m5"] <= th["drop_5m_pct"])
+        + (f["liq_dd"] <= th["liq_drop_pct"])
+        + (f["sell_ratio"] > th["sell_bias_ratio"])
+    )
+    return np.where(hard >= 2, 2, np.where(f["h1"] <= th["watch_1h_pct"], 1, 0)).astype(np.int8)
+
+
+def forward_returns(ts: np.ndarray, price: np.ndarray, horizon: int) -> np.ndarray:
+    k = np.searchsorted(ts, ts + horizon, side="left")
+    ok = k < len(ts)
+    k = np.minimum(k, len(ts) - 1)
+    ok &= ts[k] - ts <= horizon * FWD_SLACK
+    return np.where(ok, (price[k] / price - 1) * 100, np.nan)
+
+
+def prepare(series: dict[str, np.ndarray], horizons: list[int]) -> dict:
+    """토큰별로 feature / forward return 을 구해서 이어붙인다. 토큰 경계에서는 전이를 세지 않는다."""
+    feats, fwd, first = [], {h: [] for h in horizons}, []
+    for rows in series.values():
+        feats.append(features(rows))
+        for h in horizons:
+            fwd[h].append(forward_returns(rows["ts"], rows["price"], h))
+        b = np.zeros(len(rows), dtype=bool)
+        b[0] = True
+        first.append(b)
+    return {
+        "f": {k: np.concatenate([x[k] for x in feats]) for k in feats[0]},
+        "fwd": {h: np.concatenate(v) for h, v in fwd.items()},
+        "first": np.concatenate(first),
+    }
+
+
+def fmt_h(sec: int) -> str:
+    return f"{sec // 86400}d" if sec % 86400 == 0 else f"{sec // 3600}h" if sec % 3600 == 0 else f"{sec // 60}m"
+
+
+def report(data: dict, th: dict, horizons: list[int]) -> dict:
+    sig = signals(data["f"], {k: np.float64(v) for k, v in th.items()})
+    prev = np.where(data["first"], -1, np.roll(sig, 1))
+    entry = (sig != prev) & ~data["first"]
+    trans = np.zeros((3, 3), dtype=np.int64)
+    np.add.at(trans, (prev[entry], sig[entry]), 1)
+
+    out = {"points": int(len(sig)), "signals": {}, "transitions": {}}
+    for s, name in enumerate(SIGNALS):
+        m = sig == s
+        row = {"points": int(m.sum()), "entries": int((m & entry).sum()), "fwd": {}}
+        for h in horizons:
+            r = data["fwd"][h][m]
+            r = r[~np.isnan(r)]
+            e = data["fwd"][h][m & entry]
+            e = e[~np.isnan(e)]
+            row["fwd"][fmt_h(h)] = {
+                "n": int(len(r)),
+                "mean": float(r.mean()) if len(r) else None,
+                "median": float(np.median(r)) if len(r) else None,
+                "up": float((r > 0).mean()) if len(r) else None,
+                "entry_mean": float(e.mean()) if len(e) else None,
+            }
+        out["signals"][name] = row
+    for a, b in zip(*np.nonzero(trans)):
+        out["transitions"][f"{SIGNALS[a]} -> {SIGNALS[b]}"] = int(trans[a, b])
+    return out
+
+
+def print_report(r: dict, horizons: list[int]) -> None:
+    print(f"[BACKTEST] points={r['points']}")
+    for name, row in r["signals"].items():
+        share = row["points"] / max(1, r["points"])
+        print(f"  {name}: points={row['points']} ({share:.1%}) entries={row['entries']}")
+        for h in horizons:
+            x = row["fwd"][fmt_h(h)]
+            if not x["n"]:
+                print(f"    fwd {fmt_h(h)}: n=0")
+                continue
+            em = f"{x['entry_mean']:+.2f}%" if x["entry_mean"] is not None else "-"
+            print(f"    fwd {fmt_h(h)}: n={x['n']} mean={x['mean']:+.2f}% median={x['median']:+.2f}% "
+                  f"up={x['up']:.0%} entry_mean={em}")
+    print("[TRANSITIONS]")
+    for k, v in sorted(r["transitions"].items(), key=lambda kv: -kv[1]):
+        print(f"  {k}: {v}")
+
+
+def parse_grid(items: list[str]) -> dict[str, list[float]]:
+    grid = dict(DEFAULT_GRID)
+    for item in items:
+        key, _, spec = item.partition("=")
+        if key not in THRESHOLDS:
+            raise SystemExit(f"unknown threshold: {key} ({', '.join(THRESHOLDS)})")
+        if ":" in spec:
+            a, b, step = (float(x) for x in spec.split(":"))
+            grid[key] = [round(v, 6) for v in np.arange(a, b + step / 2, step)]
+        else:
+            grid[key] = [float(x) for x in spec.split(",")]
+    return grid
+
+
+def sweep(data: dict, grid: dict[str, list[float]], horizon: int, min_entries: int, top: int) -> tuple[list[dict], int]:
+    """
+    조합마다: 비중감축 점들의 forward return 평균(낮을수록 좋음), 분할매수 점들의 평균(높을수록 좋음),
+    둘의 차이(spread) 로 정렬. 비중감축 진입이 min_entries 미만인 조합은 뺀다.
+    """
+    keys = list(THRESHOLDS)
+    combos = np.array(list(itertools.product(*(grid.get(k, [THRESHOLDS[k]]) for k in keys))), dtype=np.float64)
+    f, fwd, first = data["f"], data["fwd"][horizon], data["first"]
+    valid = ~np.isnan(fwd)
+    r = np.where(valid, fwd, 0.0)
+    n = len(fwd)
+    results = []
+    step = max(1, SWEEP_CELLS // max(1, n))
+    for c0 in range(0, len(combos), step):
+        chunk = combos[c0:c0 + step]
+        th = {k: chunk[:, i:i + 1] for i, k in enumerate(keys)}
+        sig = signals(f, th)
+        prev = np.concatenate([np.full((len(chunk), 1), -1, np.int8), sig[:, :-1]], axis=1)
+        entries = ((sig == 2) & (prev != 2) & ~first).sum(axis=1)
+        stats = []
+        for s in (0, 2):
+            m = (sig == s) & valid
+            cnt = m.sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                stats.append((cnt, (m * r).sum(axis=1) / cnt, ((m & (r < 0)).sum(axis=1)) / cnt))
+        (buy_n, buy_mean, _), (cut_n, cut_mean, cut_hit) = stats
+        for i in range(len(chunk)):
+            if entries[i] < min_entries:
+                continue
+            results.append({
+                "thresholds": dict(zip(keys, chunk[i].tolist())),
+                "cut_entries": int(entries[i]),
+                "cut_points": int(cut_n[i]),
+                "cut_mean": float(cut_mean[i]),
+                "cut_hit": float(cut_hit[i]),
+                "buy_points": int(buy_n[i]),
+                "buy_mean": float(buy_mean[i]),
+                "spread": float(buy_mean[i] - cut_mean[i]),
+            })
+    results = [x for x in results if not np.isnan(x["spread"])]
+    results.sort(key=lambda x: -x["spread"])
+    return results[:top], len(combos)
+
+
+def check(rows: np.ndarray, th: dict, last: int) -> int:
+    """마지막 last 점을 live 와 같은 방식(RollingStats push + analyze)으로 돌려서 벡터 결과와 비교."""
+    vec = signals(features(rows), {k: np.float64(v) for k, v in th.items()})
+    start = max(0, len(rows) - last)
+    t0 = int(rows["ts"][start]) - max(WINDOWS.values())
+    hist = {k: RollingStats(sec) for k, sec in WINDOWS.items()}
+    mismatch = 0
+    for i, row in enumerate(rows):
+        if row["ts"] < t0:
+            continue
+        s = Sample(*(x.item() for x in row))
+        for st in hist.values():
+            st.push(s)
+        if i < start:
+            continue
+        cur = {"priceChange": {}, "txns": {"h1": {"buys": s.buys_h1, "sells": s.sells_h1}}}
+        _, sig = analyze(cur, hist, th)
+        if SIGNALS.index(sig) != vec[i]:
+            mismatch += 1
+            if mismatch <= 5:
+                print(f"  mismatch ts={s.ts}: analyze={sig} vector={SIGNALS[vec[i]]}", file=sys.stderr)
+    print(f"[CHECK] {len(rows) - start} points, mismatch={mismatch}")
+    return 1 if mismatch else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", type=Path, default=TS_DIR)
+    ap.add_argument("--token", action="append", help="<chain>-<address> (여러 번 가능, 기본 전부)")
+    ap.add_argument("--tier", default="raw", choices=[n for n, _, _ in TIERS])
+    ap.add_argument("--horizons", default="1h,4h,24h")
+    ap.add_argument("--threshold", action="append", default=[], help="key=value 로 THRESHOLDS 덮어쓰기")
+    ap.add_argument("--sweep", action="store_true")
+    ap.add_argument("--grid", action="append", default=[], help="key=a:b:step 또는 key=v1,v2,... (나머지는 DEFAULT_GRID)")
+    ap.add_argument("--horizon", default="1h", help="sweep 평가 horizon")
+    ap.add_argument("--min-entries", type=int, default=3)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--check", type=int, default=0, metavar="N")
+    ap.add_argument("--out", type=Path, help="결과 json 저장 (state/ 아래 권장)")
+    args = ap.parse_args()
+
+    th = dict(THRESHOLDS)
+    for item in args.threshold:
+        k, _, v = item.partition("=")
+        if k not in th:
+            raise SystemExit(f"unknown threshold: {k}")
+        th[k] = float(v)
+
+    t0 = time.perf_counter()
+    series = discover(args.root, args.tier)
+    if args.token:
+        series = {k: v for k, v in series.items() if k in args.token}
+    if not series:
+        print(f"no recorded series under {args.root}", file=sys.stderr)
+        return 1
+    for name, rows in series.items():
+        span = (rows["ts"][-1] - rows["ts"][0]) / 3600
+        print(f"[DATA] {name[:24]}: {len(rows)} points, {span:.1f}h")
+
+    if args.check:
+        return max(check(rows, th, args.check) for rows in series.values())
+
+    horizons = [parse_duration(h) for h in args.horizons.split(",")]
+    sweep_h = parse_duration(args.horizon)
+    data = prepare(series, sorted(set(horizons) | ({sweep_h} if args.sweep else set())))
+    result = {"thresholds": th, "tier": args.tier, "tokens": list(series), "report": report(data, th, horizons)}
+    print_report(result["report"], horizons)
+
+    if args.sweep:
+        t1 = time.perf_counter()
+        best, n = sweep(data, parse_grid(args.grid), sweep_h, args.min_entries, args.top)
+        print(f"[SWEEP] combos={n} points={len(data['first'])} horizon={fmt_h(sweep_h)} in {time.perf_counter() - t1:.2f}s")
+        for x in best:
+            diff = " ".join(f"{k}={v:g}" for k, v in x["thresholds"].items() if v != THRESHOLDS[k]) or "(current)"
+            print(f"  spread={x['spread']:+.2f}% cut: n={x['cut_entries']} mean={x['cut_mean']:+.2f}% hit={x['cut_hit']:.0%} "
+                  f"| buy: mean={x['buy_mean']:+.2f}% | {diff}")
+        result["sweep"] = {"horizon": fmt_h(sweep_h), "combos": n, "best": best}
+
+    print(f"[TIME] {time.perf_counter() - t0:.2f}s")
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
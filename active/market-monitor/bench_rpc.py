@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the market-monitor analysis scripts.
+
+rpc_standin 을 띄우고 각 스크립트를 SOLANA_RPC_URL=stand-in 으로 실행해서
+  RPC 요청 수 / 항목 수 / 메서드별 카운트, wall time, peak RSS(자식 프로세스)
+를 측정한다. 상태 파일(tx 캐시, cursor, flow graph, holder snapshot, 리포트)은 임시 디렉터리로 돌리고
+cold(빈 상태) → warm(같은 상태로 한 번 더) 순서로 재서 캐시/cursor 효과도 같이 본다.
+
+Usage:
+  python bench_rpc.py                                     # 합성 fixture 로 기본 스크립트 전부
+  python bench_rpc.py --fixtures rec.jsonl --scripts penguin_14d_analysis.py --latency-ms 50 --http-429 0.05
+  python bench_rpc.py --out bench_rpc.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import rpc_fixtures
+import rpc_standin
+
+HERE = Path(__file__).resolve().parent
+SCRIPTS = ["penguin_14d_analysis.py", "penguin_top20_flow.py", "holder_snapshot.py", "penguin_insider_probe.py"]
+
+
+def stand_in_stats(url: str, reset: bool = False) -> dict:
+    with urllib.request.urlopen(f"{url}/stats{'?reset=1' if reset else ''}", timeout=10) as r:
+        return json.loads(r.read())
+
+
+def run_script(script: str, env: dict, timeout: float) -> dict:
+    t0 = time.perf_counter()
+    p = subprocess.Popen([sys.executable, str(HERE / script)], cwd=str(HERE), env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = t0 + timeout
+    while True:
+        pid, status, usage = os.wait4(p.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.perf_counter() > deadline:
+            p.kill()
+            pid, status, usage = os.wait4(p.pid, 0)
+            break
+        time.sleep(0.01)
+    wall = time.perf_counter() - t0
+    p.returncode = os.waitstatus_to_exitcode(status)
+    err = p.stderr.read().decode(errors="replace")
+    p.stderr.close()
+    return {
+        "exit": p.returncode,
+        "wall_s": round(wall, 3),
+        # linux 는 KiB 단위
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "stderr_tail": err.strip().splitlines()[-3:] if p.returncode else [],
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", nargs="*", help="녹화 fixture jsonl (없으면 합성)")
+    ap.add_argument("--scripts", default=",".join(SCRIPTS))
+    ap.add_argument("--holders", type=int, default=20000, help="합성 fixture holder 수")
+    ap.add_argument("--active", type=int, default=40)
+    ap.add_argument("--sigs", type=int, default=300)
+    ap.add_argument("--port", type=int, default=18899)
+    ap.add_argument("--latency-ms", type=float, default=0)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--http-429", type=float, default=0)
+    ap.add_argument("--item-429", type=float, default=0)
+    ap.add_argument("--rps", type=float, default=1000, help="client token bucket (stand-in 이라 기본은 사실상 무제한)")
+    ap.add_argument("--timeout", type=float, default=600)
+    ap.add_argument("--out")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="rpc-bench-") as tmp:
+        tmp = Path(tmp)
+        fixtures = args.fixtures
+        if not fixtures:
+            fixtures = [str(tmp / "synth.jsonl")]
+            rpc_fixtures.synth(Path(fixtures[0]), args.holders, args.active, args.sigs)
+        server, _ = rpc_standin.serve(fixtures, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                      http_429=args.http_429, item_429=args.item_429)
+        url = f"http://127.0.0.1:{args.port}"
+        results = []
+        try:
+            for script in args.scripts.split(","):
+                state = tmp / Path(script).stem
+                state.mkdir()
+                env = {
+                    **os.environ,
+                    "SOLANA_RPC_URL": url,
+                    "SOLANA_RPC_RPS": str(args.rps),
+                    "SOLANA_TX_CACHE": str(state / "tx.sqlite"),
+                    "SOLANA_CURSOR_DB": str(state / "cursors.sqlite"),
+                    "SOLANA_JOB_DB": str(state / "jobs.sqlite"),
+                    "SOLANA_OWNER_CACHE": str(state / "owners.sqlite"),
+                    "SOLANA_SEEN_DB": str(state / "seen.sqlite"),
+                    "OUTFLOW_RULES_DB": str(state / "rules.sqlite"),
+                    "SOLANA_FLOW_GRAPH": str(state / "graph.sqlite"),
+                    "HOLDER_SNAPSHOT_DIR": str(state / "snapshots"),
+                    "PENGUIN_REPORT": str(state / "report.json"),
+                }
+                env.pop("SOLANA_RPC_RECORD", None)
+                for phase in ("cold", "warm"):
+                    stand_in_stats(url, reset=True)
+                    row = {"script": script, "phase": phase, **run_script(script, env, args.timeout)}
+                    st = stand_in_stats(url)
+                    row.update(rpc_requests=st["requests"], rpc_items=st["items"], throttled=st["throttled"],
+                               by_method=st["by_method"])
+                    results.append(row)
+                    print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+        finally:
+            server.shutdown()
+
+    report = {"fixtures": args.fixtures or "synthetic", "latency_ms": args.latency_ms, "http_429": args.http_429,
+              "item_429": args.item_429, "results": results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 1 if any(r["exit"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
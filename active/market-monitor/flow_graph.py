@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Counterparty flow graph for a tracked mint (SQLite adjacency index).
+
+캐시된 tx(tx_cache)의 pre/post token balance 에서 (from, to, amount, time) edge 를 뽑는다.
+  - tx 하나에서 잔고가 줄어든 owner = sender, 늘어난 owner = receiver
+  - sender 유출량을 receiver 유입 비율대로 나눠 edge 로 (raw 정수, 나머지는 버림)
+질의(expand / sinks)는 로컬 인덱스만 본다. RPC 는 ingest 때만 쓴다.
+
+labels.json (SOLANA_LABELS 로 경로 변경) 에 CEX/AMM 주소 라벨. 확실한 주소만 넣을 것.
+
+Usage:
+  python flow_graph.py build                         # tx 캐시에 쌓인 tx 를 인덱싱
+  python flow_graph.py ingest <wallet>... --days 14  # 지갑 sig 를 받아서(캐시 경유) 인덱싱
+  python flow_graph.py expand <wallet> --depth 2 --direction out
+  python flow_graph.py sinks <wallet> --depth 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+from token_balances import deltas
+from tx_cache import TxCache, default_cache
+
+GRAPH_PATH = Path(os.getenv("SOLANA_FLOW_GRAPH", "/home/kspoopoo/.openclaw/workspace/state/solana_flow_graph.sqlite"))
+LABELS_PATH = Path(os.getenv("SOLANA_LABELS", Path(__file__).with_name("labels.json")))
+MINT = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
+MAX_NODES = 500
+
+
+def load_labels(path: Path = LABELS_PATH) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def infer_edges(tx: dict, mint: str) -> list[tuple[str, str, int, int]]:
+    """compact tx -> [(src, dst, raw_amount, decimals)]"""
+    d = deltas(tx, mint)
+    senders = [(o, -v, dec) for o, (v, dec) in d.items() if v < 0]
+    receivers = [(o, v) for o, (v, _) in d.items() if v > 0]
+    total_in = sum(v for _, v in receivers)
+    if not senders or not total_in:
+        return []
+    out = []
+    for src, sent, dec in senders:
+        for dst, got in receivers:
+            amount = sent * got // total_in
+            if amount:
+                out.append((src, dst, amount, dec))
+    return out
+
+
+class FlowGraph:
+    def __init__(self, path: Path = GRAPH_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS edge (
+              mint TEXT NOT NULL,
+              src TEXT NOT NULL,
+              dst TEXT NOT NULL,
+              signature TEXT NOT NULL,
+              block_time INTEGER NOT NULL,
+              amount TEXT NOT NULL,
+              decimals INTEGER NOT NULL,
+              PRIMARY KEY (mint, signature, src, dst)
+            );
+            CREATE INDEX IF NOT EXISTS edge_src ON edge (mint, src, block_time);
+            CREATE INDEX IF NOT EXISTS edge_dst ON edge (mint, dst, block_time);
+            CREATE TABLE IF NOT EXISTS scan (mint TEXT PRIMARY KEY, last_rowid INTEGER NOT NULL);
+            """
+        )
+        self.db.commit()
+        self.labels = load_labels()
+
+    def add_tx(self, sig: str, tx: dict, mint: str) -> int:
+        if not tx or tx.get("err"):
+            return 0
+        rows = [(mint, s, d, sig, tx["bt"], str(a), dec) for s, d, a, dec in infer_edges(tx, mint)]
+        self.db.executemany("INSERT OR REPLACE INTO edge VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def index_cache(self, mint: str, cache: TxCache | None = None) -> tuple[int, int]:
+        """tx 캐시에서 지난번 이후 새로 들어온 tx 만 인덱싱. 반환: (tx 수, edge 수)"""
+        cache = cache or default_cache()
+        row = self.db.execute("SELECT last_rowid FROM scan WHERE mint=?", (mint,)).fetchone()
+        last = row[0] if row else 0
+        n_tx = n_edge = 0
+        for rowid, sig, tx in cache.scan(last, needle=mint):
+            n_tx += 1
+            n_edge += self.add_tx(sig, tx, mint)
+            last = rowid
+        self.db.execute("INSERT OR REPLACE INTO scan VALUES (?, ?)", (mint, last))
+        self.db.commit()
+        return n_tx, n_edge
+
+    def neighbors(self, addr: str, mint: str, direction: str = "out", since: int = 0) -> dict[str, int]:
+        """addr 와 직접 연결된 주소 -> raw 합계. direction: out(addr 가 보냄) / in(addr 가 받음)"""
+        col, other = ("src", "dst") if direction == "out" else ("dst", "src")
+        out: dict[str, int] = {}
+        for peer, amount in self.db.execute(
+            f"SELECT {other}, amount FROM edge WHERE mint=? AND {col}=? AND block_time >= ?", (mint, addr, since)
+        ):
+            out[peer] = out.get(peer, 0) + int(amount)
+        return out
+
+    def expand(self, seed: str, mint: str, depth: int = 2, direction: str = "out", since: int = 0,
+               min_amount: int = 0, max_nodes: int = MAX_NODES) -> list[tuple[int, str, str, int]]:
+        """
+        seed 에서 depth 까지 BFS. 반환: [(hop, from, to, raw_amount)] (direction=in 이면 from/to 는 실제 흐름 방향).
+        라벨 주소(CEX/AMM)는 거래 상대가 너무 많아서 더 펼치지 않는다.
+        """
+        dirs = ("out", "in") if direction == "both" else (direction,)
+        seen = {seed}
+        q = deque([(seed, 0)])
+        edges = []
+        while q:
+            addr, hop = q.popleft()
+            if hop >= depth or (addr != seed and addr in self.labels):
+                continue
+            for dname in dirs:
+                for peer, amount in sorted(self.neighbors(addr, mint, dname, since).items(), key=lambda kv: -kv[1]):
+                    if amount < min_amount:
+                        continue
+                    edges.append((hop + 1, addr, peer, amount) if dname == "out" else (hop + 1, peer, addr, amount))
+                    if peer not in seen and len(seen) < max_nodes:
+                        seen.add(peer)
+                        q.append((peer, hop + 1))
+        return edges
+
+    def sinks(self, seed: str, mint: str, depth: int = 3, since: int = 0, min_amount: int = 0) -> dict[str, dict]:
+        """seed 에서 out 방향으로 depth 안에 닿는 라벨 주소별 유입 합계 (경로상의 edge 기준)."""
+        out: dict[str, dict] = {}
+        for hop, _src, dst, amount in self.expand(seed, mint, depth, "out", since, min_amount):
+            label = self.labels.get(dst)
+            if not label:
+                continue
+            s = out.setdefault(dst, {**label, "amount": 0, "edges": 0, "min_hop": hop})
+            s["amount"] += amount
+            s["edges"] += 1
+            s["min_hop"] = min(s["min_hop"], hop)
+        return out
+
+    def decimals(self, mint: str) -> int:
+        row = self.db.execute("SELECT decimals FROM edge WHERE mint=? LIMIT 1", (mint,)).fetchone()
+        return row[0] if row else 0
+
+
+async def ingest(client, graph: FlowGraph, wallets, mint: str, since: int, max_sigs: int = 1000) -> tuple[int, int]:
+    """
+    지갑들의 sig 를 받아 tx 캐시를 채우고 인덱싱. sig 는 sig_cursor 의 graph:<mint> scope cursor 로
+    이어받으므로 두 번째부터는 새 sig 만 받는다.
+    """
+    from sig_cursor import CursorStore, fetch_new_signatures
+    from tx_cache import get_transactions
+
+    store = CursorStore()
+    scope = f"graph:{mint}"
+
+    async def one(w):
+        cur = store.get(w, scope)
+        sigs, new_cur, _ = await fetch_new_signatures(client, w, cur, since, max_sigs)
+        _, errors = await get_transactions(client, [s["signature"] for s in sigs])
+        if not errors:
+            store.put(w, scope, new_cur)
+
+    await asyncio.gather(*(one(w) for w in wallets))
+    return graph.index_cache(mint)
+
+
+def fmt(raw: int, dec: int) -> str:
+    return f"{raw / 10 ** dec:,.2f}"
+
+
+async def main(args) -> int:
+    g = FlowGraph()
+    since = int(time.time()) - args.days * 86400 if args.days else 0
+    if args.cmd == "build":
+        n_tx, n_edge = g.index_cache(args.mint)
+        print(f"indexed tx={n_tx} edges={n_edge}")
+    elif args.cmd == "ingest":
+        from solana_rpc import RPCClient
+
+        client = RPCClient(os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"), timeout=45)
+        n_tx, n_edge = await ingest(client, g, args.wallets, args.mint, since)
+        print(f"indexed tx={n_tx} edges={n_edge}")
+        print(client.summary())
+    elif args.cmd == "expand":
+        dec = g.decimals(args.mint)
+        for hop, src, dst, amount in g.expand(args.wallets[0], args.mint, args.depth, args.direction, since):
+            tag = (g.labels.get(dst) or {}).get("name", "")
+            print(f"{'  ' * (hop - 1)}{hop} {src[:8]}... -> {dst} {fmt(amount, dec)} {tag}")
+    elif args.cmd == "sinks":
+        dec = g.decimals(args.mint)
+        sinks = g.sinks(args.wallets[0], args.mint, args.depth, since)
+        for addr, s in sorted(sinks.items(), key=lambda kv: -kv[1]["amount"]):
+            print(f"{s['kind']:>4} {s['name']} {addr[:8]}... amount={fmt(s['amount'], dec)} edges={s['edges']} hop>={s['min_hop']}")
+        if not sinks:
+            print("no labeled sink reached")
+    return 0
+
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["build", "ingest", "expand", "sinks"])
+    ap.add_argument("wallets", nargs="*")
+    ap.add_argument("--mint", default=MINT)
+    ap.add_argument("--days", type=int, default=14, help="0 이면 전체 기간")
+    ap.add_argument("--depth", type=int, default=2)
+    ap.add_argument("--direction", choices=["out", "in", "both"], default="out")
+    args = ap.parse_args()
+    if args.cmd != "build" and not args.wallets:
+        ap.error(f"{args.cmd} 에는 지갑 주소가 필요합니다")
+    raise SystemExit(asyncio.run(main(args)))
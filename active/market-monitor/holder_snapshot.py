@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Holder snapshot engine for SPL / Token-2022 mints.
+
+getProgramAccounts(dataSlice 0..72) 결과를 한 번에 디코딩:
+  - base64 문자열을 전부 이어붙여 b64decode 1회 (72 byte = 96 char, padding 없음)
+  - numpy structured array (mint V32, owner V32, amount <u8) 로 그대로 view
+  - owner 정렬 + np.add.reduceat 로 owner 별 합산 (uint64, 정확한 정수)
+  - top-N 은 argpartition, base58 인코딩은 뽑힌 owner 만
+  - 응답은 통째로 .json() 하지 않고 스트리밍 파싱(helius 는 getProgramAccountsV2 페이지)하며 chunk 단위로 합산
+스냅샷은 HOLDER_SNAPSHOT_DIR/<mint>/<unix>.npz 로 저장하고 직전 스냅샷과 diff 한다.
+
+Usage:
+  python holder_snapshot.py                      # PENGUIN mint, top 20 + 직전 대비 diff
+  python holder_snapshot.py --mint <MINT> --program <PROGRAM> --top 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SNAP_DIR = Path(os.getenv("HOLDER_SNAPSHOT_DIR", "/home/kspoopoo/.openclaw/workspace/state/holder_snapshots"))
+MINT = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
+TOKEN2022 = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+SLICE = 72
+GPA_PAGE = int(os.getenv("HOLDER_GPA_PAGE", "10000"))
+# token account layout 앞 72 byte: mint(32) owner(32) amount(u64 LE)
+ACCOUNT = np.dtype([("mint", "V32"), ("owner", "V32"), ("amount", "<u8")])
+
+ALPH = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58(b: bytes) -> str:
+    n = int.from_bytes(b, "big")
+    s = ""
+    while n > 0:
+        n, r = divmod(n, 58)
+        s = ALPH[r] + s
+    pad = 0
+    for x in b:
+        if x == 0:
+            pad += 1
+        else:
+            break
+    return "1" * pad + (s or "1")
+
+
+def decode_accounts(accounts) -> np.ndarray:
+    """getProgramAccounts 결과 -> ACCOUNT structured array (72 byte 가 아닌 항목은 버림)."""
+    chunks = [a["account"]["data"][0] for a in accounts]
+    blob = "".join(c for c in chunks if len(c) == SLICE * 4 // 3)
+    return np.frombuffer(base64.b64decode(blob), dtype=ACCOUNT)
+
+
+def group_sum(owners: np.ndarray, amounts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """owner 별 합계. 반환: (owner 정렬된 V32 배열, uint64 합계)."""
+    if not len(owners):
+        return np.empty(0, dtype="V32"), np.empty(0, dtype=np.uint64)
+    order = np.argsort(owners, kind="stable")
+    owners = owners[order]
+    amounts = amounts[order]
+    starts = np.concatenate(([0], np.flatnonzero(owners[1:] != owners[:-1]) + 1))
+    return owners[starts], np.add.reduceat(amounts, starts)
+
+
+def aggregate(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """decode_accounts 결과 -> owner 별 합계. 잔고 0 은 제외."""
+    rows = rows[rows["amount"] > 0]
+    return group_sum(rows["owner"], rows["amount"])
+
+
+class SnapshotBuilder:
+    """
+    계정 chunk 를 받는 대로 디코딩/부분 합산해 두고, 부분 결과가 쌓이면 한 번씩 병합한다.
+    메모리는 원본 JSON 이 아니라 (고유 owner 수 x 40 byte) 에 비례.
+    """
+
+    def __init__(self, mint: str, merge_rows: int = 500_000):
+        self.mint = mint
+        self.merge_rows = merge_rows
+        self.parts: list[tuple[np.ndarray, np.ndarray]] = []
+        self.pending = 0
+        self.accounts = 0
+
+    def add(self, accounts) -> None:
+        rows = decode_accounts(accounts)
+        self.accounts += len(rows)
+        part = aggregate(rows)
+        self.parts.append(part)
+        self.pending += len(part[0])
+        if self.pending >= self.merge_rows:
+            self._merge()
+
+    def _merge(self) -> None:
+        if len(self.parts) > 1:
+            self.parts = [group_sum(np.concatenate([p[0] for p in self.parts]), np.concatenate([p[1] for p in self.parts]))]
+        self.pending = len(self.parts[0][0]) if self.parts else 0
+        # 병합 후에도 큰 상태면 다음 병합까지 간격을 늘려서 O(n^2) 재정렬을 피한다
+        self.merge_rows = max(self.merge_rows, 2 * self.pending)
+
+    def build(self) -> "Snapshot":
+        self._merge()
+        owners, amounts = self.parts[0] if self.parts else group_sum(np.empty(0, dtype="V32"), np.empty(0, dtype=np.uint64))
+        return Snapshot(self.mint, owners, amounts)
+
+
+def top_indices(values: np.ndarray, n: int) -> np.ndarray:
+    """values 상위 n 개 index (내림차순)."""
+    n = min(n, len(values))
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.argpartition(values, len(values) - n)[-n:]
+    return idx[np.argsort(values[idx], kind="stable")[::-1]]
+
+
+class Snapshot:
+    def __init__(self, mint: str, owners: np.ndarray, amounts: np.ndarray, taken_at: int | None = None):
+        self.mint = mint
+        self.owners = owners
+        self.amounts = amounts
+        self.taken_at = int(taken_at or time.time())
+
+    @classmethod
+    def from_accounts(cls, mint: str, accounts) -> "Snapshot":
+        return cls(mint, *aggregate(decode_accounts(accounts)))
+
+    @property
+    def total(self) -> int:
+        return int(self.amounts.sum(dtype=np.uint64))
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        return [(b58(self.owners[i].tobytes()), int(self.amounts[i])) for i in top_indices(self.amounts, n)]
+
+    def share(self, n: int) -> float:
+        total = self.total
+        if not total:
+            return 0.0
+        return float(self.amounts[top_indices(self.amounts, n)].sum(dtype=np.uint64)) / total
+
+    def save(self, root: Path = SNAP_DIR) -> Path:
+        d = root / self.mint
+        d.mkdir(parents=True, exist_ok=True)
+        p = d / f"{self.taken_at}.npz"
+        tmp = d / f".{self.taken_at}.tmp.npz"
+        np.savez_compressed(tmp, owners=self.owners.view(np.uint8).reshape(-1, 32), amounts=self.amounts,
+                            taken_at=np.int64(self.taken_at))
+        tmp.replace(p)
+        return p
+
+    @classmethod
+    def load(cls, mint: str, path: Path) -> "Snapshot":
+        with np.load(path) as z:
+            owners = np.ascontiguousarray(z["owners"]).view("V32").reshape(-1)
+            return cls(mint, owners, z["amounts"], int(z["taken_at"]))
+
+    @classmethod
+    def latest(cls, mint: str, root: Path = SNAP_DIR, before: int | None = None) -> "Snapshot | None":
+        d = root / mint
+        if not d.exists():
+            return None
+        stamps = sorted(int(p.stem) for p in d.glob("*.npz") if p.stem.isdigit())
+        stamps = [t for t in stamps if before is None or t < before]
+        return cls.load(mint, d / f"{stamps[-1]}.npz") if stamps else None
+
+
+def diff(prev: Snapshot, cur: Snapshot, n: int = 10) -> dict:
+    """두 스냅샷 owner 합집합 기준 변화. 둘 다 owner 정렬돼 있어서 searchsorted 로 맞춘다."""
+    owners = np.union1d(prev.owners, cur.owners)
+    a = np.zeros(len(owners), dtype=np.int64)
+    b = np.zeros(len(owners), dtype=np.int64)
+    a[np.searchsorted(owners, prev.owners)] = prev.amounts.astype(np.int64)
+    b[np.searchsorted(owners, cur.owners)] = cur.amounts.astype(np.int64)
+    delta = b - a
+
+    def pick(values, sign):
+        idx = top_indices(values * sign, n)
+        return [(b58(owners[i].tobytes()), int(delta[i])) for i in idx if delta[i] * sign > 0]
+
+    return {
+        "seconds": cur.taken_at - prev.taken_at,
+        "holders": (len(prev.owners), len(cur.owners)),
+        "new": int(((a == 0) & (b > 0)).sum()),
+        "exited": int(((a > 0) & (b == 0)).sum()),
+        "gainers": pick(delta, 1),
+        "losers": pick(delta, -1),
+    }
+
+
+async def fetch_snapshot(client, mint: str = MINT, program: str = TOKEN2022) -> Snapshot:
+    """
+    helius 면 getProgramAccountsV2 를 paginationKey 로 페이지 단위로 받고,
+    그 외(또는 V2 미지원)는 getProgramAccounts 응답을 스트리밍 파싱한다. 어느 쪽이든 chunk 단위로 builder 에 합산.
+    """
+    from solana_rpc import RPCError
+
+    cfg = {
+        "encoding": "base64",
+        "filters": [{"memcmp": {"offset": 0, "bytes": mint}}],
+        "dataSlice": {"offset": 0, "length": SLICE},
+    }
+    builder = SnapshotBuilder(mint)
+    if client.provider == "helius":
+        key = None
+        try:
+            while True:
+                page = {**cfg, "limit": GPA_PAGE}
+                if key:
+                    page["paginationKey"] = key
+                res = await client.call("getProgramAccountsV2", [program, page])
+                builder.add(res.get("accounts") or [])
+                key = res.get("paginationKey")
+                if not key:
+                    return builder.build()
+        except RPCError as e:
+            if e.code != -32601 or key:
+                raise
+            # method not found: 스트리밍으로
+    await client.stream("getProgramAccounts", [program, cfg], builder.add)
+    return builder.build()
+
+
+def print_diff(d: dict, decimals: int) -> None:
+    scale = 10 ** decimals
+    print(f"diff vs {d['seconds'] / 3600:.1f}h ago holders {d['holders'][0]} -> {d['holders'][1]} new={d['new']} exited={d['exited']}")
+    for label in ("gainers", "losers"):
+        for owner, delta in d[label]:
+            print(f"  {label[:-1]} {owner} {delta / scale:+,.2f}")
+
+
+async def main(args) -> int:
+    from solana_rpc import RPCClient
+
+    client = RPCClient(os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"), timeout=120)
+    dec = int((await client.call("getTokenSupply", [args.mint]))["value"]["decimals"])
+    t0 = time.perf_counter()
+    snap = await fetch_snapshot(client, args.mint, args.program)
+    took = time.perf_counter() - t0
+    prev = Snapshot.latest(args.mint)
+    path = snap.save()
+    print(f"holders={len(snap.owners)} top10={snap.share(10) * 100:.2f}% top{args.top}={snap.share(args.top) * 100:.2f}% fetch+decode={took:.2f}s saved={path}")
+    for i, (owner, amt) in enumerate(snap.top(args.top), 1):
+        print(f"#{i} {owner} {amt / 10 ** dec:,.2f}")
+    if prev is not None:
+        print_diff(diff(prev, snap), dec)
+    print(client.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mint", default=MINT)
+    ap.add_argument("--program", default=TOKEN2022)
+    ap.add_argument("--top", type=int, default=20)
+    raise SystemExit(asyncio.run(main(ap.parse_args())))
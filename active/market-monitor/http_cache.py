@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Small in-memory HTTP cache for the polling monitors (DexScreener 등).
+
+- Cache-Control: max-age 동안은 요청 없이 메모리 값 (no-store 는 저장 안 함, no-cache 는 매번 재검증)
+  헤더가 없으면 HTTP_CACHE_TTL(기본 5초) 짧은 TTL
+- 만료 후에는 ETag / Last-Modified 로 conditional GET → 304 면 본문 없이 이전 값 재사용
+- 200 이어도 본문 hash 가 이전과 같으면 json 파싱을 건너뛰고 이전 객체를 그대로 돌려준다 (changed=False)
+- 같은 URL 을 여러 스레드가 동시에 요청하면 한 번만 보내고 나머지는 그 결과를 기다린다
+- stats: fresh(요청 없음) / revalidated(304) / same(200, 본문 동일) / miss / coalesced / bytes
+
+Usage:
+  cache = HttpCache()
+  r = cache.get_json(url)      # r.data, r.changed, r.source
+  print(cache.summary())
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, NamedTuple
+
+DEFAULT_TTL = float(os.getenv("HTTP_CACHE_TTL", "5"))
+MAX_ENTRIES = 256
+
+
+class Cached(NamedTuple):
+    data: Any
+    changed: bool
+    source: str  # fresh | revalidated | same | miss | coalesced
+
+
+@dataclass
+class Entry:
+    data: Any
+    digest: bytes
+    expires: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Cached | None = None
+        self.error: BaseException | None = None
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    out: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        k, _, v = part.strip().partition("=")
+        if k:
+            out[k.lower()] = v.strip('"') or None
+    return out
+
+
+class HttpCache:
+    def __init__(self, session=None, default_ttl: float = DEFAULT_TTL, max_entries: int = MAX_ENTRIES):
+        if session is None:
+            import requests
+
+            session = requests.Session()
+        self.session = session
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, Entry] = OrderedDict()
+        self.inflight: dict[str, _Flight] = {}
+        self.lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def get_json(self, url: str, timeout: float = 20) -> Cached:
+        """
+        url 의 json. 2xx/304 가 아니면 requests.HTTPError (429 처리는 호출하는 쪽에서).
+        changed=False 면 data 는 지난번과 같은 객체다.
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None and entry.expires > time.monotonic():
+                self.entries.move_to_end(url)
+                self.stats["fresh"] += 1
+                return Cached(entry.data, False, "fresh")
+            flight = self.inflight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[url] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self.lock:
+                self.stats["coalesced"] += 1
+            return flight.result._replace(source="coalesced")
+
+        try:
+            flight.result = self._fetch(url, entry, timeout)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[url]
+            flight.done.set()
+
+    def _fetch(self, url: str, entry: Entry | None, timeout: float) -> Cached:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        r = self.session.get(url, headers=headers, timeout=timeout)
+
+        if r.status_code == 304 and entry is not None:
+            entry.expires = self._expires(r)
+            entry.etag = r.headers.get("ETag") or entry.etag
+            self._store(url, entry, r)
+            return Cached(entry.data, False, self._count("revalidated"))
+
+        r.raise_for_status()
+        body = r.content
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        with self.lock:
+            self.stats["bytes"] += len(body)
+        if entry is not None and entry.digest == digest:
+            entry.expires = self._expires(r)
+            entry.etag = r.headers.get("ETag")
+            entry.last_modified = r.headers.get("Last-Modified")
+            self._store(url, entry, r)
+            return Cached(entry.data, False, self._count("same"))
+
+        entry = Entry(r.json(), digest, self._expires(r), r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        self._store(url, entry, r)
+        return Cached(entry.data, True, self._count("miss"))
+
+    def _count(self, source: str) -> str:
+        with self.lock:
+            self.stats[source] += 1
+        return source
+
+    def _expires(self, r) -> float:
+        cc = parse_cache_control(r.headers.get("Cache-Control"))
+        if "no-cache" in cc or "no-store" in cc:
+            return 0.0
+        ttl = self.default_ttl
+        if cc.get("max-age"):
+            try:
+                ttl = float(cc["max-age"]) - float(r.headers.get("Age") or 0)
+            except ValueError:
+                pass
+        return time.monotonic() + max(0.0, ttl)
+
+    def _store(self, url: str, entry: Entry, r) -> None:
+        if "no-store" in parse_cache_control(r.headers.get("Cache-Control")):
+            with self.lock:
+                self.entries.pop(url, None)
+            return
+        with self.lock:
+            self.entries[url] = entry
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def summary(self, reset: bool = False) -> str:
+        with self.lock:
+            s = dict(self.stats)
+            if reset:
+                self.stats.clear()
+        hits = s.get("fresh", 0) + s.get("revalidated", 0) + s.get("same", 0) + s.get("coalesced", 0)
+        return (
+            f"fresh={s.get('fresh', 0)} 304={s.get('revalidated', 0)} same={s.get('same', 0)} "
+            f"coalesced={s.get('coalesced', 0)} miss={s.get('miss', 0)} hit_rate={hits / max(1, hits + s.get('miss', 0)):.0%} "
+            f"downloaded={s.get('bytes', 0) / 1024:.1f}KiB"
+        )
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Resumable, rate-limit-aware work queue for the wallet analyses (SQLite).
+
+run(name) 하나에 owner 별로
+  - walk: sig_cursor.SignatureWalk 의 state (page 단위로 저장, 중단된 page 부터 이어감)
+  - item: 받아야 할 tx signature 와 완료 여부
+를 저장한다. 같은 name 의 미완료 run 이 RESUME_MAX_AGE 안에 있으면 재실행 시 그 run(과 since)을 이어받는다.
+
+rate limit 을 다 써서 RateLimited 가 나오면 실패로 기록하지 않고 Pauser 가 전체 작업을 멈췄다가
+(30s → 60s → ... 최대 300s) 같은 단계부터 다시 시작한다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from solana_rpc import RateLimited
+
+JOB_PATH = Path(os.getenv("SOLANA_JOB_DB", "/home/kspoopoo/.openclaw/workspace/state/solana_jobs.sqlite"))
+RESUME_MAX_AGE = int(os.getenv("SOLANA_JOB_RESUME_MAX_AGE", str(6 * 3600)))
+PAUSE_BASE = float(os.getenv("SOLANA_JOB_PAUSE", "30"))
+PAUSE_MAX = 300.0
+
+
+class JobQueue:
+    def __init__(self, path: Path = JOB_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS run (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              name TEXT NOT NULL,
+              since_ts INTEGER NOT NULL,
+              created_at INTEGER NOT NULL,
+              finished_at INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS walk (
+              run_id INTEGER NOT NULL,
+              owner TEXT NOT NULL,
+              state TEXT NOT NULL,
+              pages INTEGER NOT NULL DEFAULT 0,
+              done INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (run_id, owner)
+            );
+            CREATE TABLE IF NOT EXISTS item (
+              run_id INTEGER NOT NULL,
+              owner TEXT NOT NULL,
+              signature TEXT NOT NULL,
+              done INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (run_id, owner, signature)
+            );
+            """
+        )
+        self.db.commit()
+
+    def open_run(self, name: str, since_ts: int) -> tuple[int, int, bool]:
+        """(run_id, since_ts, resumed). 이어받으면 since_ts 도 처음 run 의 값을 쓴다 (창이 밀리지 않게)."""
+        row = self.db.execute(
+            "SELECT id, since_ts FROM run WHERE name=? AND finished_at IS NULL AND created_at >= ? ORDER BY id DESC LIMIT 1",
+            (name, int(time.time()) - RESUME_MAX_AGE),
+        ).fetchone()
+        if row:
+            return row[0], row[1], True
+        cur = self.db.execute("INSERT INTO run (name, since_ts, created_at) VALUES (?, ?, ?)", (name, since_ts, int(time.time())))
+        self.db.commit()
+        return cur.lastrowid, since_ts, False
+
+    def finish_run(self, run_id: int) -> None:
+        self.db.execute("UPDATE run SET finished_at=? WHERE id=?", (int(time.time()), run_id))
+        self.db.commit()
+
+    def load_walk(self, run_id: int, owner: str) -> dict | None:
+        row = self.db.execute("SELECT state FROM walk WHERE run_id=? AND owner=?", (run_id, owner)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_page(self, run_id: int, owner: str, state: dict, done: bool, sigs) -> None:
+        """page 하나 분량: 새 tx item 과 walk state 를 한 트랜잭션으로 저장."""
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO item (run_id, owner, signature) VALUES (?, ?, ?)",
+                                [(run_id, owner, s) for s in sigs])
+            self.db.execute(
+                "INSERT INTO walk (run_id, owner, state, pages, done) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (run_id, owner) DO UPDATE SET state=excluded.state, pages=pages+1, done=excluded.done",
+                (run_id, owner, json.dumps(state), int(done)),
+            )
+
+    def pending(self, run_id: int, owner: str) -> list[str]:
+        return [r[0] for r in self.db.execute(
+            "SELECT signature FROM item WHERE run_id=? AND owner=? AND done=0", (run_id, owner))]
+
+    def items(self, run_id: int, owner: str) -> list[str]:
+        return [r[0] for r in self.db.execute("SELECT signature FROM item WHERE run_id=? AND owner=?", (run_id, owner))]
+
+    def mark_done(self, run_id: int, owner: str, sigs) -> None:
+        with self.db:
+            self.db.executemany("UPDATE item SET done=1 WHERE run_id=? AND owner=? AND signature=?",
+                                [(run_id, owner, s) for s in sigs])
+
+    def progress(self, run_id: int, owner: str) -> dict:
+        total, done = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(done), 0) FROM item WHERE run_id=? AND owner=?", (run_id, owner)).fetchone()
+        w = self.db.execute("SELECT pages, done FROM walk WHERE run_id=? AND owner=?", (run_id, owner)).fetchone()
+        pages, walked = w or (0, 0)
+        return {"pages": pages, "walkDone": bool(walked), "txDone": done, "txTotal": total,
+                "completeness": round(done / total, 4) if total else (1.0 if walked else 0.0)}
+
+
+class Pauser:
+    """RateLimited 가 나면 모든 작업을 같이 멈췄다가 재개. 연속으로 걸릴수록 더 오래 쉰다."""
+
+    def __init__(self, base: float = PAUSE_BASE, maximum: float = PAUSE_MAX):
+        self.base = base
+        self.maximum = maximum
+        self.streak = 0
+        self.paused_s = 0.0
+        self._resume: asyncio.Event | None = None
+
+    @property
+    def resume(self) -> asyncio.Event:
+        if self._resume is None:
+            self._resume = asyncio.Event()
+            self._resume.set()
+        return self._resume
+
+    async def run(self, fn):
+        """fn: 인자 없는 async callable. rate limit 이면 멈췄다가 같은 fn 을 다시 부른다."""
+        while True:
+            await self.resume.wait()
+            try:
+                r = await fn()
+            except RateLimited:
+                await self._pause()
+                continue
+            self.streak = 0
+            return r
+
+    async def _pause(self):
+        if not self.resume.is_set():
+            return
+        self.resume.clear()
+        delay = min(self.maximum, self.base * 2 ** self.streak)
+        self.streak += 1
+        self.paused_s += delay
+        print(f"rate budget exhausted: pausing {delay:.0f}s", file=sys.stderr)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.resume.set()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON array reader (stdlib only).
+
+응답 전체를 .json() 으로 올리지 않고, `"result": [ ... ]` 배열 항목을 도착하는 대로 하나씩 꺼낸다.
+항목 하나는 json.JSONDecoder.raw_decode 로 파싱하고, 소비한 앞부분 버퍼는 바로 버리므로
+메모리는 (read chunk + 항목 1개) 수준으로 유지된다.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+
+_DECODER = json.JSONDecoder()
+_SKIP = " \t\r\n,"
+
+
+class NotAnArray(ValueError):
+    """key 가 배열이 아닌 응답 (에러 응답 등). .doc 에 파싱된 전체 문서."""
+
+    def __init__(self, doc):
+        super().__init__("response has no streamable array")
+        self.doc = doc
+
+
+def iter_array(chunks, key: str = "result"):
+    """bytes chunk iterator -> top-level `key` 배열의 항목들."""
+    head = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    dec = codecs.getincrementaldecoder("utf-8")()
+    it = iter(chunks)
+    buf = ""
+    pos = 0
+
+    def more() -> bool:
+        nonlocal buf, pos
+        data = next(it, None)
+        if data is None:
+            buf = buf[pos:] + dec.decode(b"", final=True)
+            pos = 0
+            return False
+        buf = buf[pos:] + dec.decode(data)
+        pos = 0
+        return True
+
+    # 배열 시작까지는 작은 header 뿐이라 통째로 들고 있어도 된다
+    while True:
+        m = head.search(buf)
+        if m:
+            pos = m.end()
+            break
+        if not more():
+            raise NotAnArray(json.loads(buf))
+
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in _SKIP:
+                pos += 1
+            if pos < len(buf):
+                break
+            if not more():
+                raise ValueError("truncated JSON array")
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = _DECODER.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # 항목이 chunk 경계에 걸림: 더 읽고 다시
+            if not more():
+                raise
+            continue
+        yield item
+        pos = end
@@ -12,12 +12,10 @@ import argparse
 import collections
 import math
 import re
+import sys
 from dataclasses import dataclass
 from typing import List
 
-import requests
-from bs4 import BeautifulSoup
-
 BASE_URL = "https://mlbpark.donga.com/mp/b.php?b=bullpen&p={page}"
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
@@ -61,6 +59,9 @@ def parse_title(title: str) -> tuple[str, str]:
 
 
 def fetch_posts(target: int = 1200, max_pages: int = 100) -> List[Post]:
+    import requests
+    from bs4 import BeautifulSoup
+
     posts: List[Post] = []
     page = 1
 
@@ -113,6 +114,7 @@ def main() -> None:
     ap.add_argument("--recent-min", type=int, default=90, help="급상승 계산용 최근 구간(분)")
     ap.add_argument("--baseline-min", type=int, default=360, help="비교 기준 구간(분)")
     ap.add_argument("--top", type=int, default=10, help="출력 개수")
+    ap.add_argument("--profile-startup", action="store_true", help="import 시간/첫 출력까지 시간 보고")
     args = ap.parse_args()
 
     posts = fetch_posts(target=args.target)
@@ -178,4 +180,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
     main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Wallet flow rule engine for the outflow watcher.
+
+규칙 파일(json):
+  {"rules": [{"name", "wallet", "mint", "direction": "out|in|any", "threshold": 300000, "window": 0, "symbol"}]}
+  - window 0: tx 하나의 잔고 변화가 threshold 이상이면 알림
+  - window N초: 최근 N초 누적(out 은 유출 합, in 은 유입 합, any 는 |변화| 합)이 threshold 를 넘는 순간 한 번 알림,
+    누적이 다시 threshold 아래로 내려가야 재무장
+
+평가:
+  - wallet → rules 인덱스. tx 하나에 대해 규칙에 나오는 mint 별로 deltas() 를 한 번만 계산하고
+    그 tx 에 등장한 wallet 의 규칙만 본다 (비용은 tx 수에 비례, 규칙 수와 무관)
+  - 누적 창은 rule 별 min-heap(blockTime) + 합계로 증분 갱신, 이벤트는 SQLite 에 남겨서 cron 실행 사이에도 이어진다
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from token_balances import deltas, ui
+
+RULES_DB = Path(os.getenv("OUTFLOW_RULES_DB", "/home/kspoopoo/.openclaw/workspace/state/outflow_rules.sqlite"))
+DIRECTIONS = ("out", "in", "any")
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    wallet: str
+    mint: str
+    direction: str = "out"
+    threshold: float = 0.0
+    window: int = 0
+    symbol: str = ""
+
+    def amount(self, raw_delta: int) -> int:
+        """이 규칙 방향으로 센 raw 양 (해당 없으면 0)."""
+        if self.direction == "out":
+            return max(0, -raw_delta)
+        if self.direction == "in":
+            return max(0, raw_delta)
+        return abs(raw_delta)
+
+
+def load_rules(path: str | Path) -> list[Rule]:
+    cfg = json.loads(Path(path).read_text(encoding="utf-8"))
+    rules = []
+    for i, r in enumerate(cfg.get("rules") or []):
+        direction = r.get("direction", "out")
+        if direction not in DIRECTIONS:
+            raise ValueError(f"rule #{i}: direction must be one of {DIRECTIONS}")
+        rules.append(Rule(
+            name=r.get("name") or f"{r['wallet'][:4]}-{direction}",
+            wallet=r["wallet"],
+            mint=r["mint"],
+            direction=direction,
+            threshold=float(r["threshold"]),
+            window=int(r.get("window") or 0),
+            symbol=r.get("symbol") or r["mint"][:4],
+        ))
+    if len({r.name for r in rules}) != len(rules):
+        raise ValueError("rule names must be unique (window 상태를 이름으로 저장)")
+    return rules
+
+
+class SlidingSum:
+    """blockTime 순서가 뒤섞여 들어와도 되는 시간 창 합계. push/evict 는 heap 이라 O(log n)."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.heap: list[tuple[int, int]] = []
+        self.total = 0
+        self.latest = 0
+
+    def evict(self, now: int) -> None:
+        self.latest = max(self.latest, now)
+        cut = self.latest - self.window
+        while self.heap and self.heap[0][0] < cut:
+            self.total -= heapq.heappop(self.heap)[1]
+
+    def push(self, bt: int, amount: int) -> bool:
+        """창 밖(이미 지난) 이벤트면 False."""
+        self.evict(bt)
+        if bt < self.latest - self.window:
+            return False
+        heapq.heappush(self.heap, (bt, amount))
+        self.total += amount
+        return True
+
+
+class RuleEngine:
+    def __init__(self, rules: list[Rule], db_path: Path = RULES_DB):
+        self.rules = rules
+        self.by_wallet: dict[str, list[Rule]] = {}
+        self.by_mint: dict[str, set[str]] = {}
+        for r in rules:
+            self.by_wallet.setdefault(r.wallet, []).append(r)
+            self.by_mint.setdefault(r.mint, set()).add(r.wallet)
+        self.sums: dict[str, SlidingSum] = {r.name: SlidingSum(r.window) for r in rules if r.window}
+        self.armed: dict[str, bool] = {name: True for name in self.sums}
+        self.db = None
+        if self.sums:
+            self._open(db_path)
+
+    @property
+    def wallets(self) -> list[str]:
+        return list(self.by_wallet)
+
+    def _open(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS event (
+              rule TEXT NOT NULL,
+              signature TEXT NOT NULL,
+              block_time INTEGER NOT NULL,
+              amount TEXT NOT NULL,
+              PRIMARY KEY (rule, signature)
+            );
+            CREATE TABLE IF NOT EXISTS rule_state (
+              rule TEXT PRIMARY KEY,
+              armed INTEGER NOT NULL
+            );
+            """
+        )
+        now = int(time.time())
+        for name, s in self.sums.items():
+            for bt, amount in self.db.execute(
+                "SELECT block_time, amount FROM event WHERE rule=? AND block_time >= ? ORDER BY block_time", (name, now - s.window)
+            ):
+                s.push(bt, int(amount))
+            row = self.db.execute("SELECT armed FROM rule_state WHERE rule=?", (name,)).fetchone()
+            if row:
+                self.armed[name] = bool(row[0])
+        self.db.commit()
+
+    def evaluate(self, sig: str, tx: dict) -> list[tuple[Rule, float, float]]:
+        """
+        compact tx 하나 → 걸린 규칙 [(rule, 이번 tx 양(ui), 창 누적(ui))].
+        tx 는 한 번만 평가하면 되고(중복 방지는 호출하는 쪽 seen), 누적 창 상태는 여기서 갱신된다.
+        """
+        hits = []
+        events = []
+        bt = tx.get("bt") or int(time.time())
+        for mint, wallets in self.by_mint.items():
+            for wallet, (d, dec) in deltas(tx, mint, wallets).items():
+                if not d:
+                    continue
+                for rule in self.by_wallet[wallet]:
+                    if rule.mint != mint:
+                        continue
+                    amount = rule.amount(d)
+                    limit = rule.threshold * 10 ** dec
+                    if not rule.window:
+                        if amount and amount >= limit:
+                            hits.append((rule, ui(amount, dec), ui(amount, dec)))
+                        continue
+                    s = self.sums[rule.name]
+                    s.evict(bt)
+                    if s.total < limit:
+                        self.armed[rule.name] = True
+                    if not amount or not s.push(bt, amount):
+                        continue
+                    events.append((rule.name, sig, bt, str(amount)))
+                    if self.armed[rule.name] and s.total >= limit:
+                        self.armed[rule.name] = False
+                        hits.append((rule, ui(amount, dec), ui(s.total, dec)))
+        if events and self.db is not None:
+            self.db.executemany("INSERT OR IGNORE INTO event VALUES (?, ?, ?, ?)", events)
+        return hits
+
+    def flush(self) -> None:
+        """창 상태 저장 + 창 밖 이벤트 정리."""
+        if self.db is None:
+            return
+        with self.db:
+            for name, s in self.sums.items():
+                self.db.execute("INSERT OR REPLACE INTO rule_state VALUES (?, ?)", (name, int(self.armed[name])))
+                if s.latest:
+                    self.db.execute("DELETE FROM event WHERE rule=? AND block_time < ?", (name, s.latest - s.window))
+
+
+def describe(rule: Rule) -> str:
+    arrow = {"out": "유출", "in": "유입", "any": "변화"}[rule.direction]
+    span = f"{rule.window // 60}분 누적 " if rule.window else ""
+    return f"{rule.name} ({span}{arrow} ≥ {rule.threshold:,.0f} {rule.symbol})"
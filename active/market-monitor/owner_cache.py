@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Persistent token account -> owner cache (SQLite).
+
+token account 의 owner 는 거의 안 바뀐다 (ATA 는 아예 못 바꾸고, 일반 계정도 SetAuthority 정도).
+그래서 한 번 알아낸 owner 는 저장해 두고, 모르는 것만 getMultipleAccounts(jsonParsed, 호출당 100개)로 한꺼번에 받는다.
+  - checked_at 이 OWNER_REVALIDATE(기본 1일) 안이면 그대로 hit
+  - 그보다 오래됐으면 일단 저장된 값을 쓰고, 어차피 나가는 조회(miss)가 있을 때 같은 호출에 끼워서 재확인
+  - OWNER_MAX_AGE(기본 30일)를 넘으면 그때는 반드시 다시 조회
+  - 닫힌 계정(null) / token program 소유가 아닌 계정은 owner "" 로 돌려주고 저장하지 않는다
+
+penguin_14d_analysis / penguin_insider_probe 가 같은 파일을 공유한다.
+bench_rpc 는 SOLANA_OWNER_CACHE 를 임시 디렉터리로 돌려서 cold 측정이 운영 캐시로 warm 해지지 않게 한다.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from solana_rpc import RPCError
+
+OWNER_PATH = Path(os.getenv("SOLANA_OWNER_CACHE", "/home/kspoopoo/.openclaw/workspace/state/solana_owner_cache.sqlite"))
+REVALIDATE = int(os.getenv("OWNER_REVALIDATE", str(86400)))
+MAX_AGE = int(os.getenv("OWNER_MAX_AGE", str(30 * 86400)))
+MULTI_LIMIT = 100
+TOKEN_PROGRAMS = ("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA", "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb")
+
+
+def parse_owner(value: dict | None) -> tuple[str, str] | None:
+    """getMultipleAccounts(jsonParsed) 항목 하나 → (owner, mint). token account 가 아니면 None."""
+    if not value or value.get("owner") not in TOKEN_PROGRAMS:
+        return None
+    data = value.get("data")
+    info = ((data.get("parsed") or {}).get("info") or {}) if isinstance(data, dict) else {}
+    if not info.get("owner"):
+        return None
+    return info["owner"], info.get("mint") or ""
+
+
+class OwnerCache:
+    def __init__(self, path: Path = OWNER_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS token_owner ("
+            " account TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " mint TEXT NOT NULL,"
+            " checked_at INTEGER NOT NULL)"
+        )
+        self.db.commit()
+        self.stats = {"hits": 0, "stale": 0, "misses": 0, "calls": 0, "changed": 0}
+
+    def get_many(self, accounts) -> dict[str, tuple[str, int]]:
+        """account -> (owner, checked_at). MAX_AGE 를 넘은 것은 빠진다."""
+        out = {}
+        now = int(time.time())
+        accounts = list(accounts)
+        for k in range(0, len(accounts), 500):
+            chunk = accounts[k:k + 500]
+            q = f"SELECT account, owner, checked_at FROM token_owner WHERE account IN ({','.join('?' * len(chunk))})"
+            for acc, owner, checked_at in self.db.execute(q, chunk):
+                if now - checked_at <= MAX_AGE:
+                    out[acc] = (owner, checked_at)
+        return out
+
+    def put_many(self, items: dict[str, tuple[str, str]]) -> None:
+        now = int(time.time())
+        self.db.executemany("INSERT OR REPLACE INTO token_owner VALUES (?, ?, ?, ?)",
+                            [(acc, owner, mint, now) for acc, (owner, mint) in items.items()])
+        self.db.commit()
+
+    def forget(self, accounts) -> None:
+        self.db.executemany("DELETE FROM token_owner WHERE account=?", [(a,) for a in accounts])
+        self.db.commit()
+
+    def summary(self) -> str:
+        st = self.stats
+        return (f"ownercache hits={st['hits']} stale={st['stale']} misses={st['misses']} "
+                f"calls={st['calls']} changed={st['changed']}")
+
+
+_default: OwnerCache | None = None
+
+
+def default_owners() -> OwnerCache:
+    global _default
+    if _default is None:
+        _default = OwnerCache()
+    return _default
+
+
+async def resolve_owners(client, accounts, cache: OwnerCache | None = None) -> dict[str, str]:
+    """
+    token account -> owner (모르면 ""). 전부 캐시에 있으면 RPC 호출 없음, 아니면 getMultipleAccounts 100개 단위
+    (여러 개면 JSON-RPC batch 한 번). 호출이 실패한 chunk 는 stale 값이라도 있으면 그걸 쓴다.
+    """
+    cache = cache or default_owners()
+    accounts = list(dict.fromkeys(a for a in accounts if a))
+    now = int(time.time())
+    cached = cache.get_many(accounts)
+    out = {a: owner for a, (owner, _) in cached.items()}
+    missing = [a for a in accounts if a not in cached]
+    stale = [a for a, (_, checked_at) in cached.items() if now - checked_at > REVALIDATE]
+    cache.stats["misses"] += len(missing)
+    cache.stats["stale"] += len(stale)
+    cache.stats["hits"] += len(cached) - len(stale)
+    if not missing:
+        return out
+
+    # 어차피 나가는 호출에 남는 자리만큼 stale 재확인을 끼운다 (호출 수는 늘리지 않음)
+    room = -len(missing) % MULTI_LIMIT
+    query = missing + stale[:room]
+    chunks = [query[k:k + MULTI_LIMIT] for k in range(0, len(query), MULTI_LIMIT)]
+    res = await client.batch([("getMultipleAccounts", [c, {"encoding": "jsonParsed"}]) for c in chunks])
+    cache.stats["calls"] += len(chunks)
+    found, gone = {}, []
+    for chunk, r in zip(chunks, res):
+        if isinstance(r, RPCError):
+            continue
+        for acc, value in zip(chunk, (r or {}).get("value") or []):
+            parsed = parse_owner(value)
+            if parsed is None:
+                gone.append(acc)
+                out[acc] = ""
+                continue
+            if acc in cached and cached[acc][0] != parsed[0]:
+                cache.stats["changed"] += 1
+            found[acc] = parsed
+            out[acc] = parsed[0]
+    cache.put_many(found)
+    if gone:
+        cache.forget(gone)
+    return out
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    from solana_rpc import RPCClient
+
+    if len(sys.argv) < 2:
+        raise SystemExit("Usage: owner_cache.py <token account> [...]")
+    c = RPCClient(os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"))
+    owners = asyncio.run(resolve_owners(c, sys.argv[1:]))
+    for acc in sys.argv[1:]:
+        print(f"{acc} {owners.get(acc) or '-'}")
+    print(default_owners().summary())
@@ -1,158 +1,151 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import os, time, datetime as dt, json
-import requests
+import asyncio, os, sys, time, datetime as dt, json
+
+from functools import partial
+
+from holder_snapshot import TOKEN2022, fetch_snapshot
+from job_queue import JobQueue, Pauser
+from owner_cache import default_owners, resolve_owners
+from sig_cursor import CursorStore, SignatureWalk, close_window, record_flows
+from solana_rpc import RPCClient
+from tx_cache import default_cache, get_transactions
 
 MINT = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
 RPC = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
 DAYS = int(os.getenv("PENGUIN_DAYS", "14"))
 TOP_N = int(os.getenv("PENGUIN_TOPN", "8"))
 MAX_SIGS = int(os.getenv("PENGUIN_MAXSIGS", "350"))
-
-s = requests.Session()
-
-
-def rpc(method, params):
-    for i in range(8):
-        r = s.post(RPC, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params}, timeout=45)
-        j = r.json()
-        if "error" in j:
-            code = j["error"].get("code")
-            if code == 429:
-                time.sleep(0.6 * (i + 1))
-                continue
-            raise RuntimeError(j["error"])
-        return j["result"]
-    raise RuntimeError("rate-limited")
-
-
-def token_acc_owner(token_acc: str) -> str:
-    info = rpc("getAccountInfo", [token_acc, {"encoding": "jsonParsed"}])
-    v = (info or {}).get("value") or {}
-    data = (v.get("data") or {}).get("parsed") or {}
-    return ((data.get("info") or {}).get("owner") or "")
-
-
-def get_top_token_accounts():
-    supply = float(rpc("getTokenSupply", [MINT])["value"]["uiAmount"])
-    la = rpc("getTokenLargestAccounts", [MINT])["value"][:TOP_N]
+OWNER_CONCURRENCY = int(os.getenv("PENGUIN_OWNER_CONCURRENCY", "16"))
+TX_CHUNK = 200
+REPORT = os.getenv("PENGUIN_REPORT", "/home/kspoopoo/.openclaw/workspace/penguin_14d_report.json")
+
+client = RPCClient(RPC, timeout=45)
+cursors = CursorStore()
+jobs = JobQueue()
+pauser = Pauser()
+
+
+async def rpc(method, params):
+    return await client.call(method, params)
+
+
+async def get_top_token_accounts():
+    sup = (await rpc("getTokenSupply", [MINT]))["value"]
+    supply = float(sup["uiAmount"])
+    if TOP_N > 20:
+        # getTokenLargestAccounts 는 최대 20개라 그 이상은 holder snapshot 의 owner 합산 순위를 쓴다
+        snap = await fetch_snapshot(client, MINT, TOKEN2022)
+        scale = 10 ** int(sup["decimals"])
+        return supply, [
+            {"rank": i, "tokenAccount": None, "owner": owner, "amount": raw / scale, "pct": raw / scale / supply * 100}
+            for i, (owner, raw) in enumerate(snap.top(TOP_N), 1)
+        ]
+    la = (await rpc("getTokenLargestAccounts", [MINT]))["value"][:TOP_N]
+    # owner 는 캐시 (모르는 것만 getMultipleAccounts 한 번)
+    owners = await resolve_owners(client, [x["address"] for x in la])
     out = []
     for i, x in enumerate(la, 1):
         amt = float(x["uiAmount"])
         ta = x["address"]
-        owner = token_acc_owner(ta)
         out.append({
             "rank": i,
             "tokenAccount": ta,
-            "owner": owner,
+            "owner": owners.get(ta, ""),
             "amount": amt,
             "pct": amt / supply * 100,
         })
     return supply, out
 
 
-def get_signatures(addr: str, since_ts: int):
-    out = []
-    before = None
-    while len(out) < MAX_SIGS:
-        cfg = {"limit": 100}
-        if before:
-            cfg["before"] = before
-        arr = rpc("getSignaturesForAddress", [addr, cfg])
-        if not arr:
-            break
-        stop = False
-        for a in arr:
-            bt = a.get("blockTime") or 0
-            if bt and bt < since_ts:
-                stop = True
-                break
-            out.append(a["signature"])
-        if stop:
-            break
-        before = arr[-1]["signature"]
-        if len(arr) < 100:
-            break
-    return out[:MAX_SIGS]
-
-
-def net_flow_for_owner(owner_wallet: str, mint: str, since_ts: int):
-    # owner wallet 기준으로 관련 tx를 훑고 pre/post token balance 변화로 순유출입 계산
-    sigs = get_signatures(owner_wallet, since_ts)
-    net = 0.0
-    inflow = 0.0
-    outflow = 0.0
-    tx_count = 0
-    for sig in sigs:
-        tx = rpc("getTransaction", [sig, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}])
-        if not tx:
-            continue
-        bt = tx.get("blockTime") or 0
-        if bt < since_ts:
-            continue
-        meta = tx.get("meta") or {}
-        pre = meta.get("preTokenBalances") or []
-        post = meta.get("postTokenBalances") or []
-        pre_amt = 0.0
-        post_amt = 0.0
-        touched = False
-        for b in pre:
-            if b.get("mint") == mint and b.get("owner") == owner_wallet:
-                pre_amt += float((b.get("uiTokenAmount") or {}).get("uiAmount") or 0)
-                touched = True
-        for b in post:
-            if b.get("mint") == mint and b.get("owner") == owner_wallet:
-                post_amt += float((b.get("uiTokenAmount") or {}).get("uiAmount") or 0)
-                touched = True
-        if not touched:
-            continue
-        d = post_amt - pre_amt
-        if abs(d) < 1e-9:
-            continue
-        tx_count += 1
-        net += d
-        if d > 0:
-            inflow += d
-        else:
-            outflow += -d
+async def net_flow_for_owner(owner_wallet: str, mint: str, since_ts: int, run_id: int):
+    # sig page / tx 단위 진행을 job queue 에 저장하면서 받는다. rate limit 이면 멈췄다가 같은 단계부터 이어서
+    walk = SignatureWalk(owner_wallet, cursors.get(owner_wallet, mint), since_ts, MAX_SIGS, jobs.load_walk(run_id, owner_wallet))
+    while not walk.done:
+        entries = await pauser.run(partial(walk.step, client))
+        jobs.save_page(run_id, owner_wallet, walk.state, walk.done, [e["signature"] for e in entries])
+
+    pending = jobs.pending(run_id, owner_wallet)
+    t0 = time.perf_counter()
+    fetched = 0
+    for k in range(0, len(pending), TX_CHUNK):
+        chunk = pending[k:k + TX_CHUNK]
+        txs, _ = await pauser.run(partial(get_transactions, client, chunk, raise_rate_limited=True))
+        jobs.mark_done(run_id, owner_wallet, [s for s in chunk if s in txs])
+        fetched += len(chunk)
+        p = jobs.progress(run_id, owner_wallet)
+        eta = (time.perf_counter() - t0) / fetched * (len(pending) - fetched)
+        print(f"  {owner_wallet[:8]}... tx {p['txDone']}/{p['txTotal']} ({p['completeness'] * 100:.0f}%) eta {eta:.0f}s", file=sys.stderr)
+
+    # 전부 받은 경우에만 cursor 전진. 남은 item 은 다음 실행에서 같은 run 으로 이어서 받는다
+    p = jobs.progress(run_id, owner_wallet)
+    left = p["txTotal"] - p["txDone"]
+    record_flows(cursors, owner_wallet, mint, default_cache().get_many(jobs.items(run_id, owner_wallet)))
+    w = close_window(cursors, owner_wallet, mint, since_ts, None if left else walk.cursor)
+    scale = 10 ** w["decimals"]
     return {
         "owner": owner_wallet,
-        "txCount": tx_count,
-        "net": net,
-        "inflow": inflow,
-        "outflow": outflow,
-        "sigsScanned": len(sigs),
+        "txCount": w["txCount"],
+        "net": w["net"] / scale,
+        "inflow": w["inflow"] / scale,
+        "outflow": w["outflow"] / scale,
+        "sigsScanned": p["txTotal"],
+        "txErrors": left,
+        "completeness": p["completeness"],
+        "truncated": walk.truncated,
     }
 
 
-def main():
-    now = int(time.time())
-    since = now - DAYS * 86400
-    supply, top = get_top_token_accounts()
-
-    results = []
-    for row in top:
-        owner = row["owner"]
-        if not owner:
-            continue
-        try:
-            flow = net_flow_for_owner(owner, MINT, since)
-        except Exception as e:
-            flow = {"owner": owner, "error": str(e)}
-        row2 = {**row, **flow}
-        results.append(row2)
-
+def write_report(results, supply, done: bool):
+    # 매 owner 완료 시 호출: 중간에 죽어도 끝난 owner 까지는 남도록 tmp 에 쓰고 교체
     report = {
         "generatedAtUTC": dt.datetime.now(dt.timezone.utc).isoformat(),
         "rpc": RPC,
         "days": DAYS,
         "supply": supply,
-        "top": results,
+        "complete": done,
+        "top": sorted(results, key=lambda r: r["rank"]),
     }
-
-    p = "/home/kspoopoo/.openclaw/workspace/penguin_14d_report.json"
-    with open(p, "w", encoding="utf-8") as f:
+    tmp = REPORT + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, REPORT)
+
+
+async def main():
+    run_id, since, resumed = jobs.open_run(f"14d:{MINT}:{DAYS}", int(time.time()) - DAYS * 86400)
+    if resumed:
+        print(f"resuming run #{run_id} (since={since})", file=sys.stderr)
+    supply, top = await pauser.run(get_top_token_accounts)
+    top = [row for row in top if row["owner"]]
+
+    # owner 별 작업은 독립적이라 동시에 돌리고, RPC 예산은 공용 client 의 bucket/limiter 가 전체로 나눈다
+    gate = asyncio.Semaphore(OWNER_CONCURRENCY)
+    flows = {}
+
+    async def analyze(row):
+        owner = row["owner"]
+        t0 = time.perf_counter()
+        async with gate:
+            if owner not in flows:
+                flows[owner] = asyncio.ensure_future(net_flow_for_owner(owner, MINT, since, run_id))
+            try:
+                flow = await asyncio.shield(flows[owner])
+            except Exception as e:
+                flow = {"owner": owner, "error": str(e)}
+        return {**row, **flow}, time.perf_counter() - t0
+
+    results = []
+    for k, fut in enumerate(asyncio.as_completed([analyze(row) for row in top]), 1):
+        row, took = await fut
+        results.append(row)
+        write_report(results, supply, k == len(top))
+        status = "ERR " + row["error"] if row.get("error") else f"scanned={row['sigsScanned']} complete={row['completeness'] * 100:.0f}%"
+        print(f"[{k}/{len(top)}] #{row['rank']} {row['owner'][:8]}... {status} {took:.1f}s", file=sys.stderr)
+    results.sort(key=lambda r: r["rank"])
+    if all(not r.get("error") and r["completeness"] >= 1 for r in results):
+        jobs.finish_run(run_id)
+    p = REPORT
 
     print("saved", p)
     for r in results:
@@ -160,9 +153,16 @@ def main():
             print(r["rank"], r["owner"][:8], "ERR", r["error"])
         else:
             print(
-                f"#{r['rank']} owner={r['owner'][:8]}... pct={r['pct']:.2f}% tx={r['txCount']} net={r['net']:+,.2f} in={r['inflow']:,.2f} out={r['outflow']:,.2f} scanned={r['sigsScanned']}"
+                f"#{r['rank']} owner={r['owner'][:8]}... pct={r['pct']:.2f}% tx={r['txCount']} net={r['net']:+,.2f} in={r['inflow']:,.2f} out={r['outflow']:,.2f} scanned={r['sigsScanned']}{' (truncated)' if r['truncated'] else ''}"
             )
+    print(client.summary(), f"paused_s={pauser.paused_s:.0f}")
+    print(default_cache().summary())
+    print(default_owners().summary())
 
 
 if __name__ == "__main__":
-    main()
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    asyncio.run(main())
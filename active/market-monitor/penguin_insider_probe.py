@@ -3,46 +3,65 @@
 PENGUIN 2주 내부자 덤핑 정황 탐지기
 - SOLANA_RPC_URL 필요 (Helius/QuickNode 등 권장)
 - creator + top holders 흐름을 14일 기준으로 스냅샷
+- 상위 owner 들의 상대방 흐름을 flow_graph 로 인덱싱해서 CEX/AMM 유입량까지 출력
 """
 
 from __future__ import annotations
-import os, time, datetime as dt, requests
+import asyncio, os, sys, time, datetime as dt
+
+from flow_graph import FlowGraph, fmt, ingest
+from owner_cache import default_owners, resolve_owners
+from solana_rpc import RPCClient
 
 MINT = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
 RPC = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
 DAYS = int(os.getenv("PROBE_DAYS", "14"))
+SEEDS = int(os.getenv("PROBE_SEEDS", "5"))
+DEPTH = int(os.getenv("PROBE_DEPTH", "2"))
+
+client = RPCClient(RPC, timeout=30)
 
-s = requests.Session()
 
-def rpc(method, params):
-    for i in range(8):
-        r = s.post(RPC, json={"jsonrpc":"2.0","id":1,"method":method,"params":params}, timeout=30)
-        j = r.json()
-        if "error" in j:
-            if j["error"].get("code") == 429:
-                time.sleep(1.2 * (i + 1))
-                continue
-            raise RuntimeError(j["error"])
-        return j["result"]
-    raise RuntimeError("RPC rate-limited too much")
+async def rpc(method, params):
+    return await client.call(method, params)
 
 
-def main():
-    supply = float(rpc("getTokenSupply", [MINT])["value"]["uiAmount"])
-    la = rpc("getTokenLargestAccounts", [MINT])["value"]
+async def main():
+    supply = float((await rpc("getTokenSupply", [MINT]))["value"]["uiAmount"])
+    la = (await rpc("getTokenLargestAccounts", [MINT]))["value"]
     print(f"RPC={RPC}")
     print(f"Supply={supply:,.3f}")
+    # 상위 15개 owner 를 한 번에 (캐시 hit 이면 RPC 호출 없음)
+    acc_owner = await resolve_owners(client, [x["address"] for x in la[:max(15, SEEDS)]])
     print("Top holders snapshot:")
     for i, x in enumerate(la[:15], 1):
         amt = float(x["uiAmount"])
-        print(f"{i:>2}. {x['address']}  {amt:,.3f} ({amt/supply*100:.3f}%)")
+        print(f"{i:>2}. {x['address']}  owner={acc_owner.get(x['address']) or '-'}  {amt:,.3f} ({amt/supply*100:.3f}%)")
 
     # creator(민트 계정) 메타에서 mintAuthority/updateAuthority를 바로 못 얻는 경우가 있어
     # 간단 버전: 토큰 account 생성/초기 민팅 트랜잭션 추적은 별도 단계로 분리
-    print("\nNext step:")
-    print("1) 위 상위 주소 중 의심 주소 3~5개 선정")
-    print("2) 각 주소 getSignaturesForAddress(limit=1000)로 14일 흐름 수집")
-    print("3) CEX/AMM 라벨 주소로 유입량 합산")
+
+    # 상위 PROBE_SEEDS 개 owner 의 흐름을 그래프로 인덱싱하고 CEX/AMM 라벨 sink 로 간 양을 합산
+    since = int(time.time()) - DAYS * 86400
+    owners = list(dict.fromkeys(o for o in (acc_owner.get(x["address"]) for x in la[:SEEDS]) if o))
+    graph = FlowGraph()
+    n_tx, n_edge = await ingest(client, graph, owners, MINT, since)
+    dec = graph.decimals(MINT)
+    print(f"\nFlow graph: indexed tx={n_tx} edges={n_edge} (depth={DEPTH}, {DAYS}d)")
+    for owner in owners:
+        sinks = graph.sinks(owner, MINT, DEPTH, since)
+        total = sum(s["amount"] for s in sinks.values())
+        print(f"- {owner} -> labeled sinks {fmt(total, dec)}")
+        for addr, s in sorted(sinks.items(), key=lambda kv: -kv[1]["amount"]):
+            print(f"    {s['kind']} {s['name']} {fmt(s['amount'], dec)} (hop>={s['min_hop']})")
+    print("상세: python flow_graph.py expand <owner> --depth 2")
+    print(client.summary())
+    print(default_owners().summary())
+
 
 if __name__ == "__main__":
-    main()
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    asyncio.run(main())
@@ -3,10 +3,15 @@
 PENGUIN (Solana) monitor
 - 가격/유동성/거래량/매수매도 트렌드 감시
 - 급락/유동성 급감/매도 우위 경고 출력
+- 매 poll 을 timeseries ring buffer 에 쌓고, 변화율/변동성/유동성 drawdown 을 자체 이력으로 계산
+- --watchlist 로 여러 토큰을 한 루프에서 감시 (/tokens/v1 로 30개씩 묶어서 동시 요청, 토큰별 threshold)
+- 토큰의 모든 pair 를 합쳐서 본다 (유동성/거래량/txns 는 합, 가격/변화율은 유동성 가중 평균)
+- 요청은 http_cache 경유 (ETag/Last-Modified, Cache-Control), 응답이 지난번과 같으면 pair 집계만 건너뜀 (analyze 는 매번)
 
 Usage:
   python3 penguin_monitor.py --once
   python3 penguin_monitor.py --interval 600
+  python3 penguin_monitor.py --watchlist watchlist.example.json --interval 60
 """
 
 from __future__ import annotations
@@ -17,15 +22,24 @@ import json
 import os
 import shlex
 import subprocess
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
-import requests
+from timeseries import TS_DIR, RollingStats, Sample, TimeSeries, rolling
 
 TOKEN = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
 CHAIN = "solana"
 API = "https://api.dexscreener.com"
-STATE_FILE = Path("/home/kspoopoo/.openclaw/workspace/.penguin_state.json")
+LEGACY_STATE_FILE = Path("/home/kspoopoo/.openclaw/workspace/.penguin_state.json")
+# 이력 기반 변화율/통계 창 (초)
+WINDOWS = {"m5": 300, "h1": 3600, "h24": 86400}
+# /tokens/v1/{chain}/{a,b,...} 는 주소 30개까지, 분당 300 요청
+WATCH_BATCH = 30
+WATCH_RPS = float(os.getenv("PENGUIN_WATCH_RPS", "4"))
+WATCH_CONCURRENCY = int(os.getenv("PENGUIN_WATCH_CONCURRENCY", "4"))
 OPENCLAW_BIN = "node /home/kspoopoo/openclaw/dist/index.js"
 TG_TARGET_DEFAULT = "497612383"
 
@@ -33,7 +47,7 @@ TG_TARGET_DEFAULT = "497612383"
 THRESHOLDS = {
     "drop_1h_pct": -5.0,        # 1h 하락이 -5% 이하
     "drop_5m_pct": -2.5,        # 5m 급락
-    "liq_drop_pct": -12.0,      # 직전 대비 유동성 -12% 이하
+    "liq_drop_pct": -12.0,      # 최근 1h 고점 대비 유동성 -12% 이하
     "sell_bias_ratio": 1.35,    # sells > buys * 1.35
     "watch_1h_pct": -3.0,       # 관망 경계선
 }
@@ -43,71 +57,223 @@ def now_kst() -> str:
     return (dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=9)).strftime("%Y-%m-%d %H:%M:%S KST")
 
 
-def fetch_top_pair() -> dict:
-    r = requests.get(f"{API}/token-pairs/v1/{CHAIN}/{TOKEN}", timeout=20)
-    r.raise_for_status()
-    arr = r.json()
-    if not isinstance(arr, list) or not arr:
-        raise RuntimeError("No pair data")
-    arr.sort(key=lambda p: float((p.get("liquidity") or {}).get("usd") or 0), reverse=True)
-    return arr[0]
+@dataclass
+class Watched:
+    chain: str
+    address: str
+    name: str
+    thresholds: dict
+    store: TimeSeries | None = None
+    hist: dict | None = None
+    # 직전 집계 결과(cur). 응답 payload 가 그대로면 재사용
+    last: dict | None = None
+
+
+def token_key(chain: str, address: str) -> tuple[str, str]:
+    # solana 주소(base58)는 대소문자 구분, EVM hex 주소는 아니다
+    return chain, address if chain == "solana" else address.lower()
+
+
+def load_watchlist(path: str | None) -> list[Watched]:
+    """
+    watchlist json: {"defaults": {threshold...}, "tokens": [{"chain", "address", "name", "thresholds"}]}
+    파일이 없으면 기존 PENGUIN 한 종목.
+    """
+    if not path:
+        return [Watched(CHAIN, TOKEN, "PENGUIN", dict(THRESHOLDS))]
+    cfg = json.loads(Path(path).read_text(encoding="utf-8"))
+    defaults = {**THRESHOLDS, **(cfg.get("defaults") or {})}
+    out = []
+    for t in cfg.get("tokens") or []:
+        out.append(Watched(
+            chain=t.get("chain", CHAIN),
+            address=t["address"],
+            name=t.get("name") or t["address"][:6],
+            thresholds={**defaults, **(t.get("thresholds") or {})},
+        ))
+    return out
+
+
+_http = None
+_bucket = None
+
+
+def http():
+    """interval 루프 동안 커넥션/캐시를 재사용하도록 HttpCache/TokenBucket 을 하나만 만든다."""
+    global _http, _bucket
+    if _http is None:
+        from http_cache import HttpCache
+        from ratelimit import TokenBucket
+
+        _http = HttpCache()
+        _bucket = TokenBucket(WATCH_RPS)
+    return _http, _bucket
+
+
+def fetch_chunk(chain: str, addrs: list[str]) -> tuple[list[dict], bool]:
+    """(pair 목록, 지난번과 달라졌는지)."""
+    import requests
+
+    cache, bucket = http()
+    for attempt in range(3):
+        bucket.wait()
+        try:
+            r = cache.get_json(f"{API}/tokens/v1/{chain}/{','.join(addrs)}", timeout=20)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 429 or attempt == 2:
+                raise
+            bucket.penalize(float(e.response.headers.get("Retry-After") or 5))
+            continue
+        return (r.data if isinstance(r.data, list) else []), r.changed
+    return [], True
+
+
+def fetch_pairs(watch: list[Watched]) -> tuple[dict[tuple[str, str], list[dict]], set[tuple[str, str]]]:
+    """
+    (token 별 pair 목록, 응답이 지난번과 같았던 token).
+    체인별로 30개씩 묶어서 요청을 동시에 보낸다 (속도는 TokenBucket 이 맞춤).
+    """
+    by_chain: dict[str, list[str]] = {}
+    for w in watch:
+        by_chain.setdefault(w.chain, []).append(w.address)
+    chunks = []
+    for chain, addrs in by_chain.items():
+        addrs = list(dict.fromkeys(addrs))
+        chunks += [(chain, addrs[i:i + WATCH_BATCH]) for i in range(0, len(addrs), WATCH_BATCH)]
+
+    out: dict[tuple[str, str], list[dict]] = {token_key(w.chain, w.address): [] for w in watch}
+    unchanged: set[tuple[str, str]] = set()
+    with ThreadPoolExecutor(max_workers=max(1, min(WATCH_CONCURRENCY, len(chunks)))) as ex:
+        for (chain, addrs), (arr, changed) in zip(chunks, ex.map(lambda c: fetch_chunk(*c), chunks)):
+            if not changed:
+                unchanged.update(token_key(chain, a) for a in addrs)
+            for p in arr:
+                # quote 쪽으로 걸린 pair 는 priceUsd 가 상대 토큰 가격이라 base 쪽만 모은다
+                key = token_key(chain, (p.get("baseToken") or {}).get("address") or "")
+                if key in out:
+                    out[key].append(p)
+    return out, unchanged
+
+
+def pair_liq(p: dict) -> float:
+    return float((p.get("liquidity") or {}).get("usd") or 0)
+
+
+def aggregate_pairs(pairs: list[dict]) -> dict:
+    """
+    한 토큰의 pair 들을 pair 하나와 같은 모양의 dict 로 합친다.
+    유동성/거래량/txns 는 합, 가격/변화율은 유동성 가중 평균 (유동성이 다 0이면 단순 평균).
+    """
+    pairs = sorted(pairs, key=pair_liq, reverse=True)
+    liqs = [pair_liq(p) for p in pairs]
+
+    def wavg(values: list) -> float | None:
+        pts = [(v, w) for v, w in zip(values, liqs) if v is not None]
+        if not pts:
+            return None
+        tw = sum(w for _, w in pts)
+        if tw <= 0:
+            return sum(float(v) for v, _ in pts) / len(pts)
+        return sum(float(v) * w for v, w in pts) / tw
+
+    def total(get) -> float:
+        return sum(float(get(p) or 0) for p in pairs)
+
+    top = pairs[0]
+    frames = ("m5", "h1", "h6", "h24")
+    return {
+        "dexId": str(top.get("dexId")) + (f"+{len(pairs) - 1}" if len(pairs) > 1 else ""),
+        "pairAddress": top.get("pairAddress"),
+        "pairCount": len(pairs),
+        "priceUsd": wavg([p.get("priceUsd") for p in pairs]),
+        "liquidity": {"usd": sum(liqs)},
+        "volume": {k: total(lambda p: (p.get("volume") or {}).get(k)) for k in frames},
+        "txns": {
+            k: {
+                side: int(total(lambda p: ((p.get("txns") or {}).get(k) or {}).get(side)))
+                for side in ("buys", "sells")
+            }
+            for k in frames
+        },
+        "priceChange": {k: wavg([(p.get("priceChange") or {}).get(k) for p in pairs]) for k in frames},
+    }
+
+
+def to_sample(cur: dict, ts: int | None = None) -> Sample:
+    tx = (cur.get("txns") or {}).get("h1") or {}
+    return Sample(
+        ts=ts or int(time.time()),
+        price=float(cur.get("priceUsd") or 0),
+        liq=float((cur.get("liquidity") or {}).get("usd") or 0),
+        vol_h1=float((cur.get("volume") or {}).get("h1") or 0),
+        buys_h1=int(tx.get("buys") or 0),
+        sells_h1=int(tx.get("sells") or 0),
+    )
 
 
-def load_state() -> dict:
-    if not STATE_FILE.exists():
-        return {}
-    try:
-        return json.loads(STATE_FILE.read_text())
-    except Exception:
-        return {}
+def open_history(w: Watched) -> tuple[TimeSeries, dict[str, RollingStats]]:
+    # 기존 PENGUIN 이력은 TS_DIR 바로 아래 그대로, 나머지 토큰은 하위 디렉터리
+    is_default = token_key(w.chain, w.address) == token_key(CHAIN, TOKEN)
+    store = TimeSeries(TS_DIR if is_default else TS_DIR / f"{w.chain}-{w.address}")
+    if is_default and store.tiers[0][2].count == 0 and LEGACY_STATE_FILE.exists():
+        # 예전 단일 상태 파일이 있으면 첫 점으로 옮겨온다
+        try:
+            old = json.loads(LEGACY_STATE_FILE.read_text())
+            store.append(Sample(int(old["ts"]), float(old.get("price") or 0), float(old.get("liq") or 0), 0.0, 0, 0))
+        except Exception:
+            pass
+    return store, {k: rolling(store.window(sec), sec) for k, sec in WINDOWS.items()}
 
 
-def save_state(state: dict) -> None:
-    STATE_FILE.write_text(json.dumps(state, ensure_ascii=False, indent=2))
+def pick_change(hist: dict[str, RollingStats], key: str, ch: dict) -> tuple[float, str]:
+    # 우리 이력이 창의 80% 이상을 덮으면 직접 계산한 변화율, 아니면 DexScreener priceChange
+    st = hist.get(key)
+    if st and st.covered >= st.window * 0.8:
+        return st.change_pct, "hist"
+    return float(ch.get(key) or 0), "dex"
 
 
-def analyze(cur: dict, prev: dict) -> tuple[list[str], str]:
+def analyze(cur: dict, hist: dict[str, RollingStats], th: dict = THRESHOLDS) -> tuple[list[str], str]:
     alerts: list[str] = []
 
     ch = cur.get("priceChange") or {}
     tx = cur.get("txns") or {}
-    liq = float((cur.get("liquidity") or {}).get("usd") or 0)
 
-    m5 = float(ch.get("m5") or 0)
-    h1 = float(ch.get("h1") or 0)
+    m5, m5_src = pick_change(hist, "m5", ch)
+    h1, h1_src = pick_change(hist, "h1", ch)
 
-    if h1 <= THRESHOLDS["drop_1h_pct"]:
-        alerts.append(f"⚠️ 1h 급락: {h1:.2f}%")
-    if m5 <= THRESHOLDS["drop_5m_pct"]:
-        alerts.append(f"⚠️ 5m 급락: {m5:.2f}%")
+    if h1 <= th["drop_1h_pct"]:
+        alerts.append(f"⚠️ 1h 급락: {h1:.2f}% ({h1_src})")
+    if m5 <= th["drop_5m_pct"]:
+        alerts.append(f"⚠️ 5m 급락: {m5:.2f}% ({m5_src})")
 
     h1tx = tx.get("h1") or {}
     buys = int(h1tx.get("buys") or 0)
     sells = int(h1tx.get("sells") or 0)
-    if buys > 0 and sells > buys * THRESHOLDS["sell_bias_ratio"]:
+    if buys > 0 and sells > buys * th["sell_bias_ratio"]:
         alerts.append(f"⚠️ 매도 우위: h1 buys/sells={buys}/{sells}")
 
-    prev_liq = float(prev.get("liq") or 0)
-    liq_delta = 0.0
-    if prev_liq > 0:
-        liq_delta = (liq - prev_liq) / prev_liq * 100
-        if liq_delta <= THRESHOLDS["liq_drop_pct"]:
-            alerts.append(f"⚠️ 유동성 급감: {liq_delta:.2f}% (prev ${prev_liq:,.0f} -> now ${liq:,.0f})")
+    # 유동성: 최근 1h peak 대비 drawdown (이력이 2점 이상일 때)
+    st = hist["h1"]
+    liq_dd = st.liq_drawdown_pct if st.liq.hi and len(st.first) >= 2 else 0.0
+    liq_hit = liq_dd <= th["liq_drop_pct"]
+    if liq_hit:
+        alerts.append(f"⚠️ 유동성 급감: 1h 고점 대비 {liq_dd:.2f}% (peak ${st.liq.max:,.0f} -> now ${st.last.liq:,.0f})")
 
     # Signal
     hard_risk = 0
-    if h1 <= THRESHOLDS["drop_1h_pct"]:
+    if h1 <= th["drop_1h_pct"]:
         hard_risk += 1
-    if m5 <= THRESHOLDS["drop_5m_pct"]:
+    if m5 <= th["drop_5m_pct"]:
         hard_risk += 1
-    if prev_liq > 0 and liq_delta <= THRESHOLDS["liq_drop_pct"]:
+    if liq_hit:
         hard_risk += 1
-    if buys > 0 and sells > buys * THRESHOLDS["sell_bias_ratio"]:
+    if buys > 0 and sells > buys * th["sell_bias_ratio"]:
         hard_risk += 1
 
     if hard_risk >= 2:
         signal = "비중감축"
-    elif h1 <= THRESHOLDS["watch_1h_pct"]:
+    elif h1 <= th["watch_1h_pct"]:
         signal = "관망"
     else:
         signal = "조건부 분할매수"
@@ -115,15 +281,32 @@ def analyze(cur: dict, prev: dict) -> tuple[list[str], str]:
     return alerts, signal
 
 
-def snapshot_line(cur: dict) -> str:
+def history_line(hist: dict[str, RollingStats]) -> str:
+    parts = []
+    for key, st in hist.items():
+        if not st.last:
+            continue
+        parts.append(
+            f"{key}: n={len(st.first)} cov={st.covered / 60:.0f}m chg={st.change_pct:+.2f}% "
+            f"lo/hi={st.price.min:.6g}/{st.price.max:.6g} ema={st.ema.value:.6g} "
+            f"vol={st.volatility_pct:.2f}% liq_dd={st.liq_drawdown_pct:.2f}%"
+        )
+    return "[HIST] " + " | ".join(parts)
+
+
+def fmt_pct(v) -> str:
+    return "None" if v is None else f"{float(v):.2f}"
+
+
+def snapshot_line(cur: dict, name: str = "PENGUIN") -> str:
     ch = cur.get("priceChange") or {}
     tx = cur.get("txns") or {}
     vol = cur.get("volume") or {}
     liq = float((cur.get("liquidity") or {}).get("usd") or 0)
 
     return (
-        f"[{now_kst()}] {cur.get('dexId')} price=${cur.get('priceUsd')} "
-        f"chg(m5/h1/h24)={ch.get('m5')}/{ch.get('h1')}/{ch.get('h24')}% "
+        f"[{now_kst()}] {name} {cur.get('dexId')} price=${float(cur.get('priceUsd') or 0):.8g} "
+        f"chg(m5/h1/h24)={fmt_pct(ch.get('m5'))}/{fmt_pct(ch.get('h1'))}/{fmt_pct(ch.get('h24'))}% "
         f"liq=${liq:,.0f} vol(h1/h24)={vol.get('h1')}/{vol.get('h24')} "
         f"tx_h1={tx.get('h1')}"
     )
@@ -140,32 +323,51 @@ def send_telegram(msg: str) -> None:
     subprocess.run(cmd, shell=True, check=False)
 
 
-def run_once(notify: bool = False, always_notify: bool = False) -> int:
-    cur = fetch_top_pair()
-    prev = load_state()
-
-    line = snapshot_line(cur)
+def evaluate(w: Watched, pairs: list[dict], unchanged: bool = False) -> tuple[str, bool] | None:
+    """
+    토큰 하나 처리. (알림 메시지 블록, 경고/신호 여부). pair 가 없으면 None.
+    unchanged 면 pair 집계만 건너뛰고 직전 cur 를 쓴다 (거래가 없었다는 뜻이라 이력에는 점만 추가).
+    analyze 는 매번 한다: 가격이 그대로여도 m5/h1 창과 유동성 고점은 시간이 지나며 바뀐다.
+    """
+    if not pairs:
+        print(f"[{now_kst()}] {w.name} no pair data")
+        return None
+    reuse = unchanged and w.last is not None
+    cur = w.last if reuse else aggregate_pairs(pairs)
+    w.last = cur
+    sample = to_sample(cur)
+    w.store.append(sample)
+    # --interval 모드에서는 hist 객체를 계속 들고 있으므로 poll 당 push 한 번(O(1))으로 갱신
+    for st in w.hist.values():
+        st.push(sample)
+
+    line = snapshot_line(cur, w.name)
     print(line)
-    alerts, signal = analyze(cur, prev)
-    print(f"[SIGNAL] {signal}")
+    print(history_line(w.hist))
+    alerts, signal = analyze(cur, w.hist, w.thresholds)
+    print(f"[SIGNAL] {signal}" + (" (payload unchanged)" if reuse else ""))
     for a in alerts:
         print(a)
 
-    if notify and (always_notify or alerts or signal != "조건부 분할매수"):
-        msg = "[PENGUIN SIGNAL] " + signal + "\n" + line
-        if alerts:
-            msg += "\n" + "\n".join(alerts)
-        send_telegram(msg)
-
-    save_state(
-        {
-            "ts": int(time.time()),
-            "liq": float((cur.get("liquidity") or {}).get("usd") or 0),
-            "price": float(cur.get("priceUsd") or 0),
-            "pair": cur.get("pairAddress"),
-            "dex": cur.get("dexId"),
-        }
-    )
+    return "\n".join([f"[{w.name} SIGNAL] {signal}", line, *alerts]), bool(alerts or signal != "조건부 분할매수")
+
+
+def run_once(watch: list[Watched], notify: bool = False, always_notify: bool = False) -> int:
+    t0 = time.perf_counter()
+    by_token, unchanged = fetch_pairs(watch)
+    fetched = time.perf_counter() - t0
+    blocks = []
+    for w in watch:
+        key = token_key(w.chain, w.address)
+        r = evaluate(w, by_token.get(key) or [], key in unchanged)
+        if r and (r[1] or always_notify):
+            blocks.append(r[0])
+    if len(watch) > 1:
+        print(f"[CYCLE] tokens={len(watch)} notify={len(blocks)} fetch={fetched:.2f}s total={time.perf_counter() - t0:.2f}s")
+    print(f"[HTTP] {http()[0].summary()}")
+
+    if notify and blocks:
+        send_telegram("\n\n".join(blocks))
     return 0
 
 
@@ -175,18 +377,27 @@ def main() -> int:
     ap.add_argument("--once", action="store_true")
     ap.add_argument("--notify", action="store_true", help="send Telegram alert when thresholds hit")
     ap.add_argument("--always-notify", action="store_true", help="send Telegram message every run")
+    ap.add_argument("--watchlist", default=os.getenv("PENGUIN_WATCHLIST"), help="watchlist json (없으면 PENGUIN 한 종목)")
+    ap.add_argument("--profile-startup", action="store_true", help="report import-time breakdown and time to first output")
     args = ap.parse_args()
 
+    watch = load_watchlist(args.watchlist)
+    for w in watch:
+        w.store, w.hist = open_history(w)
     if args.once or args.interval <= 0:
-        return run_once(notify=args.notify, always_notify=args.always_notify)
+        return run_once(watch, notify=args.notify, always_notify=args.always_notify)
 
     while True:
         try:
-            run_once(notify=args.notify, always_notify=args.always_notify)
+            run_once(watch, notify=args.notify, always_notify=args.always_notify)
         except Exception as e:
             print(f"[{now_kst()}] ERROR: {e}")
         time.sleep(args.interval)
 
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
     raise SystemExit(main())
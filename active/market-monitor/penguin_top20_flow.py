@@ -1,102 +1,52 @@
 #!/usr/bin/env python3
-import base64
-import struct
+import asyncio
+import os
+import sys
 import time
-import requests
 
-RPC = "https://mainnet.helius-rpc.com/?api-key=5073f9a7-2c12-4d66-b2c7-74246ee06129"
+from holder_snapshot import TOKEN2022, Snapshot, diff, fetch_snapshot, print_diff
+from sig_cursor import CursorStore, sync_flows
+from solana_rpc import RPCClient
+from tx_cache import default_cache
+
+RPC = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
 MINT = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
-TOKEN2022 = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
 WINDOW_SEC = 6 * 3600
 MAX_SIG_PER_OWNER = 30
 
-ALPH = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
-
-
-def b58(b: bytes) -> str:
-    n = int.from_bytes(b, "big")
-    s = ""
-    while n > 0:
-        n, r = divmod(n, 58)
-        s = ALPH[r] + s
-    pad = 0
-    for x in b:
-        if x == 0:
-            pad += 1
-        else:
-            break
-    return "1" * pad + (s or "1")
-
-
-s = requests.Session()
+client = RPCClient(RPC, timeout=60)
+cursors = CursorStore()
 
 
-def rpc(method, params):
-    for i in range(8):
-        j = s.post(RPC, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params}, timeout=60).json()
-        if "error" in j:
-            if j["error"].get("code") in (429, -32429):
-                time.sleep(0.2 * (i + 1))
-                continue
-            raise RuntimeError(j["error"])
-        return j["result"]
-    raise RuntimeError("rate-limited")
+async def rpc(method, params):
+    return await client.call(method, params)
 
 
-def main():
+async def main():
     since = int(time.time()) - WINDOW_SEC
-    sup = rpc("getTokenSupply", [MINT])["value"]
+    sup = (await rpc("getTokenSupply", [MINT]))["value"]
     dec = int(sup["decimals"])
     supply = float(sup["uiAmount"])
 
-    res = rpc("getProgramAccounts", [TOKEN2022, {
-        "encoding": "base64",
-        "filters": [{"memcmp": {"offset": 0, "bytes": MINT}}],
-        "dataSlice": {"offset": 0, "length": 72}
-    }])
+    prev = Snapshot.latest(MINT)
+    snap = await fetch_snapshot(client, MINT, TOKEN2022)
+    snap.save()
+    top20 = snap.top(20)
 
-    owner_amt = {}
-    for a in res:
-        raw = base64.b64decode(a["account"]["data"][0])
-        if len(raw) < 72:
-            continue
-        owner = b58(raw[32:64])
-        amt = struct.unpack("<Q", raw[64:72])[0]
-        if amt == 0:
-            continue
-        owner_amt[owner] = owner_amt.get(owner, 0) + amt
-
-    top20 = sorted(owner_amt.items(), key=lambda kv: kv[1], reverse=True)[:20]
+    async def analyze(owner, raw_amt):
+        w = await sync_flows(client, cursors, owner, MINT, since, MAX_SIG_PER_OWNER)
+        pct = (raw_amt / (10 ** dec)) / supply * 100
+        return owner, pct, w["net"] / 10 ** dec
 
+    # owner 별로 동시에 돌리고 RPC 예산은 공용 client 가 나눈다. 실패한 owner 는 빼고 진행
     rows = []
-    for owner, raw_amt in top20:
-        sigs = rpc("getSignaturesForAddress", [owner, {"limit": MAX_SIG_PER_OWNER}])
-        net = 0.0
-        for sg in sigs:
-            bt = sg.get("blockTime") or 0
-            if bt < since:
-                continue
-            tx = rpc("getTransaction", [sg["signature"], {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}])
-            if not tx:
-                continue
-            pre = (tx.get("meta") or {}).get("preTokenBalances") or []
-            post = (tx.get("meta") or {}).get("postTokenBalances") or []
-            pa = po = 0.0
-            touched = False
-            for b in pre:
-                if b.get("mint") == MINT and b.get("owner") == owner:
-                    pa += float((b.get("uiTokenAmount") or {}).get("uiAmount") or 0)
-                    touched = True
-            for b in post:
-                if b.get("mint") == MINT and b.get("owner") == owner:
-                    po += float((b.get("uiTokenAmount") or {}).get("uiAmount") or 0)
-                    touched = True
-            if touched:
-                d = po - pa
-                if abs(d) > 1e-9:
-                    net += d
-        pct = (raw_amt / (10 ** dec)) / supply * 100
-        rows.append((owner, pct, net))
+    tasks = [asyncio.ensure_future(analyze(owner, raw_amt)) for owner, raw_amt in top20]
+    for k, fut in enumerate(asyncio.as_completed(tasks), 1):
+        try:
+            rows.append(await fut)
+            print(f"[{k}/{len(tasks)}] {rows[-1][0][:8]}... done", file=sys.stderr)
+        except Exception as e:
+            print(f"[{k}/{len(tasks)}] ERR {e}", file=sys.stderr)
 
     neg = sum(1 for _, _, n in rows if n < 0)
     pos = sum(1 for _, _, n in rows if n > 0)
@@ -108,7 +58,15 @@ def main():
     print("top inflow")
     for o, p, n in sorted(rows, key=lambda x: x[2], reverse=True)[:8]:
         print(o, f"pct={p:.3f}", f"net=+{n:,.2f}")
+    if prev is not None:
+        print_diff(diff(prev, snap), dec)
+    print(client.summary())
+    print(default_cache().summary())
 
 
 if __name__ == "__main__":
-    main()
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Rate limiting primitives shared by the market-monitor clients.
+
+- TokenBucket: rate/burst 토큰 버킷. reserve() 는 기다릴 시간을 돌려주므로
+  sync 코드는 time.sleep(), async 코드는 await acquire() 로 쓴다.
+  penalize() 로 Retry-After 동안 버킷 전체를 멈출 수 있다.
+- AdaptiveLimiter: AIMD 동시성 제한. 성공하면 천천히 늘리고 throttle 되면 반으로.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self, n: float = 1.0) -> float:
+        """토큰 n 개를 예약하고, 실제로 쓸 수 있을 때까지 기다려야 하는 초를 돌려준다."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def penalize(self, seconds: float) -> None:
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def wait(self, n: float = 1.0) -> float:
+        delay = self.reserve(n)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire(self, n: float = 1.0) -> float:
+        delay = self.reserve(n)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial: int, minimum: int = 1, maximum: int | None = None):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.active = 0
+        self._cond: asyncio.Condition | None = None
+
+    @property
+    def cond(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def __aenter__(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self.cond:
+            self.active -= 1
+            self.cond.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1.0 / max(1.0, self.limit))
+
+    def on_throttle(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Solana JSON-RPC fixtures: recorder, loader, synthetic generator.
+
+- 녹화: SOLANA_RPC_RECORD=<path.jsonl> 로 아무 스크립트나 돌리면 RPCClient 가 성공한 응답을
+  {"method", "params", "result"} 한 줄씩 append 한다.
+- 재생: rpc_standin.py 가 이 파일을 읽어서 로컬 JSON-RPC 서버로 응답.
+- 합성: 실제 RPC 없이 벤치용 fixture 생성 (holder 분포 / 지갑별 sig / tx balance).
+
+Usage:
+  python rpc_fixtures.py synth --out /tmp/penguin.jsonl --holders 20000 --active 40 --sigs 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+MINT = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
+TOKEN2022 = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+THREECA = "3caFdfwp2LQ93cTENzGm7T7SRSZHXiuWTB22gDQ2UBSy"
+RAYDIUM = "5Q544fKrFoe6tsEbD7S8EmxGTJYAKtTVhAW5Q5pge4j1"
+BINANCE = "5tzFkiKscXHK5ZXCGbXZxdw7gTjjD1mBwuoFbhUvuAi9"
+
+ALPH = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58encode(b: bytes) -> str:
+    n = int.from_bytes(b, "big")
+    s = ""
+    while n > 0:
+        n, r = divmod(n, 58)
+        s = ALPH[r] + s
+    pad = len(b) - len(b.lstrip(b"\0"))
+    return "1" * pad + s
+
+
+def b58decode(s: str) -> bytes:
+    n = 0
+    for ch in s:
+        n = n * 58 + ALPH.index(ch)
+    pad = len(s) - len(s.lstrip("1"))
+    return b"\0" * pad + n.to_bytes((n.bit_length() + 7) // 8, "big")
+
+
+class Recorder:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def record(self, method: str, params, result) -> None:
+        line = json.dumps({"method": method, "params": params, "result": result}, separators=(",", ":"))
+        with self.lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load(paths) -> list[dict]:
+    out = []
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            out.extend(json.loads(line) for line in f if line.strip())
+    return out
+
+
+def _balance(owner: str, amount: int, dec: int, idx: int) -> dict:
+    return {
+        "accountIndex": idx,
+        "mint": MINT,
+        "owner": owner,
+        "programId": TOKEN2022,
+        "uiTokenAmount": {"amount": str(amount), "decimals": dec, "uiAmount": amount / 10 ** dec,
+                          "uiAmountString": str(amount / 10 ** dec)},
+    }
+
+
+def synth(out: Path, holders: int, active: int, sigs: int, days: int = 14, seed: int = 7, dec: int = 6) -> None:
+    """holder 분포 + 상위 active 지갑(+3ca)의 sig/tx 를 가진 fixture 를 만든다."""
+    rng = random.Random(seed)
+    now = int(time.time())
+    mint_b = b58decode(MINT)
+    rows = []
+
+    def addr() -> str:
+        return b58encode(bytes(rng.getrandbits(8) for _ in range(32)))
+
+    # owner 가 여러 token account 를 가진 경우도 섞는다
+    owners = [addr() for _ in range(holders)]
+    accounts = []
+    for i, o in enumerate(owners):
+        for _ in range(1 + (rng.random() < 0.05)):
+            amount = 0 if rng.random() < 0.1 else int(rng.paretovariate(1.2) * 10 ** (dec + 3))
+            accounts.append((addr(), o, amount))
+    total = sum(a for _, _, a in accounts)
+
+    rows.append({"method": "getTokenSupply", "params": [MINT],
+                 "result": {"context": {"slot": 1}, "value": {"amount": str(total), "decimals": dec,
+                                                               "uiAmount": total / 10 ** dec, "uiAmountString": str(total / 10 ** dec)}}})
+    largest = sorted(accounts, key=lambda x: -x[2])[:20]
+    rows.append({"method": "getTokenLargestAccounts", "params": [MINT],
+                 "result": {"context": {"slot": 1}, "value": [
+                     {"address": ta, "amount": str(a), "decimals": dec, "uiAmount": a / 10 ** dec, "uiAmountString": str(a / 10 ** dec)}
+                     for ta, _, a in largest]}})
+    for ta, o, _ in largest:
+        rows.append({"method": "getAccountInfo", "params": [ta, {"encoding": "jsonParsed"}],
+                     "result": {"context": {"slot": 1}, "value": {"data": {"parsed": {"info": {"owner": o, "mint": MINT}},
+                                                                           "program": "spl-token-2022"},
+                                                                  "owner": TOKEN2022}}})
+    gpa = []
+    for ta, o, a in accounts:
+        raw = mint_b + b58decode(o).rjust(32, b"\0") + a.to_bytes(8, "little")
+        gpa.append({"pubkey": ta, "account": {"data": [base64.b64encode(raw).decode(), "base64"], "executable": False,
+                                              "lamports": 2039280, "owner": TOKEN2022, "rentEpoch": 18446744073709551615, "space": 72}})
+    rows.append({"method": "getProgramAccounts", "params": [TOKEN2022, {
+        "encoding": "base64", "filters": [{"memcmp": {"offset": 0, "bytes": MINT}}], "dataSlice": {"offset": 0, "length": 72}}],
+        "result": gpa})
+
+    by_owner: dict[str, int] = {}
+    for _, o, a in accounts:
+        by_owner[o] = by_owner.get(o, 0) + a
+    tracked = [o for o, _ in sorted(by_owner.items(), key=lambda kv: -kv[1])[:active]] + [THREECA]
+    slot = 300_000_000
+    for o in tracked:
+        entries = []
+        for _ in range(sigs):
+            bt = now - rng.randrange(days * 86400 + 86400)
+            sig = b58encode(bytes(rng.getrandbits(8) for _ in range(64)))
+            peer = rng.choice([RAYDIUM, RAYDIUM, BINANCE, rng.choice(owners)])
+            amt = int(rng.random() * 10 ** (dec + 5))
+            sign = -1 if rng.random() < 0.6 else 1
+            base_o, base_p = 10 ** (dec + 7), 10 ** (dec + 8)
+            pre = [_balance(o, base_o, dec, 1), _balance(peer, base_p, dec, 2)]
+            post = [_balance(o, base_o + sign * amt, dec, 1), _balance(peer, base_p - sign * amt, dec, 2)]
+            s = slot + (bt - now) * 2
+            entries.append({"signature": sig, "slot": s, "blockTime": bt, "err": None, "memo": None, "confirmationStatus": "finalized"})
+            rows.append({"method": "getTransaction", "params": [sig, {"encoding": "base64", "maxSupportedTransactionVersion": 0}],
+                         "result": {"slot": s, "blockTime": bt, "meta": {"err": None, "fee": 5000, "preTokenBalances": pre,
+                                                                         "postTokenBalances": post},
+                                    "transaction": [base64.b64encode(os.urandom(180)).decode(), "base64"]}})
+        entries.sort(key=lambda e: -e["blockTime"])
+        rows.append({"method": "getSignaturesForAddress", "params": [o, {"limit": 1000}], "result": entries})
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, separators=(",", ":")) + "\n")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("synth")
+    sp.add_argument("--out", required=True)
+    sp.add_argument("--holders", type=int, default=20000)
+    sp.add_argument("--active", type=int, default=40, help="sig/tx 를 만들 상위 owner 수")
+    sp.add_argument("--sigs", type=int, default=300, help="owner 당 sig 수")
+    sp.add_argument("--days", type=int, default=14)
+    sp.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    synth(Path(args.out), args.holders, args.active, args.sigs, args.days, args.seed)
+    print("wrote", args.out)
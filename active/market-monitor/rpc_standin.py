@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Local Solana JSON-RPC stand-in serving recorded / synthetic fixtures.
+
+- fixture 매칭: (method, params 전체) 가 같으면 그 응답, 아니면 (method, params[0]) 의 마지막 응답
+- getSignaturesForAddress: 주소별로 녹화된 sig 를 전부 합쳐서 before / until / limit 을 직접 적용
+- getTransaction: 없는 sig 는 null (실제 RPC 와 같음)
+- getMultipleAccounts: 녹화된 조합이 없으면 계정별 getAccountInfo fixture 로 조립 (없는 계정은 null)
+- batch 지원 (--max-batch 넘으면 단일 에러로 거절), 응답 지연(--latency-ms, --jitter-ms)
+- 429 주입: --http-429 확률로 HTTP 429 + Retry-After, --item-429 확률로 batch 항목 -32429
+- GET /stats : 요청/항목/메서드별 카운트 (GET /stats?reset=1 로 초기화)
+- --ws-port 를 주면 websocket(logsSubscribe mentions) stand-in 도 같이 띄운다 (websockets 패키지 필요)
+  - POST /emit {"addresses": [...], "signature", "slot", "blockTime", "tx", "notify": true}
+    → 새 sig/tx 를 fixture 에 넣고 notify 면 구독자에게 logsNotification (false 면 알림 유실 흉내)
+  - POST /ws/drop : 열린 websocket 을 전부 끊는다 (재연결 / gap-fill 테스트)
+
+Usage:
+  python rpc_fixtures.py synth --out /tmp/penguin.jsonl
+  python rpc_standin.py /tmp/penguin.jsonl --port 18899 --latency-ms 40 --http-429 0.05
+  SOLANA_RPC_URL=http://127.0.0.1:18899 python penguin_14d_analysis.py
+  python rpc_standin.py /tmp/penguin.jsonl --ws-port 18900
+  SOLANA_RPC_URL=http://127.0.0.1:18899 SOLANA_WS_URL=ws://127.0.0.1:18900 python threeca_outflow_watch.py --stream
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rpc_fixtures
+
+
+class Fixtures:
+    def __init__(self, rows: list[dict]):
+        self.exact: dict[tuple, object] = {}
+        self.loose: dict[tuple, object] = {}
+        self.sigs: dict[str, dict[str, dict]] = {}
+        for r in rows:
+            method, params, result = r["method"], r.get("params") or [], r.get("result")
+            self.exact[(method, json.dumps(params, sort_keys=True))] = result
+            if params:
+                self.loose[(method, json.dumps(params[0], sort_keys=True))] = result
+            if method == "getSignaturesForAddress" and params:
+                bucket = self.sigs.setdefault(params[0], {})
+                for e in result or []:
+                    bucket[e["signature"]] = e
+        # newest-first 정렬은 한 번만
+        self.sig_lists = {
+            a: sorted(d.values(), key=lambda e: (e.get("slot") or 0, e.get("blockTime") or 0), reverse=True)
+            for a, d in self.sigs.items()
+        }
+
+    def answer(self, method: str, params: list):
+        if method == "getSignaturesForAddress":
+            return self._signatures(params[0], params[1] if len(params) > 1 else {})
+        key = (method, json.dumps(params, sort_keys=True))
+        if key in self.exact:
+            return self.exact[key]
+        if params:
+            loose = (method, json.dumps(params[0], sort_keys=True))
+            if loose in self.loose:
+                return self.loose[loose]
+        if method == "getTransaction":
+            return None
+        if method == "getMultipleAccounts" and params:
+            # 녹화에 없는 조합이면 계정별 getAccountInfo fixture 로 맞춘다 (없는 계정은 null)
+            values = []
+            for acc in params[0]:
+                info = self.loose.get(("getAccountInfo", json.dumps(acc)))
+                values.append((info or {}).get("value"))
+            return {"context": {"slot": 1}, "value": values}
+        raise KeyError(f"no fixture for {method}")
+
+    def add(self, addresses: list[str], entry: dict, tx: dict | None) -> None:
+        """새 sig 를 주소별 목록 맨 앞(newest)에 넣고 getTransaction 응답도 등록."""
+        for a in addresses:
+            self.sigs.setdefault(a, {})[entry["signature"]] = entry
+            self.sig_lists[a] = [entry] + [e for e in self.sig_lists.get(a, []) if e["signature"] != entry["signature"]]
+        if tx is not None:
+            self.loose[("getTransaction", json.dumps(entry["signature"]))] = tx
+
+    def _signatures(self, address: str, cfg: dict):
+        arr = self.sig_lists.get(address, [])
+        sigs = [e["signature"] for e in arr]
+        start = sigs.index(cfg["before"]) + 1 if cfg.get("before") in sigs else 0
+        end = sigs.index(cfg["until"]) if cfg.get("until") in sigs else len(arr)
+        return arr[start:end][: int(cfg.get("limit") or 1000)]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = self.items = self.throttled = self.rejected = 0
+        self.ws_subscribes = self.ws_notified = 0
+        self.by_method: dict[str, int] = {}
+
+    def as_dict(self) -> dict:
+        return {"requests": self.requests, "items": self.items, "throttled": self.throttled,
+                "rejected": self.rejected, "by_method": dict(self.by_method),
+                "ws_subscribes": self.ws_subscribes, "ws_notified": self.ws_notified}
+
+
+class WsHub:
+    """logsSubscribe({"mentions": [addr]}) 만 흉내내는 websocket 서버. 별도 스레드의 event loop 에서 돈다."""
+
+    def __init__(self, stats: Stats):
+        self.stats = stats
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.subs: dict = {}  # ws -> {sub_id: address}
+        self.ids = itertools.count(1)
+        self.ready = threading.Event()
+
+    async def handler(self, ws):
+        from websockets.exceptions import ConnectionClosed
+
+        subs = self.subs.setdefault(ws, {})
+        try:
+            async for raw in ws:
+                req = json.loads(raw)
+                method, params, rid = req.get("method"), req.get("params") or [], req.get("id")
+                if method == "logsSubscribe" and params and isinstance(params[0], dict) and params[0].get("mentions"):
+                    sid = next(self.ids)
+                    subs[sid] = params[0]["mentions"][0]
+                    with self.stats.lock:
+                        self.stats.ws_subscribes += 1
+                    await ws.send(json.dumps({"jsonrpc": "2.0", "id": rid, "result": sid}))
+                elif method == "logsUnsubscribe" and params:
+                    await ws.send(json.dumps({"jsonrpc": "2.0", "id": rid, "result": subs.pop(params[0], None) is not None}))
+                else:
+                    await ws.send(json.dumps({"jsonrpc": "2.0", "id": rid,
+                                              "error": {"code": -32601, "message": f"stand-in: {method} not supported"}}))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.subs.pop(ws, None)
+
+    async def _notify(self, addresses: list[str], signature: str, slot: int, err) -> None:
+        for ws, subs in list(self.subs.items()):
+            for sid, addr in list(subs.items()):
+                if addr not in addresses:
+                    continue
+                msg = {"jsonrpc": "2.0", "method": "logsNotification", "params": {
+                    "result": {"context": {"slot": slot}, "value": {"signature": signature, "err": err, "logs": []}},
+                    "subscription": sid}}
+                try:
+                    await ws.send(json.dumps(msg))
+                except Exception:
+                    continue
+                with self.stats.lock:
+                    self.stats.ws_notified += 1
+
+    async def _drop(self) -> None:
+        for ws in list(self.subs):
+            await ws.close()
+
+    def notify(self, addresses: list[str], signature: str, slot: int, err=None) -> None:
+        asyncio.run_coroutine_threadsafe(self._notify(addresses, signature, slot, err), self.loop).result(10)
+
+    def drop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._drop(), self.loop).result(10)
+
+    def start(self, host: str, port: int) -> None:
+        from websockets.asyncio.server import serve as ws_serve
+
+        async def run():
+            self.loop = asyncio.get_running_loop()
+            async with ws_serve(self.handler, host, port):
+                self.ready.set()
+                await asyncio.Future()
+
+        threading.Thread(target=lambda: asyncio.run(run()), daemon=True).start()
+        self.ready.wait(10)
+
+
+def make_handler(fx: Fixtures, stats: Stats, opts, hub: WsHub | None = None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, obj, headers=None):
+            data = json.dumps(obj, separators=(",", ":")).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if not self.path.startswith("/stats"):
+                return self._send(404, {"error": "not found"})
+            with stats.lock:
+                out = stats.as_dict()
+                if "reset=1" in self.path:
+                    stats.reset()
+            self._send(200, out)
+
+        def _one(self, req: dict, in_batch: bool) -> dict:
+            method, params, rid = req.get("method"), req.get("params") or [], req.get("id")
+            with stats.lock:
+                stats.items += 1
+                stats.by_method[method] = stats.by_method.get(method, 0) + 1
+            if in_batch and random.random() < opts.item_429:
+                with stats.lock:
+                    stats.throttled += 1
+                return {"jsonrpc": "2.0", "id": rid, "error": {"code": -32429, "message": "rate limited"}}
+            try:
+                return {"jsonrpc": "2.0", "id": rid, "result": fx.answer(method, params)}
+            except KeyError as e:
+                return {"jsonrpc": "2.0", "id": rid, "error": {"code": -32601, "message": str(e)}}
+
+        def _control(self, body) -> None:
+            if self.path.startswith("/emit"):
+                entry = {"signature": body["signature"], "slot": body.get("slot") or 0, "blockTime": body.get("blockTime"),
+                         "err": body.get("err"), "memo": None, "confirmationStatus": "confirmed"}
+                fx.add(body["addresses"], entry, body.get("tx"))
+                if hub is not None and body.get("notify", True):
+                    hub.notify(body["addresses"], body["signature"], entry["slot"], entry["err"])
+            elif hub is not None:
+                hub.drop()
+            self._send(200, {"ok": True})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"null")
+            if self.path.startswith(("/emit", "/ws/drop")):
+                return self._control(body)
+            with stats.lock:
+                stats.requests += 1
+            delay = (opts.latency_ms + random.random() * opts.jitter_ms) / 1000
+            if delay:
+                time.sleep(delay)
+            if random.random() < opts.http_429:
+                with stats.lock:
+                    stats.throttled += 1
+                return self._send(429, {"jsonrpc": "2.0", "id": None, "error": {"code": 429, "message": "Too many requests"}},
+                                  {"Retry-After": str(opts.retry_after)})
+            if isinstance(body, list):
+                if len(body) > opts.max_batch:
+                    with stats.lock:
+                        stats.rejected += 1
+                    return self._send(200, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch too large"}})
+                return self._send(200, [self._one(b, True) for b in body])
+            self._send(200, self._one(body, False))
+
+        def log_message(self, *a):
+            pass
+
+    return Handler
+
+
+def serve(paths, host: str = "127.0.0.1", port: int = 18899, latency_ms: float = 0, jitter_ms: float = 0,
+          http_429: float = 0, item_429: float = 0, retry_after: float = 0.2, max_batch: int = 100,
+          ws_port: int | None = None):
+    """백그라운드 스레드로 띄우고 (server, stats) 를 돌려준다. 끝나면 server.shutdown()."""
+    opts = argparse.Namespace(latency_ms=latency_ms, jitter_ms=jitter_ms, http_429=http_429, item_429=item_429,
+                              retry_after=retry_after, max_batch=max_batch)
+    stats = Stats()
+    hub = None
+    if ws_port:
+        hub = WsHub(stats)
+        hub.start(host, ws_port)
+    server = ThreadingHTTPServer((host, port), make_handler(Fixtures(rpc_fixtures.load(paths)), stats, opts, hub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("fixtures", nargs="+", help="녹화/합성 fixture jsonl")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18899)
+    ap.add_argument("--latency-ms", type=float, default=0)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--http-429", type=float, default=0, help="HTTP 429 응답 확률")
+    ap.add_argument("--item-429", type=float, default=0, help="batch 항목별 -32429 확률")
+    ap.add_argument("--retry-after", type=float, default=0.2)
+    ap.add_argument("--max-batch", type=int, default=100)
+    ap.add_argument("--ws-port", type=int, help="websocket stand-in port (logsSubscribe)")
+    a = ap.parse_args()
+    srv, _ = serve(a.fixtures, a.host, a.port, a.latency_ms, a.jitter_ms, a.http_429, a.item_429, a.retry_after, a.max_batch,
+                   a.ws_port)
+    print(f"rpc stand-in on http://{a.host}:{a.port}" + (f" ws://{a.host}:{a.ws_port}" if a.ws_port else ""))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Ordered dedup store for alerting watchers (SQLite-backed).
+
+scope(threeca_outflow_watch 는 규칙 지갑마다 하나) 마다
+  - 최근 capacity 개 sig 를 넣은 순서대로 들고 있는 ring (OrderedDict, 포함 여부/추가/가장 오래된 것 제거 모두 O(1))
+  - low watermark: ring 에서 밀려난 sig 들 중 가장 큰 slot.
+    slot 을 아는 sig 가 이 값 이하면 ring 에 없어도 이미 처리된 것으로 본다 → 오래된 sig 가 밀려나도 다시 알리지 않음
+  - deferred: 봤지만 아직 처리 못 한(RPC 에러/미확정으로 재시도 대기) sig -> slot.
+    watermark 는 이 중 가장 작은 slot 바로 아래까지만 인정한다 → stream 에서 slot 순서가 뒤섞여 ring 이 먼저 돌아도
+    재시도 대기 중인 sig 가 watermark 에 묻혀 버리지 않음
+를 둔다. 디스크에는 추가된 행만 append 하고 capacity 를 넘는 오래된 행만 지우므로 매번 전체를 다시 쓰지 않는다.
+watermark 는 scope 안의 sig 가 한 지갑 이력에서 대체로 순서대로 들어온다는 가정이라,
+진행 정도가 다른 지갑들을 한 scope 에 섞지 않는다 (한 지갑 cursor 가 밀리면 다른 지갑 watermark 에 묻힘).
+
+Bloom filter 는 false positive 가 곧 알림 누락이라 쓰지 않았다.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+
+SEEN_PATH = Path(os.getenv("SOLANA_SEEN_DB", "/home/kspoopoo/.openclaw/workspace/state/solana_seen.sqlite"))
+CAPACITY = int(os.getenv("SOLANA_SEEN_CAPACITY", "5000"))
+
+
+class SeenSet:
+    """scope 하나 분량. SeenStore.scope() 로 얻는다."""
+
+    def __init__(self, store: SeenStore, scope: str, capacity: int):
+        self.store = store
+        self.scope = scope
+        self.capacity = capacity
+        self.ring: OrderedDict[str, tuple[int, int]] = OrderedDict()  # sig -> (seq, slot)
+        self.low_slot = 0
+        self.seq = 0
+        self.pending: list[tuple[str, int, int, int]] = []
+        self.deferred: dict[str, int] = dict(
+            store.db.execute("SELECT signature, slot FROM deferred WHERE scope=?", (scope,)).fetchall()
+        )
+        self.deferred_dirty = False
+        row = store.db.execute("SELECT low_slot FROM watermark WHERE scope=?", (scope,)).fetchone()
+        if row:
+            self.low_slot = row[0]
+        for seq, sig, slot in store.db.execute(
+            "SELECT seq, signature, slot FROM seen WHERE scope=? ORDER BY seq DESC LIMIT ?", (scope, capacity)
+        ).fetchall()[::-1]:
+            self.ring[sig] = (seq, slot)
+            self.seq = seq
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    def __contains__(self, sig: str) -> bool:
+        return sig in self.ring
+
+    def watermark(self) -> int:
+        """이 slot 이하는 전부 처리됨. 재시도 대기 중인 sig 가 있으면 그 slot 아래까지만."""
+        if self.deferred:
+            return min(self.low_slot, min(self.deferred.values()) - 1)
+        return self.low_slot
+
+    def is_new(self, sig: str, slot: int | None = None) -> bool:
+        if sig in self.ring:
+            return False
+        wm = self.watermark()
+        return not (slot and wm > 0 and slot <= wm)
+
+    def defer(self, sig: str, slot: int | None) -> None:
+        """아직 처리 못 한 sig. add() 될 때까지 watermark 가 이 slot 을 넘지 않는다."""
+        if not slot or sig in self.ring or self.deferred.get(sig) == slot:
+            return
+        self.deferred[sig] = slot
+        # 끝내 못 보는 sig 가 watermark 를 영영 붙잡지 않게 개수 제한 (가장 오래 기다린 것부터 버림)
+        while len(self.deferred) > self.capacity:
+            self.deferred.pop(next(iter(self.deferred)))
+        self.deferred_dirty = True
+
+    def add(self, sig: str, slot: int | None = None) -> None:
+        if self.deferred.pop(sig, None) is not None:
+            self.deferred_dirty = True
+        if sig in self.ring:
+            return
+        self.seq += 1
+        self.ring[sig] = (self.seq, slot or 0)
+        self.pending.append((self.scope, self.seq, sig, slot or 0))
+        while len(self.ring) > self.capacity:
+            _, (_, old_slot) = self.ring.popitem(last=False)
+            self.low_slot = max(self.low_slot, old_slot)
+
+    def flush(self) -> None:
+        if not self.pending and not self.deferred_dirty:
+            return
+        db = self.store.db
+        with db:
+            db.executemany("INSERT OR IGNORE INTO seen (scope, seq, signature, slot) VALUES (?, ?, ?, ?)", self.pending)
+            db.execute("DELETE FROM seen WHERE scope=? AND seq <= ?", (self.scope, self.seq - self.capacity))
+            db.execute("INSERT OR REPLACE INTO watermark (scope, low_slot) VALUES (?, ?)", (self.scope, self.low_slot))
+            if self.deferred_dirty:
+                # 보통 몇 개 안 되므로 scope 분량을 통째로 다시 쓴다
+                db.execute("DELETE FROM deferred WHERE scope=?", (self.scope,))
+                db.executemany("INSERT INTO deferred (scope, signature, slot) VALUES (?, ?, ?)",
+                               [(self.scope, sig, slot) for sig, slot in self.deferred.items()])
+        self.pending.clear()
+        self.deferred_dirty = False
+
+
+class SeenStore:
+    def __init__(self, path: Path = SEEN_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS seen (
+              scope TEXT NOT NULL,
+              seq INTEGER NOT NULL,
+              signature TEXT NOT NULL,
+              slot INTEGER NOT NULL,
+              PRIMARY KEY (scope, seq)
+            );
+            CREATE TABLE IF NOT EXISTS watermark (
+              scope TEXT PRIMARY KEY,
+              low_slot INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS deferred (
+              scope TEXT NOT NULL,
+              signature TEXT NOT NULL,
+              slot INTEGER NOT NULL,
+              PRIMARY KEY (scope, signature)
+            );
+            """
+        )
+        self.db.commit()
+        self.scopes: dict[str, SeenSet] = {}
+
+    def scope(self, scope: str, capacity: int = CAPACITY) -> SeenSet:
+        if scope not in self.scopes:
+            self.scopes[scope] = SeenSet(self, scope, capacity)
+        return self.scopes[scope]
+
+    def flush(self) -> None:
+        for s in self.scopes.values():
+            s.flush()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Per-address signature cursor + rolling net-flow window (SQLite).
+
+매 실행마다 tip 부터 since 까지 다시 훑지 않고,
+  - 이미 처리한 가장 새 sig 이후(`until=`)만 받아오고
+  - 창이 커졌을 때만 가장 오래된 처리 sig 이전(`before=`)으로 backfill 한다.
+(address, scope) 단위로 저장하며 scope 는 보통 mint.
+
+flow 테이블에는 tx 별 raw 정수 delta 를 쌓고, retention 보다 오래된 행은 blockTime 기준으로 지운다.
+창 집계는 남아있는 행으로 계산하므로 14d 리포트도 지갑당 한 페이지 정도로 끝난다.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from token_balances import deltas
+from tx_cache import get_transactions
+
+CURSOR_PATH = Path(os.getenv("SOLANA_CURSOR_DB", "/home/kspoopoo/.openclaw/workspace/state/solana_cursors.sqlite"))
+RETENTION_SEC = int(os.getenv("SOLANA_FLOW_RETENTION_DAYS", "14")) * 86400
+PAGE = 1000
+
+
+class CursorStore:
+    def __init__(self, path: Path = CURSOR_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cursor (
+              address TEXT NOT NULL,
+              scope TEXT NOT NULL,
+              newest_sig TEXT,
+              newest_bt INTEGER,
+              oldest_sig TEXT,
+              covered_from INTEGER,
+              complete INTEGER NOT NULL DEFAULT 0,
+              updated_at INTEGER,
+              PRIMARY KEY (address, scope)
+            );
+            CREATE TABLE IF NOT EXISTS flow (
+              address TEXT NOT NULL,
+              scope TEXT NOT NULL,
+              signature TEXT NOT NULL,
+              block_time INTEGER NOT NULL,
+              delta TEXT NOT NULL,
+              decimals INTEGER NOT NULL,
+              PRIMARY KEY (address, scope, signature)
+            );
+            CREATE INDEX IF NOT EXISTS flow_bt ON flow (address, scope, block_time);
+            """
+        )
+        self.db.commit()
+
+    def get(self, address: str, scope: str) -> dict | None:
+        row = self.db.execute(
+            "SELECT newest_sig, newest_bt, oldest_sig, covered_from, complete FROM cursor WHERE address=? AND scope=?",
+            (address, scope),
+        ).fetchone()
+        if not row:
+            return None
+        return dict(zip(("newest_sig", "newest_bt", "oldest_sig", "covered_from", "complete"), row))
+
+    def put(self, address: str, scope: str, cur: dict) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO cursor VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (address, scope, cur.get("newest_sig"), cur.get("newest_bt"), cur.get("oldest_sig"),
+             cur.get("covered_from"), int(bool(cur.get("complete"))), int(time.time())),
+        )
+        self.db.commit()
+
+    def add_flows(self, address: str, scope: str, rows) -> None:
+        """rows: (signature, block_time, raw_delta:int, decimals)"""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO flow VALUES (?, ?, ?, ?, ?, ?)",
+            [(address, scope, sig, bt, str(delta), dec) for sig, bt, delta, dec in rows],
+        )
+        self.db.commit()
+
+    def evict(self, address: str, scope: str, before_ts: int) -> None:
+        """before_ts 보다 오래된 flow 를 지우고, 창이 다시 커질 때 backfill 할 수 있게 cursor 를 당긴다."""
+        n = self.db.execute(
+            "DELETE FROM flow WHERE address=? AND scope=? AND block_time < ?", (address, scope, before_ts)
+        ).rowcount
+        cur = self.get(address, scope)
+        if n and cur:
+            oldest = self.db.execute(
+                "SELECT signature FROM flow WHERE address=? AND scope=? ORDER BY block_time ASC LIMIT 1",
+                (address, scope),
+            ).fetchone()
+            cur["oldest_sig"] = oldest[0] if oldest else cur["newest_sig"]
+            cur["covered_from"] = max(cur.get("covered_from") or 0, before_ts)
+            cur["complete"] = False
+            self.put(address, scope, cur)
+        self.db.commit()
+
+    def window(self, address: str, scope: str, since_ts: int) -> dict:
+        net = inflow = outflow = 0
+        count = 0
+        decimals = 0
+        for delta, dec in self.db.execute(
+            "SELECT delta, decimals FROM flow WHERE address=? AND scope=? AND block_time >= ?", (address, scope, since_ts)
+        ):
+            d = int(delta)
+            decimals = dec
+            count += 1
+            net += d
+            if d > 0:
+                inflow += d
+            else:
+                outflow -= d
+        return {"txCount": count, "net": net, "inflow": inflow, "outflow": outflow, "decimals": decimals}
+
+
+class SignatureWalk:
+    """
+    cursor 이후의 새 sig 와 (창이 커졌다면) since_ts 까지의 backfill sig 를 page 단위로 받는다.
+    state 는 JSON 으로 저장할 수 있어서 job_queue 에 넣어두고 중단된 page 부터 이어서 돌 수 있다.
+    step() 은 RPC 호출이 성공한 뒤에만 state 를 바꾸므로 예외가 나면 같은 page 를 다시 부르면 된다.
+    """
+
+    def __init__(self, address: str, cur: dict | None, since_ts: int, max_sigs: int, state: dict | None = None):
+        self.address = address
+        self.since_ts = since_ts
+        self.max_sigs = max_sigs
+        if state is None:
+            cur = dict(cur or {})
+            forward = bool(cur.get("newest_sig"))
+            state = {"phase": "forward" if forward else "backfill", "cur": cur, "new": dict(cur), "before": None,
+                     "fresh": 0, "n": 0, "oldest": None, "truncated": False}
+        self.state = state
+
+    @property
+    def done(self) -> bool:
+        return self.state["phase"] == "done"
+
+    @property
+    def cursor(self) -> dict:
+        """처리 성공 후 store.put() 할 새 cursor (실패 시 안 움직이면 다음에 다시 받음)."""
+        return self.state["new"]
+
+    @property
+    def truncated(self) -> bool:
+        return self.state["truncated"]
+
+    async def step(self, client) -> list[dict]:
+        st = self.state
+        if st["phase"] == "forward":
+            cfg = {"limit": PAGE, "until": st["cur"]["newest_sig"]}
+            if st["before"]:
+                cfg["before"] = st["before"]
+            arr = await client.call("getSignaturesForAddress", [self.address, cfg]) or []
+            if arr and not st["fresh"]:
+                st["new"].update(newest_sig=arr[0]["signature"], newest_bt=arr[0].get("blockTime") or 0)
+            st["fresh"] += len(arr)
+            if len(arr) < PAGE:
+                cur = st["cur"]
+                if not cur.get("complete") and (cur.get("covered_from") or 0) > self.since_ts:
+                    st.update(phase="backfill", before=cur.get("oldest_sig"))
+                else:
+                    st["phase"] = "done"
+            elif st["fresh"] >= self.max_sigs:
+                # 마지막 실행 이후 너무 많이 쌓임: 연속성을 포기하고 tip 부터 다시 시작
+                st["new"].update(oldest_sig=arr[-1]["signature"], covered_from=arr[-1].get("blockTime") or 0, complete=False)
+                st.update(phase="done", truncated=True)
+            else:
+                st["before"] = arr[-1]["signature"]
+            return arr
+
+        limit = min(PAGE, self.max_sigs - st["n"])
+        cfg = {"limit": limit}
+        if st["before"]:
+            cfg["before"] = st["before"]
+        arr = await client.call("getSignaturesForAddress", [self.address, cfg]) or []
+        out = []
+        reached = False
+        for a in arr:
+            bt = a.get("blockTime") or 0
+            if bt and bt < self.since_ts:
+                reached = True
+                break
+            out.append(a)
+        if out:
+            st["n"] += len(out)
+            st["oldest"] = {"signature": out[-1]["signature"], "blockTime": out[-1].get("blockTime") or 0}
+            if not st["new"].get("newest_sig"):
+                st["new"].update(newest_sig=out[0]["signature"], newest_bt=out[0].get("blockTime") or 0)
+        complete = not arr or (not reached and len(arr) < limit)
+        if arr:
+            st["before"] = arr[-1]["signature"]
+        if reached or complete or st["n"] >= self.max_sigs:
+            oldest = st["oldest"]
+            if oldest is not None:
+                st["new"]["oldest_sig"] = oldest["signature"]
+            st["new"]["covered_from"] = self.since_ts if (reached or complete) else ((oldest or {}).get("blockTime") or self.since_ts)
+            st["new"]["complete"] = complete
+            st.update(phase="done", truncated=not (reached or complete))
+        return out
+
+
+async def fetch_new_signatures(client, address: str, cur: dict | None, since_ts: int, max_sigs: int):
+    """
+    SignatureWalk 를 끝까지 돌린다.
+    returns: (sig entries newest-first, new cursor, truncated)
+    """
+    walk = SignatureWalk(address, cur, since_ts, max_sigs)
+    out = []
+    while not walk.done:
+        out.extend(await walk.step(client))
+    return out, walk.cursor, walk.truncated
+
+
+def record_flows(store: CursorStore, address: str, mint: str, txs: dict) -> None:
+    """sig -> compact tx 에서 address 의 mint 잔고 변화를 flow 로 쌓는다."""
+    rows = []
+    for sig, tx in txs.items():
+        if not tx:
+            continue
+        d = deltas(tx, mint, (address,)).get(address)
+        if d and d[0]:
+            rows.append((sig, tx["bt"], d[0], d[1]))
+    store.add_flows(address, mint, rows)
+
+
+def close_window(store: CursorStore, address: str, mint: str, since_ts: int, new_cur: dict | None) -> dict:
+    """cursor 를 전진(new_cur 가 None 이면 그대로)시키고 retention 밖을 지운 뒤 since_ts 창 집계."""
+    if new_cur is not None:
+        store.put(address, mint, new_cur)
+    now = int(time.time())
+    store.evict(address, mint, now - max(RETENTION_SEC, now - since_ts))
+    return store.window(address, mint, since_ts)
+
+
+async def sync_flows(client, store: CursorStore, address: str, mint: str, since_ts: int, max_sigs: int) -> dict:
+    """
+    새 sig 만 받아서 flow 테이블에 반영하고 since_ts 창 집계를 돌려준다 (raw 정수).
+    tx 조회 에러가 있으면 cursor 를 움직이지 않는다 (flow 는 signature PK 라 다시 넣어도 안전).
+    """
+    cur = store.get(address, mint)
+    sigs, new_cur, truncated = await fetch_new_signatures(client, address, cur, since_ts, max_sigs)
+    txs, tx_errors = await get_transactions(client, [s["signature"] for s in sigs])
+    record_flows(store, address, mint, txs)
+    w = close_window(store, address, mint, since_ts, None if tx_errors else new_cur)
+    w.update(sigsScanned=len(sigs), txErrors=tx_errors, truncated=truncated)
+    return w
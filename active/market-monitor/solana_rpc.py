@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Shared asyncio Solana JSON-RPC client.
+
+- await call(method, params): 단건 호출
+- await batch(calls): JSON-RPC 2.0 batch 배열로 묶어서 호출
+  - 응답은 id 로 원래 순서에 매핑
+  - 항목별 에러는 RPCError 인스턴스로 그 자리에 반환 (나머지는 정상 처리)
+  - batch 자체가 거절되면(413, 비배열 에러 응답 등) 반으로 쪼개서 재시도하고,
+    이후 batch 크기도 줄여서 같은 거절을 반복하지 않는다
+- provider 별 token bucket(rps/burst) + AIMD 동시성 제한
+  - 429 / -32429 이면 Retry-After 를 지키고(없으면 지수 backoff) 버킷 전체를 멈춘 뒤 동시성 절반
+- await stream(method, params, on_items): 큰 배열 응답(getProgramAccounts 등)을 받는 대로 파싱해서
+  chunk 단위로 on_items 에 넘긴다 (응답 전체를 메모리에 올리지 않음)
+- stats: calls / http / batches / splits / retries / throttled / throttle_s
+
+SOLANA_RPC_PROVIDER=public|helius 로 강제 지정 가능 (기본은 URL 로 추정),
+SOLANA_RPC_RPS / SOLANA_RPC_CONCURRENCY 로 덮어쓸 수 있다.
+SOLANA_RPC_RECORD=<path.jsonl> 이면 성공한 응답을 fixture 로 녹화한다 (rpc_fixtures / rpc_standin 참고).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+
+from json_stream import NotAnArray, iter_array
+from ratelimit import AdaptiveLimiter, TokenBucket
+
+BATCH_SIZE = int(os.getenv("SOLANA_RPC_BATCH", "50"))
+STREAM_CHUNK = 20_000
+STREAM_READ = 1 << 16
+RATE_LIMIT_CODES = (429, -32429)
+MAX_BACKOFF = 30.0
+
+PROVIDERS = {
+    # api.mainnet-beta.solana.com: 10s 당 100 req / method 당 40 정도
+    "public": {"rps": 4.0, "burst": 8, "concurrency": 4},
+    "helius": {"rps": 40.0, "burst": 40, "concurrency": 16},
+    "default": {"rps": 10.0, "burst": 10, "concurrency": 8},
+}
+
+
+class RPCError(RuntimeError):
+    def __init__(self, error):
+        self.error = error if isinstance(error, dict) else {"message": str(error)}
+        self.code = self.error.get("code")
+        super().__init__(str(error))
+
+
+class RateLimited(RPCError):
+    def __init__(self, error, retry_after: float | None = None):
+        super().__init__(error)
+        self.retry_after = retry_after
+
+
+class BatchRejected(Exception):
+    pass
+
+
+def detect_provider(url: str) -> str:
+    forced = os.getenv("SOLANA_RPC_PROVIDER", "").strip()
+    if forced:
+        return forced
+    if "helius" in url:
+        return "helius"
+    if "mainnet-beta.solana.com" in url:
+        return "public"
+    return "default"
+
+
+def _retry_after(headers) -> float | None:
+    v = (headers or {}).get("Retry-After")
+    try:
+        return float(v) if v is not None else None
+    except ValueError:
+        return None
+
+
+class RPCClient:
+    def __init__(self, url: str, timeout: float = 45, batch_size: int = BATCH_SIZE, retries: int = 8,
+                 provider: str | None = None):
+        self.url = url
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.retries = retries
+        self.provider = provider or detect_provider(url)
+        cfg = PROVIDERS.get(self.provider, PROVIDERS["default"])
+        rps = float(os.getenv("SOLANA_RPC_RPS", cfg["rps"]))
+        concurrency = int(os.getenv("SOLANA_RPC_CONCURRENCY", cfg["concurrency"]))
+        self.bucket = TokenBucket(rps, cfg["burst"])
+        self.limiter = AdaptiveLimiter(concurrency, maximum=concurrency)
+        self._session = None
+        record = os.getenv("SOLANA_RPC_RECORD", "").strip()
+        if record:
+            from rpc_fixtures import Recorder
+
+            self.recorder = Recorder(record)
+        else:
+            self.recorder = None
+        self.stats = {"calls": 0, "http": 0, "batches": 0, "splits": 0, "retries": 0, "throttled": 0, "throttle_s": 0.0}
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            s = requests.Session()
+            pool = max(10, self.limiter.maximum)
+            s.mount("https://", requests.adapters.HTTPAdapter(pool_connections=pool, pool_maxsize=pool))
+            s.mount("http://", requests.adapters.HTTPAdapter(pool_connections=pool, pool_maxsize=pool))
+            self._session = s
+        return self._session
+
+    def summary(self) -> str:
+        st = self.stats
+        return (
+            f"rpc provider={self.provider} calls={st['calls']} http={st['http']} batches={st['batches']} "
+            f"retries={st['retries']} throttled={st['throttled']} throttle_s={st['throttle_s']:.1f} "
+            f"concurrency={int(self.limiter.limit)}"
+        )
+
+    def _post_sync(self, body):
+        r = self.session.post(self.url, json=body, timeout=self.timeout)
+        if r.status_code == 429:
+            raise RateLimited({"code": 429, "message": "HTTP 429"}, _retry_after(r.headers))
+        if r.status_code == 413:
+            raise BatchRejected("HTTP 413")
+        return r.json()
+
+    async def _post(self, body):
+        # 요청 1건 = 토큰 1개 (batch 도 provider 는 항목 수로 센다)
+        await self.bucket.acquire(len(body) if isinstance(body, list) else 1)
+        async with self.limiter:
+            self.stats["http"] += 1
+            return await asyncio.to_thread(self._post_sync, body)
+
+    async def _throttle(self, attempt: int, retry_after: float | None):
+        delay = retry_after if retry_after is not None else min(MAX_BACKOFF, 0.5 * 2 ** attempt)
+        delay *= 1 + random.random() * 0.1
+        self.stats["throttled"] += 1
+        self.stats["throttle_s"] += delay
+        self.bucket.penalize(delay)
+        self.limiter.on_throttle()
+        await asyncio.sleep(delay)
+
+    async def call(self, method: str, params: list):
+        self.stats["calls"] += 1
+        return await self._call(method, params)
+
+    async def _call(self, method: str, params: list):
+        for i in range(self.retries):
+            retry_after = None
+            try:
+                j = await self._post({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+            except RateLimited as e:
+                j = {"error": e.error}
+                retry_after = e.retry_after
+            if "error" in j:
+                if (j["error"] or {}).get("code") in RATE_LIMIT_CODES:
+                    self.stats["retries"] += 1
+                    await self._throttle(i, retry_after)
+                    continue
+                raise RPCError(j["error"])
+            self.limiter.on_success()
+            if self.recorder:
+                self.recorder.record(method, params, j["result"])
+            return j["result"]
+        raise RateLimited({"code": 429, "message": "rate-limited"})
+
+    def _stream_sync(self, method: str, params: list, on_items, chunk: int) -> int:
+        body = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        with self.session.post(self.url, json=body, timeout=self.timeout, stream=True) as r:
+            if r.status_code == 429:
+                raise RateLimited({"code": 429, "message": "HTTP 429"}, _retry_after(r.headers))
+            n = 0
+            buf = []
+            try:
+                for item in iter_array(r.iter_content(STREAM_READ), "result"):
+                    buf.append(item)
+                    if len(buf) >= chunk:
+                        on_items(buf)
+                        n += len(buf)
+                        buf = []
+            except NotAnArray as e:
+                err = (e.doc or {}).get("error")
+                if err is None:
+                    return 0
+                if err.get("code") in RATE_LIMIT_CODES:
+                    raise RateLimited(err, _retry_after(r.headers))
+                raise RPCError(err)
+            if buf:
+                on_items(buf)
+                n += len(buf)
+            return n
+
+    async def stream(self, method: str, params: list, on_items, chunk: int = STREAM_CHUNK) -> int:
+        """result 배열을 chunk 개씩 on_items(list) 로 넘기고 총 항목 수를 돌려준다. on_items 는 worker thread 에서 불린다."""
+        self.stats["calls"] += 1
+        if self.recorder:
+            recorded = []
+            sink = on_items
+
+            def on_items(items):
+                recorded.extend(items)
+                sink(items)
+
+        for i in range(self.retries):
+            await self.bucket.acquire(1)
+            try:
+                async with self.limiter:
+                    self.stats["http"] += 1
+                    n = await asyncio.to_thread(self._stream_sync, method, params, on_items, chunk)
+            except RateLimited as e:
+                # 항목을 넘기기 전에만 나는 에러라 그대로 다시 요청해도 중복이 없다
+                self.stats["retries"] += 1
+                await self._throttle(i, e.retry_after)
+                continue
+            self.limiter.on_success()
+            if self.recorder:
+                self.recorder.record(method, params, recorded)
+            return n
+        raise RateLimited({"code": 429, "message": "rate-limited"})
+
+    async def _send_batch(self, calls: list[tuple[str, list]], ids: list[int]) -> dict:
+        self.stats["batches"] += 1
+        body = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in zip(ids, calls)]
+        j = await self._post(body)
+        if not isinstance(j, list):
+            # batch 미지원 / 크기 초과 등은 배열이 아닌 단일 에러로 온다
+            err = (j or {}).get("error") or {}
+            if err.get("code") in RATE_LIMIT_CODES:
+                raise RateLimited(err)
+            raise BatchRejected(err)
+        return {x.get("id"): x for x in j}
+
+    async def _run_chunk(self, calls, ids, out):
+        if len(calls) == 1:
+            try:
+                out[ids[0]] = await self._call(*calls[0])
+            except RPCError as e:
+                out[ids[0]] = e
+            return
+        try:
+            by_id = await self._send_batch(calls, ids)
+        except BatchRejected:
+            self.stats["splits"] += 1
+            half = len(calls) // 2
+            self.batch_size = max(1, min(self.batch_size, half))
+            await self._run_chunk(calls[:half], ids[:half], out)
+            await self._run_chunk(calls[half:], ids[half:], out)
+            return
+        except RateLimited as e:
+            for i in ids:
+                out[i] = e
+            return
+        throttled = False
+        for call, i in zip(calls, ids):
+            x = by_id.get(i)
+            if x is None:
+                out[i] = RPCError({"message": "missing response"})
+            elif "error" in x:
+                rate_limited = (x["error"] or {}).get("code") in RATE_LIMIT_CODES
+                throttled |= rate_limited
+                out[i] = (RateLimited if rate_limited else RPCError)(x["error"])
+            else:
+                out[i] = x.get("result")
+                if self.recorder:
+                    self.recorder.record(*call, out[i])
+        if not throttled:
+            self.limiter.on_success()
+
+    async def batch(self, calls: list[tuple[str, list]], batch_size: int | None = None) -> list:
+        """calls 순서대로 결과(또는 RPCError)를 돌려준다. chunk 들은 동시성 제한 안에서 병렬로 보낸다."""
+        out: dict[int, object] = {}
+        pending = list(range(len(calls)))
+        self.stats["calls"] += len(calls)
+        for attempt in range(self.retries):
+            if not pending:
+                break
+            if attempt:
+                self.stats["retries"] += len(pending)
+                retry_after = max((out[i].retry_after or 0 for i in pending), default=0) or None
+                await self._throttle(attempt - 1, retry_after)
+            size = max(1, batch_size or self.batch_size)
+            chunks = [pending[k:k + size] for k in range(0, len(pending), size)]
+            await asyncio.gather(*(self._run_chunk([calls[i] for i in ids], ids, out) for ids in chunks))
+            # rate limit 걸린 항목만 다음 라운드에서 다시
+            pending = [i for i in pending if isinstance(out.get(i), RateLimited)]
+        return [out.get(i) for i in range(len(calls))]
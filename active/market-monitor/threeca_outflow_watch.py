@@ -1,33 +1,70 @@
 #!/usr/bin/env python3
+"""
+3ca 지갑 PENGUIN 대량 유출 감시 (--rules 로 여러 지갑/규칙, outflow_rules 참고).
+
+- 기본(cron 1회): sig cursor 이후(`until=`) 새 sig 를 전부 받아서 평가 (한 번에 25개 제한 없음)
+- 감시 주소 = 규칙의 지갑 + 그 지갑의 (규칙 mint) token account (getTokenAccountsByOwner).
+  SPL 입금은 owner 지갑을 안 건드리고 token account 만 mention 하므로 지갑만 보면 유입을 놓친다
+- --stream: websocket logsSubscribe(mentions=감시 주소) 로 알림 온 sig 만 바로 받아서 평가
+  - 연결/재연결 직후와 THREECA_GAP_FILL_SEC 마다 cursor 기준 gap-fill (끊긴 동안/유실된 알림 보충)
+  - SOLANA_WS_URL (없으면 SOLANA_RPC_URL 의 http(s) → ws(s)), websockets 패키지 필요
+
+Usage:
+  python3 threeca_outflow_watch.py
+  python3 threeca_outflow_watch.py --stream
+  python3 threeca_outflow_watch.py --rules outflow_rules.example.json --stream
+"""
+
+import argparse
+import asyncio
 import json
+import os
 import subprocess
+import sys
 import time
 from pathlib import Path
 
-import requests
+from outflow_rules import Rule, RuleEngine, describe, load_rules
+from seen_store import SeenStore
+from sig_cursor import CursorStore, fetch_new_signatures
+from solana_rpc import RPCClient, RPCError
+from tx_cache import get_transactions
 
-RPC = "https://mainnet.helius-rpc.com/?api-key=5073f9a7-2c12-4d66-b2c7-74246ee06129"
+RPC = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
 MINT = "8Jx8AAHj86wbQgUTjGuj6GTTL5Ps3cqxKRTvpaJApump"
 OWNER = "3caFdfwp2LQ93cTENzGm7T7SRSZHXiuWTB22gDQ2UBSy"
-THRESHOLD = 300_000.0
-STATE = Path("/home/kspoopoo/.openclaw/workspace/state/threeca_outflow_watch.json")
+THRESHOLD = 300_000
+# 예전 seen 목록(json). 처음 한 번 seen_store 로 옮겨오는 데만 쓴다
+STATE = Path(os.getenv("THREECA_STATE", "/home/kspoopoo/.openclaw/workspace/state/threeca_outflow_watch.json"))
 OPENCLAW_BIN = "node /home/kspoopoo/openclaw/dist/index.js"
 TARGET = "497612383"
+# cursor 는 (감시 주소, SCOPE), seen 은 f"{SCOPE}:<지갑>" 단위 (규칙과 무관)
+SCOPE = "outflow_watch"
+# cursor 가 없을 때(첫 실행) 거슬러 볼 구간과, 한 번에 받을 sig 상한
+LOOKBACK = int(os.getenv("THREECA_LOOKBACK", "3600"))
+MAX_SIGS = int(os.getenv("THREECA_MAX_SIGS", "5000"))
+GAP_FILL_SEC = float(os.getenv("THREECA_GAP_FILL_SEC", "300"))
+# 알림이 몰려오면 이만큼 모아서 한 batch 로 getTransaction
+STREAM_BATCH_WAIT = 0.2
+STREAM_RETRIES = 5
 
-s = requests.Session()
 
+def ws_url(url: str) -> str:
+    if url.startswith("https://"):
+        return "wss://" + url[len("https://"):]
+    if url.startswith("http://"):
+        return "ws://" + url[len("http://"):]
+    return url
 
-def rpc(method: str, params: list):
-    for i in range(8):
-        j = s.post(RPC, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params}, timeout=45).json()
-        if "error" in j:
-            code = (j["error"] or {}).get("code")
-            if code in (429, -32429):
-                time.sleep(0.2 * (i + 1))
-                continue
-            raise RuntimeError(j["error"])
-        return j["result"]
-    raise RuntimeError("rpc rate-limited")
+
+WS = os.getenv("SOLANA_WS_URL") or ws_url(RPC)
+
+client = RPCClient(RPC, timeout=45)
+cursors = CursorStore()
+
+
+async def rpc(method, params):
+    return await client.call(method, params)
 
 
 def load_state():
@@ -39,27 +76,6 @@ def load_state():
         return {"seen": []}
 
 
-def save_state(st):
-    STATE.parent.mkdir(parents=True, exist_ok=True)
-    STATE.write_text(json.dumps(st, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
-def owner_delta(tx: dict) -> float:
-    pre = (tx.get("meta") or {}).get("preTokenBalances") or []
-    post = (tx.get("meta") or {}).get("postTokenBalances") or []
-    pa = po = 0.0
-    touched = False
-    for b in pre:
-        if b.get("mint") == MINT and b.get("owner") == OWNER:
-            pa += float((b.get("uiTokenAmount") or {}).get("uiAmount") or 0)
-            touched = True
-    for b in post:
-        if b.get("mint") == MINT and b.get("owner") == OWNER:
-            po += float((b.get("uiTokenAmount") or {}).get("uiAmount") or 0)
-            touched = True
-    return (po - pa) if touched else 0.0
-
-
 def send(msg: str):
     subprocess.run(
         f"{OPENCLAW_BIN} message send --channel telegram --target {TARGET} --message {json.dumps(msg)}",
@@ -68,36 +84,253 @@ def send(msg: str):
     )
 
 
-def main():
-    st = load_state()
-    seen = set(st.get("seen", []))
+def default_rules() -> list[Rule]:
+    return [Rule("3ca 대량 유출", OWNER, MINT, "out", THRESHOLD, 0, "PENGUIN")]
+
+
+class Watcher:
+    def __init__(self, engine: RuleEngine):
+        self.engine = engine
+        self.store = SeenStore()
+        # 지갑마다 ring + watermark 를 따로 둔다. 한 지갑의 cursor 가 밀리거나 새로 추가된 지갑을 back-fill 해도
+        # 다른 지갑에서 올라간 watermark 에 묻히지 않게
+        self.seen = {w: self.store.scope(f"{SCOPE}:{w}") for w in engine.wallets}
+        # 지갑별로 나누기 전의 전역 scope. 포함 여부로만 본다 (watermark 는 안 씀)
+        self.legacy = self.store.scope(SCOPE)
+        if not len(self.legacy):
+            for sig in load_state().get("seen", []):
+                self.legacy.add(sig)
+            self.legacy.flush()
+        # gap-fill 과 stream 처리가 같은 sig 를 동시에 평가해서 두 번 알리지 않게
+        self.lock = asyncio.Lock()
+        # (wallet, mint) -> token account 목록
+        self.token_accounts: dict[tuple[str, str], list[str]] = {}
+
+    async def resolve_token_accounts(self) -> None:
+        """
+        규칙의 (wallet, mint) 마다 token account 를 찾아 둔다 (batch 한 번).
+        조회가 실패한 쌍은 직전 값을 유지하고, 새로 생긴 계정(첫 입금으로 ATA 생성 등)은 다음 호출 때 붙는다.
+        """
+        pairs = sorted({(r.wallet, r.mint) for r in self.engine.rules})
+        res = await client.batch([
+            ("getTokenAccountsByOwner", [wallet, {"mint": mint}, {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}])
+            for wallet, mint in pairs
+        ])
+        for pair, r in zip(pairs, res):
+            if isinstance(r, RPCError):
+                print(f"token account 조회 실패 {pair[0][:6]}/{pair[1][:6]}: {r}", file=sys.stderr)
+                continue
+            self.token_accounts[pair] = sorted(a["pubkey"] for a in (r or {}).get("value") or [])
+
+    @property
+    def addresses(self) -> list[str]:
+        """sig 를 받아볼 주소: 지갑 + token account. cursor 는 주소마다 따로 둔다."""
+        return list(dict.fromkeys([*self.engine.wallets, *(a for accs in self.token_accounts.values() for a in accs)]))
+
+    def wallet_of(self, address: str) -> str:
+        """감시 주소 → 그 주소가 속한 규칙 지갑."""
+        for (wallet, _), accs in self.token_accounts.items():
+            if address in accs:
+                return wallet
+        return address
+
+    def is_new(self, sig: str, slot: int | None, wallets) -> bool:
+        """어느 지갑 ring 에도 없고, 이 sig 가 잡힌 지갑 중 하나라도 watermark 아래가 아니면 새 것."""
+        if sig in self.legacy or any(sig in seen for seen in self.seen.values()):
+            return False
+        return any(self.seen[w].is_new(sig, slot) for w in wallets)
+
+    async def process(self, sigs: list[tuple[str, int | None, str]],
+                      commitment: str | None = None) -> list[tuple[str, int | None, str]]:
+        """
+        (sig, slot, 잡힌 지갑) 들을 평가하고 알림. 아직 못 본(RPC 에러/미확정) 것을 돌려준다.
+        여러 지갑에 걸친 tx 도 sig 기준으로 한 번만 받아서 그 tx 에 등장한 모든 지갑의 규칙으로 평가하고,
+        seen 에는 그 sig 가 잡힌 지갑마다 넣는다.
+        """
+        found: dict[str, tuple[int | None, set[str]]] = {}
+        for sig, slot, wallet in sigs:
+            found.setdefault(sig, (slot, set()))[1].add(wallet)
+        found = {s: v for s, v in found.items() if self.is_new(s, v[0], v[1])}
+        if not found:
+            return []
+        txs, _ = await get_transactions(client, list(found), commitment=commitment)
+        alerts = []
+        retry = []
+        async with self.lock:
+            for sig, (slot, wallets) in found.items():
+                if not self.is_new(sig, slot, wallets):
+                    continue
+                tx = txs.get(sig)
+                if not tx:
+                    # RPC 에러 / 아직 조회 불가: 다음에 다시 본다 (seen 에 넣지 않고, watermark 가 넘어가지 않게 보류로 표시)
+                    for w in wallets:
+                        retry.append((sig, slot, w))
+                        self.seen[w].defer(sig, slot)
+                    continue
+                for rule, amount, total in self.engine.evaluate(sig, tx):
+                    alerts.append((tx.get("bt") or 0, rule, amount, total, sig))
+                for w in wallets:
+                    self.seen[w].add(sig, tx.get("slot") or slot)
+
+            if alerts:
+                alerts.sort(key=lambda x: x[0])
+                lines = ["🚨 지갑 흐름 감지"]
+                for _, rule, amount, total, sig in alerts:
+                    acc = f" (누적 {total:,.0f})" if rule.window else ""
+                    lines.append(f"- {describe(rule)}: {amount:,.0f}{acc} | sig: {sig[:12]}...")
+                await asyncio.to_thread(send, "\n".join(lines))
+            self.engine.flush()
+            self.store.flush()
+        return retry
+
+    async def gap_fill(self) -> int:
+        """
+        감시 주소(지갑 + token account)별 cursor(마지막으로 다 처리한 sig) 이후를 until= 로 받아서 합친 뒤 한 번에 처리.
+        못 본 게 남은 주소는 cursor 를 그대로 둔다.
+        """
+        await self.resolve_token_accounts()
+        since = int(time.time()) - LOOKBACK
+
+        async def walk(address):
+            entries, new_cur, truncated = await fetch_new_signatures(client, address, cursors.get(address, SCOPE), since, MAX_SIGS)
+            if truncated:
+                print(f"gap-fill {address[:6]}: sig {len(entries)}개 초과로 잘림 (THREECA_MAX_SIGS), 그 이전은 건너뜀", file=sys.stderr)
+            # 실패한 tx 는 잔고가 안 바뀐다
+            wallet = self.wallet_of(address)
+            sigs = [(e["signature"], e.get("slot"), wallet) for e in reversed(entries) if e.get("err") is None]
+            return address, sigs, new_cur
+
+        walks = await asyncio.gather(*(walk(a) for a in self.addresses))
+        union = [x for _, sigs, _ in walks for x in sigs]
+        retry = {s for s, _, _ in await self.process(union)}
+        for address, sigs, new_cur in walks:
+            if not any(s in retry for s, _, _ in sigs):
+                cursors.put(address, SCOPE, new_cur)
+        return len({s for s, _, _ in union})
 
-    sigs = rpc("getSignaturesForAddress", [OWNER, {"limit": 25}])
-    alerts = []
 
-    for sg in sigs:
-        sig = sg.get("signature")
-        if not sig or sig in seen:
-            continue
-        tx = rpc("getTransaction", [sig, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}])
-        if not tx:
-            continue
-        d = owner_delta(tx)
-        if d <= -THRESHOLD:
-            bt = sg.get("blockTime") or 0
-            alerts.append((sig, bt, d))
-        seen.add(sig)
+async def main(engine: RuleEngine):
+    await Watcher(engine).gap_fill()
 
-    if alerts:
-        alerts.sort(key=lambda x: x[1])
-        lines = ["🚨 3ca 대량 유출 감지"]
-        for sig, bt, d in alerts:
-            lines.append(f"- {d:,.0f} PENGUIN | sig: {sig[:12]}...")
-        send("\n".join(lines))
 
-    st["seen"] = list(seen)[-400:]
-    save_state(st)
+async def stream(engine: RuleEngine):
+    try:
+        from websockets.asyncio.client import connect
+    except ImportError:
+        print("--stream 은 websockets 패키지가 필요합니다 (pip install websockets)", file=sys.stderr)
+        return 2
+
+    w = Watcher(engine)
+    queue: asyncio.Queue = asyncio.Queue()
+    # 지금 연결에서 구독 중인 주소. gap-fill 에서 token account 가 바뀌면 연결을 끊어서 다시 구독한다
+    live = {"ws": None, "addresses": []}
+
+    async def fill():
+        await w.gap_fill()
+        if live["ws"] is not None and set(w.addresses) != set(live["addresses"]):
+            print("token account 변경, 다시 구독", file=sys.stderr)
+            await live["ws"].close()
+
+    async def consume():
+        tries: dict[str, int] = {}
+        while True:
+            batch = {}
+            item = await queue.get()
+            batch[item[:3]] = item[3]
+            await asyncio.sleep(STREAM_BATCH_WAIT)
+            while not queue.empty():
+                item = queue.get_nowait()
+                batch.setdefault(item[:3], item[3])
+            try:
+                retry = set(await w.process(list(batch), commitment="confirmed"))
+            except Exception as e:
+                print(f"stream process error: {e}", file=sys.stderr)
+                retry = set(batch)
+            for (sig, slot, wallet), t0 in batch.items():
+                if (sig, slot, wallet) not in retry:
+                    tries.pop(sig, None)
+                    print(f"{sig[:12]}... evaluated in {time.monotonic() - t0:.2f}s", file=sys.stderr)
+                elif tries.get(sig, 0) < STREAM_RETRIES:
+                    # 알림 직후엔 RPC 노드에 아직 tx 가 없을 수 있다
+                    tries[sig] = tries.get(sig, 0) + 1
+                    asyncio.get_running_loop().call_later(tries[sig], queue.put_nowait, (sig, slot, wallet, t0))
+                else:
+                    # 나머지는 다음 gap-fill 이 cursor 기준으로 다시 잡는다
+                    tries.pop(sig, None)
+
+    async def periodic():
+        while True:
+            await asyncio.sleep(GAP_FILL_SEC)
+            try:
+                await fill()
+            except Exception as e:
+                print(f"gap-fill error: {e}", file=sys.stderr)
+
+    tasks = [asyncio.create_task(consume()), asyncio.create_task(periodic())]
+    backoff = 1.0
+    try:
+        while True:
+            try:
+                if not w.token_accounts:
+                    await w.resolve_token_accounts()
+                addresses = w.addresses
+                async with connect(WS, ping_interval=20, max_size=None) as ws:
+                    live.update(ws=ws, addresses=addresses)
+                    # logsSubscribe 는 mentions 에 주소 하나만 받으므로 주소마다 구독 (연결은 하나)
+                    for i, address in enumerate(addresses, 1):
+                        await ws.send(json.dumps({"jsonrpc": "2.0", "id": i, "method": "logsSubscribe",
+                                                  "params": [{"mentions": [address]}, {"commitment": "confirmed"}]}))
+                    # 구독이 다 잡힌 뒤에 gap-fill 해야 그 사이에 난 tx 를 놓치지 않는다
+                    pending = set(range(1, len(addresses) + 1))
+                    # subscription id -> 규칙 지갑 (알림이 어느 지갑 것인지)
+                    subs: dict[int, str] = {}
+                    filling = None
+                    async for raw in ws:
+                        msg = json.loads(raw)
+                        if msg.get("id") in pending:
+                            if "error" in msg:
+                                raise RuntimeError(f"logsSubscribe: {msg['error']}")
+                            pending.discard(msg["id"])
+                            subs[msg["result"]] = w.wallet_of(addresses[msg["id"] - 1])
+                            if not pending:
+                                print(f"subscribed {len(addresses)} addresses ({len(w.engine.wallets)} wallets) via {WS.split('?')[0]}",
+                                      file=sys.stderr)
+                                backoff = 1.0
+                                filling = asyncio.create_task(fill())
+                            continue
+                        if msg.get("method") != "logsNotification":
+                            continue
+                        result = msg["params"]["result"]
+                        wallet = subs.get(msg["params"].get("subscription"))
+                        if wallet is not None and result["value"].get("err") is None:
+                            slot = (result.get("context") or {}).get("slot")
+                            queue.put_nowait((result["value"]["signature"], slot, wallet, time.monotonic()))
+                    if filling is not None:
+                        await filling
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"websocket closed ({e}); reconnect in {backoff:.0f}s", file=sys.stderr)
+            else:
+                print(f"websocket closed; reconnect in {backoff:.0f}s", file=sys.stderr)
+            live["ws"] = None
+            await asyncio.sleep(backoff)
+            backoff = min(30.0, backoff * 2)
+    finally:
+        for t in tasks:
+            t.cancel()
 
 
 if __name__ == "__main__":
-    main()
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stream", action="store_true", help="websocket 으로 실시간 감시 (재연결 시 gap-fill)")
+    ap.add_argument("--rules", default=os.getenv("OUTFLOW_RULES"), help="규칙 json (없으면 3ca 단일 규칙)")
+    args = ap.parse_args()
+    engine = RuleEngine(load_rules(args.rules) if args.rules else default_rules())
+    if args.stream:
+        raise SystemExit(asyncio.run(stream(engine)))
+    asyncio.run(main(engine))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Append-only on-disk time series for market polls + O(1) rolling statistics.
+
+저장:
+  - tier 별 고정 크기 ring buffer 파일 (header + capacity x 40 byte row, struct 로 직접 read/write)
+  - raw(매 poll) → 1h → 1d 로 bucket 이 바뀔 때 직전 bucket 의 마지막 row(close)를 다음 tier 에 append
+  - capacity 가 고정이라 디스크 사용량은 (raw 2016 + 1h 2160 + 1d 3650) x 40 byte ≈ 310 KB 로 고정
+  - row 를 먼저 쓰고 header 의 count 를 나중에 올리므로 중간에 죽어도 깨진 row 는 안 보인다
+
+통계 (push 당 amortized O(1)):
+  - RollingMinMax: monotonic deque 로 window 내 min/max
+  - EMA: 시간 간격을 반영한 지수이동평균 (tau 초)
+  - RollingMoments: window 내 합/제곱합으로 평균/표준편차
+  - RollingStats: 가격 변화율 / 변동성(log return std) / EMA / 유동성 peak 대비 drawdown 을 한 번에
+
+Usage:
+  python timeseries.py                 # tier 별 row 수, 최근 1h / 24h 통계
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import struct
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
+TS_DIR = Path(os.getenv("PENGUIN_TS_DIR", "/home/kspoopoo/.openclaw/workspace/state/penguin_ts"))
+# (이름, bucket 초, capacity). raw 는 5분 poll 기준 7일
+TIERS = (("raw", 0, 2016), ("1h", 3600, 2160), ("1d", 86400, 3650))
+
+
+class Sample(NamedTuple):
+    ts: int
+    price: float
+    liq: float
+    vol_h1: float
+    buys_h1: int
+    sells_h1: int
+
+
+class Ring:
+    HEADER = struct.Struct("<4sIIQ")  # magic, row size, capacity, appended count
+    ROW = struct.Struct("<qdddii")
+    MAGIC = b"PTS1"
+
+    def __init__(self, path: Path, capacity: int):
+        self.path = path
+        if not path.exists() or path.stat().st_size < self.HEADER.size:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.ROW.size, capacity, 0))
+                f.truncate(self.HEADER.size + capacity * self.ROW.size)
+        self.f = path.open("r+b")
+        magic, row_size, self.capacity, self.count = self.HEADER.unpack(self.f.read(self.HEADER.size))
+        if magic != self.MAGIC or row_size != self.ROW.size:
+            raise ValueError(f"{path}: not a time series ring")
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def close(self) -> None:
+        self.f.close()
+
+    def append(self, row: Sample) -> None:
+        slot = self.count % self.capacity
+        self.f.seek(self.HEADER.size + slot * self.ROW.size)
+        self.f.write(self.ROW.pack(*row))
+        self.count += 1
+        self.f.seek(0)
+        self.f.write(self.HEADER.pack(self.MAGIC, self.ROW.size, self.capacity, self.count))
+        self.f.flush()
+
+    def rows(self) -> list[Sample]:
+        """오래된 것부터."""
+        n = len(self)
+        if not n:
+            return []
+        self.f.seek(self.HEADER.size)
+        buf = self.f.read(self.capacity * self.ROW.size)
+        start = self.count % self.capacity if self.count > self.capacity else 0
+        order = list(range(start, n)) + list(range(0, start))
+        size = self.ROW.size
+        return [Sample(*self.ROW.unpack_from(buf, i * size)) for i in order]
+
+    def last(self) -> Sample | None:
+        if not self.count:
+            return None
+        self.f.seek(self.HEADER.size + (self.count - 1) % self.capacity * self.ROW.size)
+        return Sample(*self.ROW.unpack(self.f.read(self.ROW.size)))
+
+
+class TimeSeries:
+    def __init__(self, root: Path = TS_DIR, tiers=TIERS):
+        self.tiers = [(name, bucket, Ring(root / f"{name}.bin", cap)) for name, bucket, cap in tiers]
+
+    def close(self) -> None:
+        for _, _, ring in self.tiers:
+            ring.close()
+
+    def append(self, row: Sample) -> None:
+        raw = self.tiers[0][2]
+        prev = raw.last()
+        raw.append(row)
+        if prev is None:
+            return
+        for _, bucket, ring in self.tiers[1:]:
+            if prev.ts // bucket != row.ts // bucket:
+                ring.append(prev)
+
+    def span(self, name: str) -> int:
+        ring = dict((n, r) for n, _, r in self.tiers)[name]
+        rows = ring.rows()
+        return rows[-1].ts - rows[0].ts if len(rows) > 1 else 0
+
+    def window(self, seconds: int, now: int | None = None, granularity: str | None = None) -> list[Sample]:
+        """
+        최근 seconds 구간 row. granularity 를 안 주면 그 구간을 덮는 가장 촘촘한 tier 를 쓴다.
+        raw 가 아닌 tier 에는 진행 중인 bucket 이 아직 없으므로 raw 의 마지막 row 를 붙여준다.
+        """
+        latest = self.tiers[0][2].last()
+        if latest is None:
+            return []
+        end = now or latest.ts
+        best: list[Sample] = []
+        for name, _, ring in self.tiers:
+            if granularity and name != granularity:
+                continue
+            rows = ring.rows()
+            if not rows:
+                continue
+            if latest.ts > rows[-1].ts:
+                rows.append(latest)
+            if not best or rows[0].ts < best[0].ts:
+                best = rows
+            if rows[0].ts <= end - seconds:
+                break
+        # 어느 tier 도 창을 다 못 덮으면 가장 오래 전까지 있는 tier 를 쓴다
+        return [r for r in best if r.ts >= end - seconds]
+
+
+class RollingMinMax:
+    def __init__(self, window: float):
+        self.window = window
+        self.lo: deque = deque()
+        self.hi: deque = deque()
+
+    def push(self, ts: float, v: float) -> None:
+        while self.lo and self.lo[-1][1] >= v:
+            self.lo.pop()
+        while self.hi and self.hi[-1][1] <= v:
+            self.hi.pop()
+        self.lo.append((ts, v))
+        self.hi.append((ts, v))
+        cut = ts - self.window
+        while self.lo[0][0] < cut:
+            self.lo.popleft()
+        while self.hi[0][0] < cut:
+            self.hi.popleft()
+
+    @property
+    def min(self) -> float:
+        return self.lo[0][1] if self.lo else math.nan
+
+    @property
+    def max(self) -> float:
+        return self.hi[0][1] if self.hi else math.nan
+
+
+class EMA:
+    def __init__(self, tau: float):
+        self.tau = tau
+        self.value = math.nan
+        self.ts = None
+
+    def push(self, ts: float, v: float) -> float:
+        if self.ts is None:
+            self.value = v
+        else:
+            a = 1 - math.exp(-max(0.0, ts - self.ts) / self.tau)
+            self.value += a * (v - self.value)
+        self.ts = ts
+        return self.value
+
+
+class RollingMoments:
+    def __init__(self, window: float):
+        self.window = window
+        self.q: deque = deque()
+        self.s = 0.0
+        self.ss = 0.0
+
+    def push(self, ts: float, v: float) -> None:
+        self.q.append((ts, v))
+        self.s += v
+        self.ss += v * v
+        cut = ts - self.window
+        while self.q and self.q[0][0] < cut:
+            _, old = self.q.popleft()
+            self.s -= old
+            self.ss -= old * old
+
+    @property
+    def n(self) -> int:
+        return len(self.q)
+
+    @property
+    def mean(self) -> float:
+        return self.s / self.n if self.n else math.nan
+
+    @property
+    def std(self) -> float:
+        if self.n < 2:
+            return math.nan
+        var = (self.ss - self.s * self.s / self.n) / (self.n - 1)
+        return math.sqrt(max(0.0, var))
+
+
+class RollingStats:
+    """window 초 구간의 가격/유동성 통계. --interval 모드에서는 객체를 유지하며 poll 마다 push."""
+
+    def __init__(self, window: float, ema_tau: float | None = None):
+        self.window = window
+        self.first: deque = deque()
+        self.price = RollingMinMax(window)
+        self.liq = RollingMinMax(window)
+        self.ret = RollingMoments(window)
+        self.ema = EMA(ema_tau or window / 2)
+        self.last: Sample | None = None
+
+    def push(self, s: Sample) -> None:
+        if self.last and self.last.price > 0 and s.price > 0:
+            self.ret.push(s.ts, math.log(s.price / self.last.price))
+        self.first.append((s.ts, s.price))
+        while self.first[0][0] < s.ts - self.window:
+            self.first.popleft()
+        self.price.push(s.ts, s.price)
+        self.liq.push(s.ts, s.liq)
+        self.ema.push(s.ts, s.price)
+        self.last = s
+
+    @property
+    def covered(self) -> float:
+        """실제로 창 안에 있는 데이터 구간(초). 창보다 많이 짧으면 변화율을 믿기 어렵다."""
+        return self.last.ts - self.first[0][0] if self.last else 0.0
+
+    @property
+    def change_pct(self) -> float:
+        p0 = self.first[0][1] if self.first else 0.0
+        return (self.last.price / p0 - 1) * 100 if self.last and p0 > 0 else math.nan
+
+    @property
+    def volatility_pct(self) -> float:
+        return self.ret.std * 100
+
+    @property
+    def liq_drawdown_pct(self) -> float:
+        peak = self.liq.max
+        return (self.last.liq / peak - 1) * 100 if self.last and peak and peak > 0 else math.nan
+
+    def summary(self) -> dict:
+        return {
+            "window_s": self.window,
+            "covered_s": self.covered,
+            "change_pct": self.change_pct,
+            "min": self.price.min,
+            "max": self.price.max,
+            "ema": self.ema.value,
+            "volatility_pct": self.volatility_pct,
+            "liq_drawdown_pct": self.liq_drawdown_pct,
+        }
+
+
+def rolling(rows, window: float, ema_tau: float | None = None) -> RollingStats:
+    st = RollingStats(window, ema_tau)
+    for r in rows:
+        st.push(r)
+    return st
+
+
+if __name__ == "__main__":
+    ts = TimeSeries()
+    for name, _, ring in ts.tiers:
+        print(f"{name}: rows={len(ring)}/{ring.capacity} appended={ring.count} span={ts.span(name) / 3600:.1f}h")
+    for label, sec in (("1h", 3600), ("24h", 86400)):
+        st = rolling(ts.window(sec), sec)
+        print(label, {k: round(v, 4) if isinstance(v, float) else v for k, v in st.summary().items()})
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Token balance delta extraction from getTransaction meta.
+
+- compact_balances(): pre/postTokenBalances -> [TokenBalance(owner, mint, raw amount(int), decimals)]
+  (NamedTuple 이라 json 으로는 배열로 저장되고, tx_cache 에서 읽은 list 도 같은 순서로 풀면 된다)
+- deltas(): tx 한 번 훑어서 여러 owner 의 raw 잔고 변화를 한꺼번에 계산
+- 합산은 raw 정수로만 하고, 화면/리포트에 찍을 때만 ui() 로 나눈다 (float uiAmount 누적 오차 없음)
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+
+class TokenBalance(NamedTuple):
+    owner: str
+    mint: str
+    amount: int
+    decimals: int
+
+
+def compact_balances(balances) -> list[TokenBalance]:
+    out = []
+    for b in balances or []:
+        amt = b.get("uiTokenAmount") or {}
+        out.append(TokenBalance(b.get("owner") or "", b.get("mint") or "", int(amt.get("amount") or 0), int(amt.get("decimals") or 0)))
+    return out
+
+
+def deltas(tx: dict, mint: str, owners=None) -> dict[str, tuple[int, int]]:
+    """
+    compact tx -> {owner: (raw_delta, decimals)}. 해당 mint 잔고가 pre/post 어디에도 없는 owner 는 빠진다.
+    owners 가 None 이면 tx 에 등장하는 모든 owner.
+    """
+    out: dict[str, tuple[int, int]] = {}
+    for sign, side in ((-1, tx["pre"]), (1, tx["post"])):
+        for owner, m, amount, dec in side:
+            if m != mint or (owners is not None and owner not in owners):
+                continue
+            d = out.get(owner)
+            out[owner] = ((d[0] if d else 0) + sign * amount, dec)
+    return out
+
+
+def ui(raw: int, decimals: int) -> float:
+    return raw / 10 ** decimals
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Persistent getTransaction cache keyed by signature (SQLite).
+
+확정된 트랜잭션은 바뀌지 않으므로 한 번 받은 건 다시 받지 않는다.
+전체 응답 대신 우리가 쓰는 필드만 저장 (token_balances.TokenBalance 순서):
+  {"bt": blockTime, "slot": slot, "err": bool,
+   "pre":  [[owner, mint, raw_amount(int), decimals], ...],
+   "post": [[owner, mint, raw_amount(int), decimals], ...]}
+null 응답(아직 조회 불가/없는 sig)은 NEG_TTL 동안만 negative 캐시. finalized 가 아닌 commitment 로 받은 결과는 저장하지 않는다.
+
+penguin_14d_analysis / penguin_top20_flow / threeca_outflow_watch 가 같은 파일을 공유한다.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from solana_rpc import RateLimited, RPCError
+from token_balances import compact_balances
+
+CACHE_PATH = Path(os.getenv("SOLANA_TX_CACHE", "/home/kspoopoo/.openclaw/workspace/state/solana_tx_cache.sqlite"))
+NEG_TTL = int(os.getenv("SOLANA_TX_NEG_TTL", "600"))
+# token balance 는 encoding 과 무관하게 meta 에 들어있다. jsonParsed 는 instruction 파싱 비용/크기만 늘어서 base64 로 받는다
+TX_CONFIG = {"encoding": "base64", "maxSupportedTransactionVersion": 0}
+
+
+def compact_tx(tx: dict) -> dict:
+    meta = tx.get("meta") or {}
+    return {
+        "bt": tx.get("blockTime") or 0,
+        "slot": tx.get("slot") or 0,
+        "err": meta.get("err") is not None,
+        "pre": compact_balances(meta.get("preTokenBalances")),
+        "post": compact_balances(meta.get("postTokenBalances")),
+    }
+
+
+class TxCache:
+    def __init__(self, path: Path = CACHE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS tx ("
+            " signature TEXT PRIMARY KEY,"
+            " block_time INTEGER,"
+            " data TEXT,"
+            " fetched_at INTEGER NOT NULL)"
+        )
+        self.db.commit()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0}
+
+    def get_many(self, sigs) -> dict:
+        """캐시에 있는 sig 만 돌려준다. 값이 None 이면 negative 캐시."""
+        out = {}
+        now = int(time.time())
+        sigs = list(sigs)
+        for k in range(0, len(sigs), 500):
+            chunk = sigs[k:k + 500]
+            q = f"SELECT signature, data, fetched_at FROM tx WHERE signature IN ({','.join('?' * len(chunk))})"
+            for sig, data, fetched_at in self.db.execute(q, chunk):
+                if data is None:
+                    if now - fetched_at > NEG_TTL:
+                        continue
+                    self.stats["negative_hits"] += 1
+                    out[sig] = None
+                else:
+                    self.stats["hits"] += 1
+                    out[sig] = json.loads(data)
+        self.stats["misses"] += len(sigs) - len(out)
+        return out
+
+    def put_many(self, items: dict) -> None:
+        now = int(time.time())
+        rows = [
+            (sig, (c or {}).get("bt"), json.dumps(c, separators=(",", ":")) if c is not None else None, now)
+            for sig, c in items.items()
+        ]
+        self.db.executemany("INSERT OR REPLACE INTO tx VALUES (?, ?, ?, ?)", rows)
+        self.db.commit()
+
+    def scan(self, after_rowid: int = 0, needle: str | None = None):
+        """rowid 순으로 (rowid, signature, compact tx) 를 돌려준다. needle 이 있으면 data 에 그 문자열이 든 것만."""
+        q = "SELECT rowid, signature, data FROM tx WHERE rowid > ? AND data IS NOT NULL"
+        args: list = [after_rowid]
+        if needle:
+            q += " AND instr(data, ?) > 0"
+            args.append(needle)
+        for rowid, sig, data in self.db.execute(q + " ORDER BY rowid", args):
+            yield rowid, sig, json.loads(data)
+
+    def summary(self) -> str:
+        st = self.stats
+        return f"txcache hits={st['hits']} negative={st['negative_hits']} misses={st['misses']}"
+
+
+_default: TxCache | None = None
+
+
+def default_cache() -> TxCache:
+    global _default
+    if _default is None:
+        _default = TxCache()
+    return _default
+
+
+async def get_transactions(client, sigs, cache: TxCache | None = None, raise_rate_limited: bool = False,
+                           commitment: str | None = None) -> tuple[dict, int]:
+    """
+    sig -> compact tx (없는 tx 는 None). 캐시에 없는 것만 batch 로 받아서 채운다.
+    RPC 에러난 sig 는 결과에서 빠지고 개수만 돌려준다 (다음 실행에서 다시 시도).
+    raise_rate_limited 면 받은 것까지 캐시에 넣은 뒤 rate limit 으로 못 받은 게 있을 때 RateLimited 를 던진다.
+    commitment="confirmed" 는 방금 알림 받은 tx 용. 아직 finalized 가 아니라 (fork 로 빠질 수 있음) 캐시에는 아예 넣지 않고,
+    캐시에 이미 있는(finalized) 것만 꺼내 쓴다. 아직 안 보이는 건 잠깐 뒤 다시 본다.
+    """
+    cache = cache or default_cache()
+    sigs = list(dict.fromkeys(sigs))
+    out = cache.get_many(sigs)
+    missing = [s for s in sigs if s not in out]
+    errors = 0
+    if missing:
+        cfg = {**TX_CONFIG, "commitment": commitment} if commitment else TX_CONFIG
+        res = await client.batch([("getTransaction", [s, cfg]) for s in missing])
+        fetched = {}
+        limited = None
+        for s, tx in zip(missing, res):
+            if isinstance(tx, RPCError):
+                errors += 1
+                if isinstance(tx, RateLimited):
+                    limited = tx
+                continue
+            fetched[s] = compact_tx(tx) if tx else None
+        out.update(fetched)
+        if not commitment or commitment == "finalized":
+            cache.put_many(fetched)
+        if raise_rate_limited and limited is not None:
+            raise limited
+    return out, errors
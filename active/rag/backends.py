@@ -0,0 +1,347 @@
+"""
+Vector store backends for the memory RAG.
+
+- qdrant : 기존 Qdrant 서버 (docker-compose)
+- local  : 서버 없이 프로세스 안에서 검색하는 임베디드 인덱스
+           (memory-mapped float32 행렬 + payload sidecar, 큰 코퍼스는 IVF)
+
+RAG_BACKEND=qdrant|local 로 선택한다.
+"""
+
+import json
+import os
+from collections import namedtuple
+from pathlib import Path
+
+from rag_common import BACKEND, COL, ROOT
+
+INDEX_DIR = Path(os.getenv('RAG_INDEX_DIR', str(ROOT / 'rag' / 'local_index')))
+IVF_MIN_POINTS = int(os.getenv('RAG_IVF_MIN_POINTS', '50000'))
+IVF_NPROBE = int(os.getenv('RAG_IVF_NPROBE', '8'))
+
+Point = namedtuple('Point', 'id vector payload')
+Hit = namedtuple('Hit', 'id score payload')
+
+
+class QdrantBackend:
+    name = 'qdrant'
+
+    def __init__(self, collection: str = COL, url: str | None = None, path: str | None = None):
+        from qdrant_client import QdrantClient
+
+        self.collection = collection
+        if path:
+            # 서버 없이 qdrant_client local mode (벤치마크용)
+            self.client = QdrantClient(path=path)
+        else:
+            self.client = QdrantClient(url=url or os.getenv('QDRANT_URL', 'http://127.0.0.1:6333'))
+
+    def ensure_collection(self, dim: int):
+        from qdrant_client.http.models import Distance, VectorParams
+
+        try:
+            self.client.get_collection(self.collection)
+        except Exception:
+            self.client.create_collection(self.collection, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+
+    def upsert(self, points):
+        from qdrant_client.http.models import PointStruct
+
+        if not points:
+            return
+        self.client.upsert(
+            collection_name=self.collection,
+            points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+        )
+
+    def delete(self, point_ids):
+        from qdrant_client.http.models import PointIdsList
+
+        if not point_ids:
+            return
+        self.client.delete(collection_name=self.collection, points_selector=PointIdsList(points=list(point_ids)))
+
+    def search(self, vector, limit: int = 5):
+        hits = self.client.search(collection_name=self.collection, query_vector=vector, limit=limit)
+        return [Hit(h.id, h.score, h.payload or {}) for h in hits]
+
+
+class LocalBackend:
+    """
+    In-process brute-force index.
+
+    files (INDEX_DIR/<collection>/):
+      vectors.npy   float32 [n, dim], L2-normalized, np.load(mmap_mode='r')
+      ids.npy       uint64 [n]
+      payloads.jsonl + offsets.npy   행 단위 payload, 검색 결과 행만 seek 해서 읽음 (덮어쓴 행의 예전 줄은 compaction 때 정리)
+      ivf_*.npy     (선택) IVF coarse quantizer — n >= RAG_IVF_MIN_POINTS 일 때 생성
+    """
+
+    name = 'local'
+
+    def __init__(self, collection: str = COL, index_dir: Path = INDEX_DIR):
+        self.dir = Path(index_dir) / collection
+        self._mat = None
+        self._ivf = None
+
+    def ensure_collection(self, dim: int):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        meta = self.dir / 'meta.json'
+        if meta.exists():
+            have = json.loads(meta.read_text(encoding='utf-8')).get('dim')
+            if have != dim:
+                raise RuntimeError(f'local index dim mismatch: {have} != {dim} ({self.dir})')
+        else:
+            meta.write_text(json.dumps({'dim': dim, 'count': 0}), encoding='utf-8')
+
+    def _load_all(self):
+        import numpy as np
+
+        if not (self.dir / 'vectors.npy').exists():
+            return None, np.zeros(0, dtype=np.uint64), []
+        mat = np.load(self.dir / 'vectors.npy')
+        ids = np.load(self.dir / 'ids.npy')
+        # payloads.jsonl 에는 덮어쓴 행의 예전 줄이 남아 있으므로 offsets 로 읽는다
+        return mat, ids, self._payloads(range(len(ids)))
+
+    def _save(self, name: str, arr):
+        import numpy as np
+
+        tmp = self.dir / f'.{name}.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, arr)
+        os.replace(tmp, self.dir / name)
+
+    def _rewrite(self, mat, ids, payloads):
+        """전체를 새로 쓴다 (첫 ingest / 삭제 후 compaction)."""
+        import numpy as np
+
+        offsets = []
+        tmp = self.dir / '.payloads.jsonl.tmp'
+        with open(tmp, 'wb') as f:
+            for pl in payloads:
+                offsets.append(f.tell())
+                f.write(json.dumps(pl, ensure_ascii=False).encode('utf-8') + b'\n')
+        os.replace(tmp, self.dir / 'payloads.jsonl')
+        self._save('offsets.npy', np.asarray(offsets, dtype=np.int64))
+        self._save('ids.npy', np.asarray(ids, dtype=np.uint64))
+        self._save('vectors.npy', np.asarray(mat, dtype=np.float32))
+
+    def _grown_header(self, name: str, add: int):
+        """name 의 .npy header 를 행 add 개 늘린 shape 로 다시 만든 bytes 와 data 시작 위치. 자리가 안 맞으면 None."""
+        import io
+
+        import numpy as np
+
+        fmt = np.lib.format
+        with open(self.dir / name, 'rb') as f:
+            version = fmt.read_magic(f)
+            shape, fortran, dtype = (fmt.read_array_header_1_0 if version == (1, 0) else fmt.read_array_header_2_0)(f)
+            start = f.tell()
+        if fortran:
+            return None
+        buf = io.BytesIO()
+        header = {'descr': fmt.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (shape[0] + add, *shape[1:])}
+        (fmt.write_array_header_1_0 if version == (1, 0) else fmt.write_array_header_2_0)(buf, header)
+        # np.save 는 0번 축이 커져도 header 를 제자리에서 고칠 수 있게 여유 공백을 넣어 둔다
+        return (buf.getvalue(), start) if len(buf.getvalue()) == start else None
+
+    def _append(self, items: dict):
+        """{name: 붙일 행} 을 각 .npy 끝에 붙이고 header 의 shape 만 고친다. 하나라도 header 자리가 모자라면 False."""
+        headers = {name: self._grown_header(name, len(arr)) for name, arr in items.items()}
+        if any(h is None for h in headers.values()):
+            return False
+        for name, arr in items.items():
+            with open(self.dir / name, 'r+b') as f:
+                f.seek(0, os.SEEK_END)
+                f.write(arr.tobytes())
+                # data 를 먼저 쓰고 header 를 바꾼다 (중간에 죽으면 예전 shape 그대로 읽힘)
+                f.seek(0)
+                f.write(headers[name][0])
+        return True
+
+    def upsert(self, points):
+        """
+        새 point 는 파일 끝에 붙이고, 이미 있는 id 는 그 행만 제자리에서 고친다 (전체를 다시 읽고 쓰지 않음).
+        바뀐 payload 는 payloads.jsonl 끝에 새 줄로 붙이고 offset 만 옮긴다. 버려진 줄이 살아있는 행보다 많아지면 compaction.
+        """
+        import numpy as np
+
+        if not points:
+            return
+        fmt = np.lib.format
+        meta = json.loads((self.dir / 'meta.json').read_text(encoding='utf-8'))
+        exists = (self.dir / 'vectors.npy').exists()
+        ids = np.load(self.dir / 'ids.npy') if exists else np.zeros(0, dtype=np.uint64)
+        rows = {int(pid): i for i, pid in enumerate(ids)}
+        n = len(ids)
+
+        new_ids, new_vecs, new_payloads = [], [], []
+        changed = {}
+        for p in points:
+            v = np.asarray(p.vector, dtype=np.float32)
+            v /= float(np.linalg.norm(v)) or 1.0
+            row = rows.get(int(p.id))
+            if row is None:
+                rows[int(p.id)] = n + len(new_ids)
+                new_ids.append(int(p.id))
+                new_vecs.append(v)
+                new_payloads.append(p.payload)
+            elif row >= n:
+                new_vecs[row - n] = v
+                new_payloads[row - n] = p.payload
+            else:
+                changed[row] = (v, p.payload)
+
+        if not exists:
+            self._rewrite(np.stack(new_vecs), new_ids, new_payloads)
+            meta['dead_payloads'] = 0
+        else:
+            with open(self.dir / 'payloads.jsonl', 'ab') as f:
+                pos = f.seek(0, os.SEEK_END)
+                offsets = []
+                for pl in [pl for _, pl in changed.values()] + new_payloads:
+                    offsets.append(pos)
+                    line = json.dumps(pl, ensure_ascii=False).encode('utf-8') + b'\n'
+                    f.write(line)
+                    pos += len(line)
+            if changed:
+                idx = list(changed)
+                mat = fmt.open_memmap(self.dir / 'vectors.npy', mode='r+')
+                mat[idx] = np.stack([v for v, _ in changed.values()])
+                mat.flush()
+                off = fmt.open_memmap(self.dir / 'offsets.npy', mode='r+')
+                off[idx] = offsets[:len(idx)]
+                off.flush()
+                del mat, off
+                meta['dead_payloads'] = meta.get('dead_payloads', 0) + len(idx)
+            if new_ids and not self._append({
+                'vectors.npy': np.stack(new_vecs).astype(np.float32, copy=False),
+                'offsets.npy': np.asarray(offsets[len(changed):], dtype=np.int64),
+                'ids.npy': np.asarray(new_ids, dtype=np.uint64),
+            }):
+                # 예전 numpy 가 쓴 header 처럼 늘릴 자리가 없으면 한 번 통째로 다시 쓴다
+                mat, old_ids, payloads = self._load_all()
+                self._rewrite(np.vstack([mat, np.stack(new_vecs)]), [*map(int, old_ids), *new_ids], payloads + new_payloads)
+                meta['dead_payloads'] = 0
+        self._finish(meta, n + len(new_ids))
+
+    def delete(self, point_ids):
+        """manifest 에서 빠진 chunk 의 point 를 지운다. 지울 게 있을 때만 남은 행으로 다시 쓴다 (compaction 겸)."""
+        import numpy as np
+
+        if not point_ids or not (self.dir / 'vectors.npy').exists():
+            return
+        drop = np.isin(np.load(self.dir / 'ids.npy'), np.asarray([int(x) for x in point_ids], dtype=np.uint64))
+        if not drop.any():
+            return
+        self._compact(keep=~drop)
+
+    def _compact(self, keep=None):
+        meta = json.loads((self.dir / 'meta.json').read_text(encoding='utf-8'))
+        mat, ids, payloads = self._load_all()
+        if keep is not None:
+            mat, ids = mat[keep], ids[keep]
+            payloads = [pl for pl, k in zip(payloads, keep) if k]
+        self._rewrite(mat, ids, payloads)
+        meta['dead_payloads'] = 0
+        self._finish(meta, len(ids))
+
+    def _finish(self, meta: dict, count: int):
+        import numpy as np
+
+        if meta.get('dead_payloads', 0) > count:
+            return self._compact()
+        if count >= IVF_MIN_POINTS:
+            self._build_ivf(np.load(self.dir / 'vectors.npy', mmap_mode='r'))
+        else:
+            for name in ('ivf_centroids.npy', 'ivf_order.npy', 'ivf_bounds.npy'):
+                (self.dir / name).unlink(missing_ok=True)
+
+        meta['count'] = count
+        (self.dir / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+        self._mat = None
+        self._ivf = None
+
+    def _build_ivf(self, mat, iters: int = 10):
+        # spherical k-means, nlist ~ sqrt(n)
+        import numpy as np
+
+        n = len(mat)
+        nlist = max(1, int(n ** 0.5))
+        rng = np.random.default_rng(0)
+        cent = mat[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(mat @ cent.T, axis=1)
+            for c in range(nlist):
+                members = mat[assign == c]
+                if len(members):
+                    v = members.sum(axis=0)
+                    cent[c] = v / (np.linalg.norm(v) or 1.0)
+        assign = np.argmax(mat @ cent.T, axis=1)
+        order = np.argsort(assign, kind='stable')
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        self._save('ivf_centroids.npy', cent.astype(np.float32))
+        self._save('ivf_order.npy', order.astype(np.int64))
+        self._save('ivf_bounds.npy', bounds.astype(np.int64))
+
+    def _load(self):
+        import numpy as np
+
+        if self._mat is None:
+            path = self.dir / 'vectors.npy'
+            if not path.exists():
+                raise RuntimeError(f'local index not found: {self.dir} (run ingest_memory.py with RAG_BACKEND=local)')
+            self._mat = np.load(path, mmap_mode='r')
+            if (self.dir / 'ivf_centroids.npy').exists():
+                self._ivf = tuple(np.load(self.dir / name) for name in ('ivf_centroids.npy', 'ivf_order.npy', 'ivf_bounds.npy'))
+        return self._mat
+
+    def _payloads(self, rows):
+        import numpy as np
+
+        offsets = np.load(self.dir / 'offsets.npy', mmap_mode='r')
+        out = []
+        with open(self.dir / 'payloads.jsonl', 'rb') as f:
+            for r in rows:
+                f.seek(int(offsets[r]))
+                out.append(json.loads(f.readline()))
+        return out
+
+    def search(self, vector, limit: int = 5):
+        import numpy as np
+
+        mat = self._load()
+        if not len(mat):
+            return []
+        q = np.asarray(vector, dtype=np.float32)
+        if self._ivf is not None:
+            cent, order, bounds = self._ivf
+            probe = np.argsort(-(cent @ q))[:IVF_NPROBE]
+            rows = np.sort(np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probe]))
+            scores = mat[rows] @ q
+        else:
+            rows = None
+            scores = mat @ q
+        k = min(limit, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        picked = top if rows is None else rows[top]
+        ids = np.load(self.dir / 'ids.npy', mmap_mode='r')
+        payloads = self._payloads(picked)
+        return [Hit(int(ids[r]), float(scores[t]), pl) for r, t, pl in zip(picked, top, payloads)]
+
+
+BACKENDS = {
+    'qdrant': QdrantBackend,
+    'local': LocalBackend,
+}
+
+
+def make_backend(name: str | None = None, **kw):
+    name = name or BACKEND
+    if name not in BACKENDS:
+        raise RuntimeError(f'unknown RAG_BACKEND={name!r} (choices: {", ".join(BACKENDS)})')
+    return BACKENDS[name](**kw)
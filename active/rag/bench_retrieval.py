@@ -0,0 +1,204 @@
+"""
+Offline retrieval benchmark for the memory RAG.
+
+fixture 코퍼스 + 라벨된 질의(bench/queries.json)로
+backend x embedder dim x chunking 조합마다
+  recall@k, MRR, ingest throughput, query p50/p95, index size
+를 측정해서 JSON 으로 출력한다. 서버/네트워크 없이 돈다 (qdrant 는 local path mode).
+
+Usage:
+  python bench_retrieval.py --out bench/result.json
+  python bench_retrieval.py --baseline bench/result.json   # 회귀 있으면 exit 1
+  python bench_retrieval.py --backends local --dims 384 --chunking c1200,c600
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import retriever
+from backends import LocalBackend, Point, QdrantBackend
+from bm25 import BM25Index
+from rag_common import chunk_text, local_embed, point_id, sha1
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+QUERIES = Path(__file__).parent / 'bench' / 'queries.json'
+
+CHUNKING = {
+    'c1200': (1200, 120),
+    'c600': (600, 60),
+    'c300': (300, 30),
+}
+
+
+def load_corpus(root: Path, globs):
+    docs = []
+    for g in globs:
+        for fp in sorted(root.glob(g)):
+            docs.append((fp, fp.read_text(encoding='utf-8', errors='ignore')))
+    return docs
+
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for base, _, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(base, f))
+    return total
+
+
+def make_store(name: str, dim: int, workdir: Path):
+    col = f'bench-{dim}'
+    if name == 'local':
+        b = LocalBackend(collection=col, index_dir=workdir)
+    elif name == 'qdrant':
+        b = QdrantBackend(collection=col, path=str(workdir / 'qdrant'))
+    else:
+        raise RuntimeError(f'unknown backend {name}')
+    b.ensure_collection(dim)
+    return b
+
+
+def ingest(backend, docs, dim: int, size: int, overlap: int):
+    index = BM25Index()
+    points = []
+    nbytes = 0
+    t0 = time.perf_counter()
+    for fp, txt in docs:
+        nbytes += len(txt.encode('utf-8'))
+        for idx, ch in enumerate(chunk_text(txt, size, overlap)):
+            key = f'{fp}#{idx}'
+            payload = {'path': str(fp), 'chunk_index': idx, 'text': ch}
+            index.add(key, sha1(ch), payload)
+            points.append(Point(point_id(key), local_embed(ch, dim), payload))
+    backend.upsert(points)
+    took = time.perf_counter() - t0
+    return index, {
+        'chunks': len(points),
+        'ingest_s': round(took, 4),
+        'chunks_per_s': round(len(points) / took, 1) if took else None,
+        'mb_per_s': round(nbytes / 1e6 / took, 3) if took else None,
+    }
+
+
+def evaluate(backend, index, queries, dim: int, k: int, mode: str, repeats: int):
+    recall, rr, lat = [], [], []
+    for item in queries:
+        relevant = set(item['relevant'])
+        hits = None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            hits = retriever.search(item['q'], backend=backend, index=index, mode=mode, limit=k, dim=dim)
+            lat.append((time.perf_counter() - t0) * 1000)
+        files = [Path(h.payload.get('path') or '').name for h in hits]
+        found = relevant & set(files)
+        recall.append(len(found) / len(relevant))
+        first = next((i for i, f in enumerate(files, 1) if f in relevant), None)
+        rr.append(1.0 / first if first else 0.0)
+    lat.sort()
+    return {
+        f'recall@{k}': round(statistics.fmean(recall), 4),
+        'mrr': round(statistics.fmean(rr), 4),
+        'query_p50_ms': round(lat[len(lat) // 2], 3),
+        'query_p95_ms': round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 3),
+    }
+
+
+def run_matrix(args, spec):
+    import numpy as np
+
+    # 첫 조합의 ingest 시간에 numpy import / 첫 배열 할당 비용이 섞이지 않게 미리 한 번
+    np.zeros((1, 1), dtype=np.float32)
+    docs = load_corpus(Path(args.root), spec['corpus'])
+    queries = spec['queries']
+    results = []
+    for backend_name in args.backends.split(','):
+        for dim in (int(x) for x in args.dims.split(',')):
+            for chunking in args.chunking.split(','):
+                size, overlap = CHUNKING[chunking]
+                row = {'backend': backend_name, 'dim': dim, 'chunking': chunking, 'mode': args.mode}
+                with tempfile.TemporaryDirectory(prefix='rag-bench-') as tmp:
+                    workdir = Path(tmp)
+                    try:
+                        backend = make_store(backend_name, dim, workdir)
+                    except ImportError as e:
+                        row['skipped'] = str(e)
+                        results.append(row)
+                        continue
+                    index, stats = ingest(backend, docs, dim, size, overlap)
+                    row.update(stats)
+                    row.update(evaluate(backend, index, queries, dim, args.k, args.mode, args.repeats))
+                    row['index_bytes'] = dir_size(workdir)
+                    client = getattr(backend, 'client', None)
+                    if client is not None:
+                        client.close()
+                results.append(row)
+                print(json.dumps(row, ensure_ascii=False), file=sys.stderr)
+    return {
+        'generatedAtUTC': dt.datetime.now(dt.timezone.utc).isoformat(),
+        'corpus_files': len(docs),
+        'queries': len(queries),
+        'k': args.k,
+        'results': results,
+    }
+
+
+def regressions(report: dict, baseline: dict, tol: float, lat_tol: float):
+    def key(r):
+        return (r['backend'], r['dim'], r['chunking'], r.get('mode'))
+
+    old = {key(r): r for r in baseline.get('results', []) if 'skipped' not in r}
+    out = []
+    k = report['k']
+    for r in report['results']:
+        b = old.get(key(r))
+        if b is None or 'skipped' in r:
+            continue
+        for metric in (f'recall@{k}', 'mrr'):
+            if metric in b and r[metric] < b[metric] - tol:
+                out.append(f'{key(r)} {metric} {b[metric]} -> {r[metric]}')
+        if r['query_p95_ms'] > b['query_p95_ms'] * (1 + lat_tol):
+            out.append(f"{key(r)} query_p95_ms {b['query_p95_ms']} -> {r['query_p95_ms']}")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--queries', default=str(QUERIES))
+    ap.add_argument('--root', default=str(REPO_ROOT), help='corpus glob 기준 디렉터리')
+    ap.add_argument('--backends', default='local,qdrant')
+    ap.add_argument('--dims', default='384,1024,4096')
+    ap.add_argument('--chunking', default=','.join(CHUNKING))
+    ap.add_argument('--mode', choices=['vector', 'hybrid', 'bm25'], default='vector')
+    ap.add_argument('--k', type=int, default=5)
+    ap.add_argument('--repeats', type=int, default=5, help='질의당 반복 횟수 (latency 표본)')
+    ap.add_argument('--out', help='결과 JSON 저장 경로 (기본 stdout)')
+    ap.add_argument('--baseline', help='이전 결과 JSON; 품질/지연 회귀 시 exit 1')
+    ap.add_argument('--tolerance', type=float, default=0.02, help='recall/MRR 허용 하락폭')
+    ap.add_argument('--latency-tolerance', type=float, default=0.5, help='p95 허용 증가율')
+    args = ap.parse_args()
+
+    spec = json.loads(Path(args.queries).read_text(encoding='utf-8'))
+    report = run_matrix(args, spec)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding='utf-8')
+    else:
+        print(text)
+
+    if args.baseline:
+        regs = regressions(report, json.loads(Path(args.baseline).read_text(encoding='utf-8')), args.tolerance, args.latency_tolerance)
+        for line in regs:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        return 1 if regs else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+"""
+Incremental BM25 inverted index over rag_common.tokenize() tokens.
+
+ingest_memory.py 가 manifest 와 같이 갱신한다. 바뀐 청크만 postings 에서 빼고 다시 넣는다.
+"""
+
+import json
+import math
+from collections import Counter
+
+from rag_common import ROOT, tokenize
+
+INDEX_PATH = ROOT / 'rag' / '.bm25_index.json'
+K1 = 1.2
+B = 0.75
+
+
+class BM25Index:
+    def __init__(self, docs: dict | None = None, postings: dict | None = None):
+        # docs: key -> {h, len, path, chunk_index, text}
+        # postings: token -> {key: tf}
+        self.docs = docs or {}
+        self.postings = postings or {}
+        self._total_len = sum(d['len'] for d in self.docs.values())
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        if not path.exists():
+            return cls()
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except Exception:
+            return cls()
+        return cls(data.get('docs'), data.get('postings'))
+
+    def save(self, path=INDEX_PATH):
+        path.write_text(json.dumps({'docs': self.docs, 'postings': self.postings}, ensure_ascii=False), encoding='utf-8')
+
+    def remove(self, key: str):
+        d = self.docs.pop(key, None)
+        if d is None:
+            return
+        self._total_len -= d['len']
+        for t in set(tokenize(d['text'])):
+            plist = self.postings.get(t)
+            if plist is None:
+                continue
+            plist.pop(key, None)
+            if not plist:
+                del self.postings[t]
+
+    def add(self, key: str, h: str, payload: dict):
+        self.remove(key)
+        toks = tokenize(payload.get('text') or '')
+        self.docs[key] = {'h': h, 'len': len(toks), **payload}
+        self._total_len += len(toks)
+        for t, tf in Counter(toks).items():
+            self.postings.setdefault(t, {})[key] = tf
+
+    def sync(self, manifest: dict):
+        """manifest 에서 사라진 청크를 지운다. (추가/변경은 add 로)"""
+        for key in [k for k in self.docs if k not in manifest]:
+            self.remove(key)
+
+    def search(self, query: str, limit: int = 50):
+        n = len(self.docs)
+        if not n:
+            return []
+        avgdl = self._total_len / n or 1.0
+        scores = Counter()
+        for t in set(tokenize(query)):
+            plist = self.postings.get(t)
+            if not plist:
+                continue
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for key, tf in plist.items():
+                dl = self.docs[key]['len']
+                scores[key] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / avgdl))
+        return scores.most_common(limit)
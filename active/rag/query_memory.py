@@ -1,44 +1,74 @@
-import hashlib
-import math
+"""
+Thin RAG query CLI.
+
+query_server.py 가 떠 있으면 그쪽으로 질의하고(수 ms), 없으면 이 프로세스에서 직접 검색한다.
+"""
+
+import argparse
+import json
 import os
-import re
 import sys
+import time
+import urllib.parse
+import urllib.request
+
+SERVER_URL = os.getenv('RAG_SERVER_URL', 'http://127.0.0.1:8765')
+
+
+def query_server(query: str, mode: str, limit: int, rerank: bool):
+    qs = urllib.parse.urlencode({'q': query, 'mode': mode, 'limit': limit, 'rerank': int(rerank)})
+    try:
+        with urllib.request.urlopen(f'{SERVER_URL}/search?{qs}', timeout=5) as r:
+            return json.loads(r.read().decode('utf-8'))
+    except OSError:
+        return None
+
 
-from dotenv import load_dotenv
-from qdrant_client import QdrantClient
+def query_local(query: str, mode: str, limit: int, rerank: bool):
+    from dotenv import load_dotenv
 
-load_dotenv()
+    load_dotenv()
 
-COL = os.getenv('QDRANT_COLLECTION', 'openclaw-memory')
-VECTOR_SIZE = 384
+    import retriever
+    from backends import make_backend
+    from bm25 import BM25Index
 
-q = QdrantClient(url=os.getenv('QDRANT_URL', 'http://127.0.0.1:6333'))
+    backend = make_backend() if mode != 'bm25' else None
+    index = BM25Index.load() if mode != 'vector' else None
+    hits = retriever.search(query, backend=backend, index=index, mode=mode, limit=limit, rerank_results=rerank)
+    return {'results': [{'score': h.score, **h.payload} for h in hits], 'cached': False}
 
 
-def tokenize(text: str):
-    return re.findall(r"[\w가-힣#@.+-]{2,}", text.lower())
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('query', nargs='*')
+    ap.add_argument('--mode', choices=['hybrid', 'vector', 'bm25'], default='hybrid')
+    ap.add_argument('--limit', type=int, default=5)
+    ap.add_argument('--rerank', action='store_true', help='exact token overlap 로 재정렬')
+    ap.add_argument('--no-server', action='store_true', help='query_server 를 쓰지 않고 직접 검색')
+    ap.add_argument('--profile-startup', action='store_true', help='import 시간/첫 출력까지 시간 보고')
+    args = ap.parse_args()
 
+    query = ' '.join(args.query).strip() or '최근 결정사항 요약'
+    t0 = time.perf_counter()
+    out = None if args.no_server else query_server(query, args.mode, args.limit, args.rerank)
+    source = 'server'
+    if out is None:
+        out = query_local(query, args.mode, args.limit, args.rerank)
+        source = 'local'
+    took_ms = (time.perf_counter() - t0) * 1000
 
-def local_embed(text: str, dim: int = VECTOR_SIZE):
-    vec = [0.0] * dim
-    toks = tokenize(text)
-    if not toks:
-        return vec
-    for t in toks:
-        h = hashlib.md5(t.encode('utf-8')).digest()
-        idx = int.from_bytes(h[:2], 'little') % dim
-        sign = 1.0 if (h[2] % 2 == 0) else -1.0
-        vec[idx] += sign
-    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
-    return [v / norm for v in vec]
+    for i, p in enumerate(out['results'], 1):
+        print(f"[{i}] score={p['score']:.4f} {p.get('path')}#{p.get('chunk_index')}")
+        print((p.get('text') or '')[:300].replace('\n', ' '))
+        print('---')
+    extra = f" server_ms={out['took_ms']:.2f}" if 'took_ms' in out else ''
+    print(f"# {source} cached={out['cached']} took_ms={took_ms:.1f}{extra}")
 
 
-query = ' '.join(sys.argv[1:]).strip() or '최근 결정사항 요약'
-vec = local_embed(query)
+if __name__ == '__main__':
+    if '--profile-startup' in sys.argv:
+        from startup_profile import profile_startup
 
-hits = q.search(collection_name=COL, query_vector=vec, limit=5)
-for i, h in enumerate(hits, 1):
-    p = h.payload
-    print(f"[{i}] score={h.score:.4f} {p.get('path')}#{p.get('chunk_index')}")
-    print((p.get('text') or '')[:300].replace('\n', ' '))
-    print('---')
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    main()
@@ -0,0 +1,166 @@
+"""
+Resident RAG query daemon (localhost HTTP).
+
+backend client / BM25 색인 / 토큰 해시 캐시를 띄워둔 채로 질의를 받는다.
+최근 질의 결과는 LRU 로 캐시하고, ingest manifest 가 바뀌면 캐시와 색인을 다시 읽는다.
+
+Usage:
+  python query_server.py                    # 127.0.0.1:8765
+  curl '127.0.0.1:8765/search?q=질문&mode=hybrid&limit=5'
+  curl '127.0.0.1:8765/stats'
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import retriever  # noqa: E402
+from backends import make_backend  # noqa: E402
+from bm25 import INDEX_PATH, BM25Index  # noqa: E402
+from rag_common import MANIFEST, token_bucket  # noqa: E402
+
+HOST = os.getenv('RAG_SERVER_HOST', '127.0.0.1')
+PORT = int(os.getenv('RAG_SERVER_PORT', '8765'))
+CACHE_SIZE = int(os.getenv('RAG_QUERY_CACHE', '256'))
+
+
+def _mtime(path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+class QueryService:
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.stats = {'queries': 0, 'hits': 0, 'reloads': 0}
+        self.version = None
+        self.backend = None
+        self.index = None
+        self._reload_if_changed()
+
+    def _reload_if_changed(self):
+        version = (_mtime(MANIFEST), _mtime(INDEX_PATH))
+        if version == self.version:
+            return
+        backend = make_backend()
+        index = BM25Index.load()
+        with self.lock:
+            self.backend, self.index, self.version = backend, index, version
+            self.cache.clear()
+            self.stats['reloads'] += 1
+
+    def search(self, query: str, mode: str = 'hybrid', limit: int = 5, rerank: bool = False) -> dict:
+        # 잘못된 mode 가 조용히 hybrid/vector 로 처리된 채 캐시 key 로 남지 않게 먼저 거른다
+        if mode not in retriever.MODES:
+            raise ValueError(f"unknown mode {mode!r} (expected one of {', '.join(retriever.MODES)})")
+        if limit < 1:
+            raise ValueError('limit must be >= 1')
+        t0 = time.perf_counter()
+        self._reload_if_changed()
+        key = (query, mode, limit, rerank)
+        with self.lock:
+            self.stats['queries'] += 1
+            cached = self.cache.get(key)
+            hit = cached is not None
+            if hit:
+                self.cache.move_to_end(key)
+                self.stats['hits'] += 1
+            backend, index = self.backend, self.index
+        if not hit:
+            hits = retriever.search(query, backend=backend, index=index, mode=mode, limit=limit, rerank_results=rerank)
+            cached = [{'score': h.score, **h.payload} for h in hits]
+            with self.lock:
+                self.cache[key] = cached
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        took_ms = (time.perf_counter() - t0) * 1000
+        return {'results': cached, 'cached': hit, 'took_ms': round(took_ms, 3)}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                **self.stats,
+                'cache_entries': len(self.cache),
+                'token_cache': token_bucket.cache_info()._asdict(),
+                'backend': self.backend.name,
+                'bm25_docs': len(self.index.docs),
+            }
+
+
+def make_handler(service: QueryService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            u = urlparse(self.path)
+            qs = {k: v[-1] for k, v in parse_qs(u.query).items()}
+            if u.path == '/stats':
+                return self._send(200, service.snapshot())
+            if u.path != '/search':
+                return self._send(404, {'error': 'not found'})
+            try:
+                out = service.search(
+                    qs.get('q', '').strip() or '최근 결정사항 요약',
+                    mode=qs.get('mode', 'hybrid'),
+                    limit=int(qs.get('limit', '5')),
+                    rerank=qs.get('rerank', '0') in ('1', 'true'),
+                )
+            except ValueError as e:
+                return self._send(400, {'error': str(e)})
+            except Exception as e:
+                return self._send(500, {'error': str(e)})
+            print(f"query mode={qs.get('mode', 'hybrid')} cached={out['cached']} took_ms={out['took_ms']:.2f} q={qs.get('q', '')[:60]!r}", flush=True)
+            self._send(200, out)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--host', default=HOST)
+    ap.add_argument('--port', type=int, default=PORT)
+    args = ap.parse_args()
+
+    service = QueryService()
+    try:
+        # numpy / mmap / qdrant 연결을 첫 질의 전에 데워둔다
+        retriever.search('warmup', backend=service.backend, index=service.index, limit=1)
+    except Exception as e:
+        print(f'warmup failed: {e}', flush=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f'rag query server on http://{args.host}:{args.port} backend={service.backend.name}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    if '--profile-startup' in sys.argv:
+        from startup_profile import profile_startup
+
+        raise SystemExit(profile_startup(__file__, sys.argv[1:]))
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import math
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(os.getenv('RAG_ROOT', '/home/kspoopoo/.openclaw/workspace'))
+COL = os.getenv('QDRANT_COLLECTION', 'openclaw-memory')
+EMBED_MODEL = os.getenv('EMBED_MODEL', 'local-hash-384')
+BACKEND = os.getenv('RAG_BACKEND', 'qdrant')
+# 백엔드마다 인덱싱 상태가 다르므로 manifest 도 분리 (qdrant 는 기존 파일명 유지)
+MANIFEST = ROOT / 'rag' / ('.ingest_manifest.json' if BACKEND == 'qdrant' else f'.ingest_manifest.{BACKEND}.json')
+VECTOR_SIZE = 384
+
+
+def memory_files():
+    return [ROOT / 'MEMORY.md', *sorted((ROOT / 'memory').glob('*.md'))]
+
+
+def chunk_text(text: str, size: int = 1200, overlap: int = 120):
+    out = []
+    i = 0
+    while i < len(text):
+        out.append(text[i:i + size])
+        i += max(1, size - overlap)
+    return out
+
+
+def sha1(s: str) -> str:
+    return hashlib.sha1(s.encode('utf-8', errors='ignore')).hexdigest()
+
+
+def point_id(key: str) -> int:
+    return int(hashlib.md5(key.encode()).hexdigest()[:12], 16)
+
+
+def tokenize(text: str):
+    return re.findall(r"[\w가-힣#@.+-]{2,}", text.lower())
+
+
+@lru_cache(maxsize=65536)
+def token_bucket(tok: str, dim: int):
+    h = hashlib.md5(tok.encode('utf-8')).digest()
+    idx = int.from_bytes(h[:2], 'little') % dim
+    sign = 1.0 if (h[2] % 2 == 0) else -1.0
+    return idx, sign
+
+
+def local_embed(text: str, dim: int = VECTOR_SIZE):
+    vec = [0.0] * dim
+    toks = tokenize(text)
+    if not toks:
+        return vec
+    for t in toks:
+        idx, sign = token_bucket(t, dim)
+        vec[idx] += sign
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def load_manifest() -> dict:
+    if not MANIFEST.exists():
+        return {}
+    try:
+        return json.loads(MANIFEST.read_text(encoding='utf-8'))
+    except Exception:
+        return {}
+
+
+def save_manifest(data: dict):
+    MANIFEST.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
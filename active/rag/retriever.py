@@ -0,0 +1,66 @@
+"""
+Hybrid retrieval: vector (backend) + BM25 -> reciprocal rank fusion -> (optional) token-overlap rerank.
+"""
+
+from collections import namedtuple
+
+from rag_common import VECTOR_SIZE, local_embed, tokenize
+
+RRF_K = 60
+MODES = ('hybrid', 'vector', 'bm25')
+CANDIDATES = 50
+
+Result = namedtuple('Result', 'key score payload')
+
+
+def hit_key(payload: dict) -> str:
+    return f"{payload.get('path')}#{payload.get('chunk_index')}"
+
+
+def vector_search(backend, query: str, limit: int, dim: int = VECTOR_SIZE):
+    hits = backend.search(local_embed(query, dim), limit=limit)
+    return [Result(hit_key(h.payload), h.score, h.payload) for h in hits]
+
+
+def bm25_search(index, query: str, limit: int):
+    out = []
+    for key, score in index.search(query, limit=limit):
+        d = index.docs[key]
+        out.append(Result(key, score, {'path': d['path'], 'chunk_index': d['chunk_index'], 'text': d['text']}))
+    return out
+
+
+def rrf(*ranked_lists, k: int = RRF_K):
+    scores = {}
+    payloads = {}
+    for results in ranked_lists:
+        for rank, r in enumerate(results, 1):
+            scores[r.key] = scores.get(r.key, 0.0) + 1.0 / (k + rank)
+            payloads.setdefault(r.key, r.payload)
+    fused = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    return [Result(key, s, payloads[key]) for key, s in fused]
+
+
+def token_overlap(query: str, text: str) -> float:
+    q = set(tokenize(query))
+    if not q:
+        return 0.0
+    return len(q & set(tokenize(text))) / len(q)
+
+
+def rerank(query: str, results):
+    # exact token overlap 우선, 동점이면 fusion 점수 순
+    return sorted(results, key=lambda r: (token_overlap(query, r.payload.get('text') or ''), r.score), reverse=True)
+
+
+def search(query: str, backend=None, index=None, mode: str = 'hybrid', limit: int = 5, rerank_results: bool = False,
+           dim: int = VECTOR_SIZE):
+    if mode == 'bm25' or (mode == 'hybrid' and backend is None):
+        results = bm25_search(index, query, CANDIDATES)
+    elif mode == 'vector' or index is None or not index.docs:
+        results = vector_search(backend, query, CANDIDATES if rerank_results else limit, dim)
+    else:
+        results = rrf(vector_search(backend, query, CANDIDATES, dim), bm25_search(index, query, CANDIDATES))
+    if rerank_results:
+        results = rerank(query, results)
+    return results[:limit]
@@ -0,0 +1,71 @@
+"""
+--profile-startup 지원.
+
+스크립트를 `python -X importtime` 으로 다시 실행해서
+  - import 시간 상위 모듈 (cumulative 기준)
+  - 첫 stdout 출력까지 걸린 시간
+  - 전체 실행 시간
+을 stderr 로 보고한다. 스크립트 출력은 그대로 흘려보낸다.
+active/market-monitor/startup_profile.py 와 같은 내용 (두 프로젝트는 서로 import 하지 않으므로 각자 한 벌씩, 고치면 같이 고칠 것).
+"""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+import threading
+import time
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_startup(script: str, argv: list[str], top: int = 15) -> int:
+    args = [a for a in argv if a != "--profile-startup"]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-X", "importtime", script, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+
+    imports: list[tuple[int, int, int, str]] = []
+
+    def read_stderr():
+        for line in proc.stderr:
+            m = IMPORT_LINE.match(line)
+            if m:
+                imports.append((int(m.group(1)), int(m.group(2)), len(m.group(3)), m.group(4)))
+            elif not line.startswith("import time:"):
+                sys.stderr.write(line)
+
+    reader = threading.Thread(target=read_stderr, daemon=True)
+    reader.start()
+
+    first_output = None
+    for line in proc.stdout:
+        if first_output is None and line.strip():
+            first_output = time.perf_counter() - t0
+        sys.stdout.write(line)
+    code = proc.wait()
+    reader.join()
+    total = time.perf_counter() - t0
+
+    # 들여쓰기 1칸(= 최상위 import) 의 cumulative 합이 전체 import 시간
+    top_level = [x for x in imports if x[2] == 1]
+    import_us = sum(x[1] for x in top_level)
+    err = sys.stderr
+    print("\n== startup profile ==", file=err)
+    print(f"script={script} exit={code}", file=err)
+    print(f"imports={import_us / 1000:.1f}ms modules={len(imports)}", file=err)
+    if first_output is not None:
+        print(f"first_output={first_output * 1000:.1f}ms", file=err)
+    else:
+        print("first_output=none", file=err)
+    print(f"total={total * 1000:.1f}ms", file=err)
+    print(f"top {top} imports (cumulative):", file=err)
+    for self_us, cum_us, _, name in sorted(top_level, key=lambda x: x[1], reverse=True)[:top]:
+        print(f"  {cum_us / 1000:8.1f}ms  self={self_us / 1000:6.1f}ms  {name}", file=err)
+    return code
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Job plugins for scheduler.py.
+
+plugin = `async def xxx(shared) -> list[Job]` 하나. 기동할 때 한 번 불려서 import/상태 로딩(watchlist, 이력, 규칙,
+baseline 등)을 끝내 두고, 매 tick 에는 실제 한 사이클만 돈다.
+각 스크립트의 알림 함수는 shared.outbox 로 바꿔 끼워서 job 이 전송을 기다리지 않게 한다.
+
+interval / jitter 는 SCHED_<JOB>_INTERVAL / SCHED_<JOB>_JITTER 로 덮어쓸 수 있다 (예: SCHED_PENGUIN_MONITOR_INTERVAL=120).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+from outbox import Outbox, send_openclaw, send_telegram
+from scheduler import Job, log
+
+ROOT = Path(__file__).resolve().parent.parent
+for sub in ("market-monitor", "kidsclub"):
+    if str(ROOT / sub) not in sys.path:
+        sys.path.insert(0, str(ROOT / sub))
+
+HTTP_POOL = 16
+OUTBOX_BATCH = 20
+
+
+class Shared:
+    """job 들이 같이 쓰는 것: HTTP 커넥션 풀, Solana RPC client, 알림 outbox."""
+
+    def __init__(self):
+        import requests
+
+        s = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL, pool_maxsize=HTTP_POOL)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        self.session = s
+        self.outbox = Outbox()
+        self._rpc = None
+
+    @property
+    def rpc(self):
+        if self._rpc is None:
+            from solana_rpc import RPCClient
+
+            self._rpc = RPCClient(os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"), timeout=45)
+        return self._rpc
+
+    async def drain(self) -> int:
+        sent = 0
+        for msg_id, channel, target, text, attempts in self.outbox.due(OUTBOX_BATCH):
+            try:
+                if channel == "telegram":
+                    await asyncio.to_thread(send_telegram, self.session, target, text)
+                else:
+                    await asyncio.to_thread(send_openclaw, target, text)
+            except Exception as e:
+                log(f"outbox #{msg_id} ({channel}) send failed: {e}")
+                self.outbox.mark_failed(msg_id, attempts, f"{type(e).__name__}: {e}")
+                continue
+            self.outbox.mark_sent(msg_id)
+            sent += 1
+        return sent
+
+
+def env_float(job: str, key: str, default: float) -> float:
+    return float(os.getenv(f"SCHED_{job.upper()}_{key}", str(default)))
+
+
+def job(name: str, run, interval: float, jitter: float = 0.0, **kw) -> Job:
+    return Job(name, env_float(name, "INTERVAL", interval), run, env_float(name, "JITTER", jitter), **kw)
+
+
+async def penguin_monitor(shared: Shared) -> list[Job]:
+    import penguin_monitor as pm
+    from http_cache import HttpCache
+    from ratelimit import TokenBucket
+
+    pm._http, pm._bucket = HttpCache(session=shared.session), TokenBucket(pm.WATCH_RPS)
+    pm.send_telegram = lambda msg: shared.outbox.enqueue(msg, "openclaw", job="penguin_monitor")
+    watch = pm.load_watchlist(os.getenv("PENGUIN_WATCHLIST"))
+    for w in watch:
+        w.store, w.hist = pm.open_history(w)
+    notify = os.getenv("PENGUIN_NOTIFY", "1") == "1"
+    return [job("penguin_monitor", lambda: pm.run_once(watch, notify=notify), 60, 5)]
+
+
+async def threeca_outflow(shared: Shared) -> list[Job]:
+    import threeca_outflow_watch as tw
+    from outflow_rules import RuleEngine, load_rules
+
+    tw.client = shared.rpc
+    tw.send = lambda msg: shared.outbox.enqueue(msg, "openclaw", target=tw.TARGET, job="threeca_outflow")
+    rules = os.getenv("OUTFLOW_RULES")
+    engine = RuleEngine(load_rules(rules) if rules else tw.default_rules())
+    if os.getenv("THREECA_STREAM") == "1":
+        # stream() 은 websockets 가 없으면 2 를 돌려주고 끝나서 service 로 계속 재시작만 되므로 여기서 막는다
+        if importlib.util.find_spec("websockets") is None:
+            raise ImportError("THREECA_STREAM=1 needs the websockets package (pip install websockets)")
+
+        # stream 이 자체적으로 THREECA_GAP_FILL_SEC 마다 gap-fill 한다
+        return [job("threeca_outflow", lambda: tw.stream(engine), 0, service=True)]
+    watcher = tw.Watcher(engine)
+    return [job("threeca_outflow", watcher.gap_fill, 300, 20, retry=60)]
+
+
+async def kidsclub_friends(shared: Shared) -> list[Job]:
+    import friend_reservation_monitor as frm
+
+    frm.safe_telegram = lambda token, text: shared.outbox.enqueue(text, "telegram", target=frm.CHAT_ID, job="kidsclub_friends")
+    state = {}
+
+    def cycle():
+        frm.require_env()
+        if not state:
+            # baseline 잡기도 tick 안에서 (실패하면 retry 로 다시)
+            state["baseline"], state["last_seen"] = frm.start_monitor(None, shared.session)
+        try:
+            state["last_seen"] = frm.run_once_cycle(None, state["baseline"], state["last_seen"], session=shared.session)
+        except Exception as e:
+            frm.safe_telegram(None, f"⚠️ 친구 예약 모니터 오류: {e}")
+            raise
+
+    return [job("kidsclub_friends", cycle, frm.POLL_SECONDS, 60, group="wecan", retry=frm.RETRY_SECONDS)]
+
+
+async def kidsclub_snapshot(shared: Shared) -> list[Job]:
+    import update_snapshot
+
+    # 같은 사이트에 로그인하므로 kidsclub_friends 와 겹치지 않게 group 으로 묶는다
+    return [job("kidsclub_snapshot", lambda: update_snapshot.main(shared.session), 1800, 120, group="wecan", retry=300)]
+
+
+PLUGINS = {
+    "penguin_monitor": penguin_monitor,
+    "threeca_outflow": threeca_outflow,
+    "kidsclub_friends": kidsclub_friends,
+    "kidsclub_snapshot": kidsclub_snapshot,
+}
+
+
+async def build_jobs(names: list[str], shared: Shared, strict: bool = False) -> list[Job]:
+    """plugin 하나가 import/초기화에 실패해도(패키지 없음, 설정 누락) 나머지 job 은 띄운다 (strict 면 그대로 raise)."""
+    jobs = []
+    for name in names:
+        try:
+            jobs.extend(await PLUGINS[name](shared))
+        except Exception as e:
+            if strict:
+                raise
+            log(f"plugin {name} disabled: {type(e).__name__}: {e}")
+    return jobs
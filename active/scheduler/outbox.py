@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Notification outbox shared by the scheduler jobs (SQLite).
+
+job 은 enqueue() 만 하고 바로 돌아가며, 스케줄러의 sender task 가 순서대로 보낸다.
+보내다 실패하면 attempts 를 올리고 backoff 뒤 재시도 (MAX_ATTEMPTS 넘으면 포기, 기록은 남김).
+프로세스가 죽어도 안 보낸 메시지는 다음 기동 때 이어서 보낸다.
+
+channel:
+  - openclaw : `node openclaw message send --channel telegram` (market-monitor 스크립트들이 쓰던 방식)
+  - telegram : bot API sendMessage (kidsclub 모니터가 쓰던 방식, TELEGRAM_TOKEN_FILE)
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+OUTBOX_PATH = Path(os.getenv("NOTIFY_OUTBOX_DB", "/home/kspoopoo/.openclaw/workspace/state/notify_outbox.sqlite"))
+OPENCLAW_BIN = "node /home/kspoopoo/openclaw/dist/index.js"
+TG_TARGET_DEFAULT = "497612383"
+TOKEN_FILE = Path(os.getenv("TELEGRAM_TOKEN_FILE", "/home/kspoopoo/openclaw/secrets/telegram_main_bot_token"))
+MAX_ATTEMPTS = 8
+BACKOFF_MAX = 600.0
+
+
+class Outbox:
+    def __init__(self, path: Path = OUTBOX_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              job TEXT,
+              channel TEXT NOT NULL,
+              target TEXT NOT NULL,
+              text TEXT NOT NULL,
+              created_at INTEGER NOT NULL,
+              next_at REAL NOT NULL,
+              attempts INTEGER NOT NULL DEFAULT 0,
+              sent_at INTEGER,
+              last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (sent_at, next_at);
+            """
+        )
+        self.db.commit()
+        # sync job 은 worker thread 에서 enqueue 한다
+        self.lock = threading.Lock()
+
+    def enqueue(self, text: str, channel: str = "openclaw", target: str | None = None, job: str | None = None) -> None:
+        target = target or os.getenv("PENGUIN_TG_TARGET", TG_TARGET_DEFAULT)
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO outbox (job, channel, target, text, created_at, next_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job, channel, target, text, int(now), now),
+            )
+
+    def due(self, limit: int = 20) -> list[tuple]:
+        with self.lock:
+            return self.db.execute(
+                "SELECT id, channel, target, text, attempts FROM outbox "
+                "WHERE sent_at IS NULL AND attempts < ? AND next_at <= ? ORDER BY id LIMIT ?",
+                (MAX_ATTEMPTS, time.time(), limit),
+            ).fetchall()
+
+    def mark_sent(self, msg_id: int) -> None:
+        with self.lock, self.db:
+            self.db.execute("UPDATE outbox SET sent_at=?, attempts=attempts+1 WHERE id=?", (int(time.time()), msg_id))
+
+    def mark_failed(self, msg_id: int, attempts: int, error: str) -> None:
+        delay = min(BACKOFF_MAX, 5.0 * 2 ** attempts)
+        with self.lock, self.db:
+            self.db.execute("UPDATE outbox SET attempts=attempts+1, next_at=?, last_error=? WHERE id=?",
+                            (time.time() + delay, error[:500], msg_id))
+
+    def pending(self) -> int:
+        with self.lock:
+            return self.db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL AND attempts < ?", (MAX_ATTEMPTS,)
+            ).fetchone()[0]
+
+
+def send_openclaw(target: str, text: str) -> None:
+    import subprocess
+
+    cmd = f"{OPENCLAW_BIN} message send --channel telegram --target {shlex.quote(target)} --message {shlex.quote(text)}"
+    r = subprocess.run(cmd, shell=True, check=False, capture_output=True, text=True, timeout=60)
+    if r.returncode != 0:
+        raise RuntimeError(f"openclaw exit {r.returncode}: {' '.join((r.stderr or r.stdout).split())[-200:]}")
+
+
+def send_telegram(session, target: str, text: str) -> None:
+    token = TOKEN_FILE.read_text(encoding="utf-8").strip()
+    r = session.post(f"https://api.telegram.org/bot{token}/sendMessage", data={"chat_id": target, "text": text}, timeout=15)
+    r.raise_for_status()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Single in-process scheduler for the market-monitor / kidsclub jobs.
+
+job 마다 프로세스(while True + sleep, cron, Actions)를 따로 띄우던 것을 asyncio 루프 하나에 올린다.
+  - 공유: requests.Session(커넥션 풀), Solana RPCClient, 알림 outbox (jobs.Shared)
+  - 고정 격자 스케줄: t0 + k*interval 에 실행 (jitter 는 매번 따로 더하고 누적하지 않음)
+    → 실행이 오래 걸려도 다음 시각이 밀리지 않고, interval 을 넘기면 지난 tick 은 건너뛰고 overrun 으로 센다
+  - 같은 job 은 절대 겹쳐 돌지 않고(job 당 루프 하나), group 이 같은 job 끼리도 한 번에 하나만 (같은 사이트 로그인 등)
+  - 실패하면 retry 초 뒤 한 번 더 (격자는 그대로)
+  - service job(websocket 등 계속 도는 것)은 끝나거나 죽으면 backoff 후 다시 띄운다
+  - job 별 실행 기록(SQLite job_health): runs/failures/overruns/last_ms/avg_ms/last_error/next_at
+  - 데몬은 SCHED_DB.lock 을 flock 으로 잡아서 두 개가 동시에 뜨지 않게 한다
+
+Usage:
+  python3 scheduler.py                         # SCHED_JOBS (기본: 전부)
+  python3 scheduler.py --jobs penguin_monitor,threeca_outflow
+  python3 scheduler.py --once kidsclub_snapshot
+  python3 scheduler.py --status
+  python3 scheduler.py --list
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fcntl
+import inspect
+import os
+import random
+import signal
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+SCHED_DB = Path(os.getenv("SCHED_DB", "/home/kspoopoo/.openclaw/workspace/state/scheduler.sqlite"))
+OUTBOX_POLL = 2.0
+SERVICE_BACKOFF_MAX = 300.0
+# avg_ms 는 EWMA
+AVG_ALPHA = 0.2
+
+
+def log(msg: str) -> None:
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    run: Callable[[], Any]  # 인자 없는 함수 (sync 면 worker thread, async 면 루프에서)
+    jitter: float = 0.0
+    group: str | None = None
+    retry: float | None = None
+    service: bool = False
+
+
+@dataclass
+class Health:
+    runs: int = 0
+    failures: int = 0
+    consecutive: int = 0
+    overruns: int = 0
+    last_start: float = 0.0
+    last_ms: float = 0.0
+    avg_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ok: float = 0.0
+    last_error: str | None = None
+    next_at: float = 0.0
+
+
+class HealthTable:
+    def __init__(self, path: Path = SCHED_DB):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS job_health (
+              name TEXT PRIMARY KEY,
+              interval REAL NOT NULL,
+              runs INTEGER NOT NULL,
+              failures INTEGER NOT NULL,
+              consecutive INTEGER NOT NULL,
+              overruns INTEGER NOT NULL,
+              last_start REAL,
+              last_ms REAL,
+              avg_ms REAL,
+              max_ms REAL,
+              last_ok REAL,
+              last_error TEXT,
+              next_at REAL,
+              updated_at REAL NOT NULL
+            );
+            """
+        )
+        self.db.commit()
+
+    def load(self, name: str) -> Health:
+        row = self.db.execute(
+            "SELECT runs, failures, consecutive, overruns, last_start, last_ms, avg_ms, max_ms, last_ok, last_error "
+            "FROM job_health WHERE name=?", (name,)
+        ).fetchone()
+        if not row:
+            return Health()
+        return Health(*[x if x is not None else 0.0 for x in row[:9]], last_error=row[9])
+
+    def save(self, job: Job, h: Health) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO job_health VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.name, job.interval, h.runs, h.failures, h.consecutive, h.overruns, h.last_start, h.last_ms,
+                 h.avg_ms, h.max_ms, h.last_ok, h.last_error, h.next_at, time.time()),
+            )
+
+    def rows(self) -> list[tuple]:
+        return self.db.execute(
+            "SELECT name, interval, runs, failures, consecutive, overruns, last_ms, avg_ms, max_ms, last_ok, last_error, "
+            "next_at FROM job_health ORDER BY name"
+        ).fetchall()
+
+
+class Scheduler:
+    def __init__(self, jobs: list[Job], shared, table: HealthTable | None = None):
+        self.jobs = jobs
+        self.shared = shared
+        self.table = table or HealthTable()
+        self.health = {j.name: self.table.load(j.name) for j in jobs}
+        self.groups: dict[str, asyncio.Lock] = {}
+
+    async def run_job(self, job: Job) -> bool:
+        h = self.health[job.name]
+        lock = self.groups.setdefault(job.group, asyncio.Lock()) if job.group else None
+        if lock is not None:
+            await lock.acquire()
+        h.last_start = time.time()
+        t0 = time.monotonic()
+        try:
+            if inspect.iscoroutinefunction(job.run):
+                await job.run()
+            else:
+                r = await asyncio.to_thread(job.run)
+                if inspect.isawaitable(r):
+                    await r
+            ok, err = True, None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ok, err = False, f"{type(e).__name__}: {e}"
+        finally:
+            if lock is not None:
+                lock.release()
+        ms = (time.monotonic() - t0) * 1000
+        h.runs += 1
+        h.last_ms = ms
+        h.max_ms = max(h.max_ms, ms)
+        h.avg_ms = ms if h.runs == 1 else h.avg_ms + AVG_ALPHA * (ms - h.avg_ms)
+        if ok:
+            h.consecutive = 0
+            h.last_ok = time.time()
+        else:
+            h.failures += 1
+            h.consecutive += 1
+            h.last_error = err[:500]
+            log(f"{job.name} failed ({h.consecutive}x): {err}")
+        return ok
+
+    async def interval_loop(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        h = self.health[job.name]
+        # 첫 실행도 jitter 만큼 흩어서 기동 직후 한꺼번에 몰리지 않게
+        base = loop.time()
+        k = 0
+        target = base + random.uniform(0, job.jitter)
+        while True:
+            h.next_at = time.time() + max(0.0, target - loop.time())
+            self.table.save(job, h)
+            await asyncio.sleep(max(0.0, target - loop.time()))
+            ok = await self.run_job(job)
+            now = loop.time()
+            # 다음 격자 tick. 실행이 interval 을 넘겼으면 지나간 tick 은 건너뛴다 (몰아서 따라잡지 않음)
+            nxt = max(k + 1, int((now - base) // job.interval) + 1)
+            if nxt > k + 1:
+                h.overruns += nxt - k - 1
+                log(f"{job.name} overran: {(now - base) - k * job.interval:.1f}s > {job.interval:.0f}s, skipped {nxt - k - 1} tick(s)")
+            k = nxt
+            target = base + k * job.interval + random.uniform(0, job.jitter)
+            if not ok and job.retry and now + job.retry < target:
+                target = now + job.retry
+                # retry 는 격자 밖 실행: 끝나면 원래 잡혀 있던 tick 으로 돌아가도록 k 를 되돌린다
+                k -= 1
+
+    async def service_loop(self, job: Job) -> None:
+        h = self.health[job.name]
+        backoff = 1.0
+        while True:
+            h.next_at = 0.0
+            self.table.save(job, h)
+            t0 = time.monotonic()
+            await self.run_job(job)
+            # 오래 잘 돌다 끊긴 거면 backoff 초기화
+            if time.monotonic() - t0 > SERVICE_BACKOFF_MAX:
+                backoff = 1.0
+            log(f"{job.name} exited; restart in {backoff:.0f}s")
+            h.next_at = time.time() + backoff
+            self.table.save(job, h)
+            await asyncio.sleep(backoff)
+            backoff = min(SERVICE_BACKOFF_MAX, backoff * 2)
+
+    async def outbox_loop(self) -> None:
+        while True:
+            await self.shared.drain()
+            await asyncio.sleep(OUTBOX_POLL)
+
+    async def run(self) -> None:
+        tasks = [asyncio.create_task(self.outbox_loop(), name="outbox")]
+        for job in self.jobs:
+            loop_fn = self.service_loop if job.service else self.interval_loop
+            tasks.append(asyncio.create_task(loop_fn(job), name=job.name))
+            log(f"scheduled {job.name}: " + ("service" if job.service else f"every {job.interval:.0f}s ±{job.jitter:.0f}s"))
+        stop = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        await stop.wait()
+        log("stopping")
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            # 보내다 만 알림은 outbox 에 남아서 다음 기동 때 나간다
+            await asyncio.wait_for(self.shared.drain(), timeout=30)
+        except asyncio.TimeoutError:
+            log("outbox drain timed out at shutdown; pending messages stay queued")
+        finally:
+            for job in self.jobs:
+                self.table.save(job, self.health[job.name])
+
+
+def fmt_ts(ts: float | None) -> str:
+    return datetime.fromtimestamp(ts).strftime("%m-%d %H:%M:%S") if ts else "-"
+
+
+def print_status(table: HealthTable) -> int:
+    now = time.time()
+    print(f"{'job':<20} {'every':>6} {'runs':>6} {'fail':>5} {'over':>5} {'last':>8} {'avg':>8} {'max':>8} "
+          f"{'last ok':>15} {'next':>15}  state")
+    for name, interval, runs, fail, consecutive, over, last_ms, avg_ms, max_ms, last_ok, err, next_at in table.rows():
+        if consecutive:
+            state = f"FAILING x{consecutive}: {(err or '')[:80]}"
+        elif next_at and now > next_at + max(60.0, interval):
+            state = "STALE (데몬이 멈췄거나 job 이 끝나지 않음)"
+        else:
+            state = "ok"
+        print(f"{name:<20} {interval:>6.0f} {runs:>6} {fail:>5} {over:>5} {last_ms or 0:>7.0f}ms {avg_ms or 0:>6.0f}ms "
+              f"{max_ms or 0:>6.0f}ms {fmt_ts(last_ok):>15} {fmt_ts(next_at):>15}  {state}")
+    return 0
+
+
+def acquire_daemon_lock(path: Path):
+    f = open(path.with_suffix(path.suffix + ".lock"), "w")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise SystemExit(f"scheduler already running ({f.name})")
+    f.write(str(os.getpid()))
+    f.flush()
+    return f
+
+
+async def run_once(jobs: list[Job], shared, name: str) -> int:
+    job = next((j for j in jobs if j.name == name), None)
+    if job is None:
+        print(f"unknown job: {name}", file=sys.stderr)
+        return 2
+    s = Scheduler([job], shared)
+    ok = await s.run_job(job)
+    s.table.save(job, s.health[job.name])
+    await shared.drain()
+    return 0 if ok else 1
+
+
+async def amain(args) -> int:
+    from jobs import PLUGINS, Shared, build_jobs
+
+    if args.list:
+        for name in PLUGINS:
+            print(name)
+        return 0
+    names = [x.strip() for x in (args.once or args.jobs).split(",") if x.strip()]
+    unknown = [n for n in names if n not in PLUGINS]
+    if unknown:
+        print(f"unknown job(s): {', '.join(unknown)} (--list)", file=sys.stderr)
+        return 2
+    shared = Shared()
+    jobs = await build_jobs(names, shared, strict=bool(args.once))
+    if not jobs:
+        return 1
+    if args.once:
+        return await run_once(jobs, shared, args.once)
+    lock = acquire_daemon_lock(SCHED_DB)
+    try:
+        await Scheduler(jobs, shared).run()
+    finally:
+        lock.close()
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", default=os.getenv("SCHED_JOBS", "penguin_monitor,threeca_outflow,kidsclub_friends,kidsclub_snapshot"))
+    ap.add_argument("--once", help="job 하나만 한 번 실행 (health 기록 + outbox 전송까지)")
+    ap.add_argument("--status", action="store_true", help="job_health 표 출력")
+    ap.add_argument("--list", action="store_true", help="등록된 job 이름")
+    args = ap.parse_args()
+    if args.status:
+        return print_status(HealthTable())
+    return asyncio.run(amain(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())